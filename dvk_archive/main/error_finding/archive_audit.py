@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+
+from argparse import ArgumentParser
+from dvk_archive.main.color_print import color_print
+from dvk_archive.main.error_finding.missing_media import is_missing_media
+from dvk_archive.main.error_finding.missing_sequence_info import is_missing_sequence_info
+from dvk_archive.main.error_finding.same_ids import add_group_keys
+from dvk_archive.main.error_finding.same_ids import get_direct_url_keys
+from dvk_archive.main.error_finding.same_ids import get_group_files
+from dvk_archive.main.error_finding.same_ids import get_id_keys
+from dvk_archive.main.error_finding.same_ids import get_page_url_keys
+from dvk_archive.main.error_finding.sequence_errors import get_sequence_errors
+from dvk_archive.main.error_finding.unlinked_media import get_unlinked_in_scan
+from dvk_archive.main.file.dvk_handler import DvkHandler
+from dvk_archive.main.file.sequence_graph import SequenceGraph
+from dvk_archive.main.processing.string_processing import truncate_path
+from json import dumps
+from os import getcwd
+from os.path import abspath, exists, isdir
+from tqdm import tqdm
+from typing import List
+
+def audit_archive(directory:str=None,
+            workers:int=1,
+            use_catalog:bool=False,
+            dvk_handler:DvkHandler=None,
+            use_processes:bool=False) -> dict:
+    """
+    Runs all error checks on a DVK archive, reading the DVK files only once.
+    Per-Dvk checks share a single pass over the Dvks, and one SequenceGraph
+    is used for sequence errors, forks, cycles and orphans.
+    Returns a report with the DVK files or media files found by each check.
+
+    :param directory: Directory in which to search, defaults to None
+    :type directory: str, optional
+    :param workers: Number of workers used to read DVK files, defaults to 1
+    :type workers: int, optional
+    :param use_catalog: Whether to use a catalog to skip unchanged DVK files, defaults to False
+    :type use_catalog: bool, optional
+    :param dvk_handler: Pre-loaded DvkHandler to search instead of a directory, defaults to None
+    :type dvk_handler: DvkHandler, optional
+    :param use_processes: Whether to read DVK files with processes rather than threads, defaults to False
+    :type use_processes: bool, optional
+    :return: Report of all the errors found
+    :rtype: dict
+    """
+    # Read and sort Dvks for the given directory if no DvkHandler is given
+    if dvk_handler is None:
+        # Return None if directory is invalid
+        if directory is None or not exists(directory) or not isdir(directory):
+            return None
+        dvk_handler = DvkHandler(workers=workers, use_processes=use_processes, use_catalog=use_catalog)
+        dvk_handler.read_dvks(directory, keep_scan=True)
+        dvk_handler.sort_dvks("a")
+    # Run the per-Dvk checks in a single pass
+    missing_media = []
+    missing_sequence_info = []
+    same_ids = dict()
+    same_page_urls = dict()
+    same_direct_urls = dict()
+    media = set()
+    print("Auditing DVK files:")
+    for dvk_num in tqdm(range(0, dvk_handler.get_size())):
+        dvk = dvk_handler.get_dvk(dvk_num)
+        if is_missing_media(dvk):
+            missing_media.append(dvk.get_dvk_file())
+        if is_missing_sequence_info(dvk):
+            missing_sequence_info.append(dvk.get_dvk_file())
+        add_group_keys(same_ids, get_id_keys(dvk), dvk_num)
+        add_group_keys(same_page_urls, get_page_url_keys(dvk), dvk_num)
+        add_group_keys(same_direct_urls, get_direct_url_keys(dvk), dvk_num)
+        if dvk.get_media_file() is not None:
+            media.add(dvk.get_media_file())
+        if dvk.get_secondary_file() is not None:
+            media.add(dvk.get_secondary_file())
+    # Build the links between Dvks once for all sequence checks
+    graph = SequenceGraph(dvk_handler)
+    # Create the report
+    report = dict()
+    report["directory"] = directory
+    report["dvks"] = dvk_handler.get_size()
+    report["missing_media"] = missing_media
+    report["same_ids"] = get_group_files(dvk_handler, same_ids)
+    report["same_page_urls"] = get_group_files(dvk_handler, same_page_urls)
+    report["same_direct_urls"] = get_group_files(dvk_handler, same_direct_urls)
+    report["sequence_errors"] = get_sequence_errors(dvk_handler=dvk_handler, sequence_graph=graph)
+    report["sequence_forks"] = get_dvk_files(dvk_handler, graph.get_forks())
+    report["sequence_orphans"] = get_dvk_files(dvk_handler, graph.get_orphans())
+    cycles = []
+    for cycle in graph.get_cycles():
+        cycles.append(get_dvk_files(dvk_handler, cycle))
+    report["sequence_cycles"] = cycles
+    report["missing_sequence_info"] = missing_sequence_info
+    report["unlinked_media"] = get_unlinked_in_scan(dvk_handler, media)
+    return report
+
+def get_dvk_files(dvk_handler:DvkHandler=None, indexes:List[int]=None) -> List[str]:
+    """
+    Returns the DVK files for the given Dvk indexes.
+
+    :param dvk_handler: DvkHandler holding Dvks, defaults to None
+    :type dvk_handler: DvkHandler, optional
+    :param indexes: Indexes of Dvks in the DvkHandler, defaults to None
+    :type indexes: list[int], optional
+    :return: Paths of the DVK files
+    :rtype: list[str]
+    """
+    files = []
+    if dvk_handler is None or indexes is None:
+        return files
+    for index in indexes:
+        files.append(dvk_handler.get_dvk(index).get_dvk_file())
+    return files
+
+def print_report(report:dict=None, directory:str=None):
+    """
+    Prints the results of an archive audit in a readable format.
+
+    :param report: Report created by audit_archive, defaults to None
+    :type report: dict, optional
+    :param directory: Directory to show paths relative to, defaults to None
+    :type directory: str, optional
+    """
+    if report is None:
+        return
+    found = False
+    # Print lists of single files
+    titles = [["missing_media", "MISSING MEDIA:"],
+                ["missing_sequence_info", "MISSING SEQUENCE INFO:"],
+                ["sequence_forks", "SEQUENCE FORKS:"],
+                ["sequence_orphans", "SEQUENCE ORPHANS:"],
+                ["unlinked_media", "UNLINKED MEDIA:"]]
+    for title in titles:
+        if len(report[title[0]]) > 0:
+            found = True
+            print()
+            color_print(title[1], "r")
+            for item in report[title[0]]:
+                print(truncate_path(directory, item))
+    # Print grouped files
+    titles = [["same_ids", "SAME IDS:"],
+                ["same_page_urls", "SAME PAGE URLS:"],
+                ["same_direct_urls", "SAME DIRECT URLS:"],
+                ["sequence_errors", "SEQUENCE ERRORS:"],
+                ["sequence_cycles", "SEQUENCE CYCLES:"]]
+    for title in titles:
+        if len(report[title[0]]) > 0:
+            found = True
+            print()
+            color_print(title[1], "r")
+            for group in report[title[0]]:
+                print(truncate_path(directory, group[0]))
+                for k in range(1, len(group)):
+                    print("    " + truncate_path(directory, group[k]))
+    if not found:
+        color_print("No errors found in " + str(report["dvks"]) + " DVK files.", "g")
+
+def main():
+    """
+    Sets up commands for auditing a DVK archive.
+    """
+    parser = ArgumentParser()
+    parser.add_argument(
+            "directory",
+            help="Directory in which to search for errors.",
+            nargs="?",
+            type=str,
+            default=str(getcwd()))
+    parser.add_argument(
+            "-w",
+            "--workers",
+            help="Number of workers used to read DVK files.",
+            type=int,
+            default=1)
+    parser.add_argument(
+            "-P",
+            "--processes",
+            help="Reads DVK files with worker processes instead of threads.",
+            action="store_true")
+    parser.add_argument(
+            "-c",
+            "--catalog",
+            help="Uses a catalog file to skip reading unchanged DVK files.",
+            action="store_true")
+    parser.add_argument(
+            "-j",
+            "--json",
+            help="Writes the report to the given JSON file.",
+            type=str,
+            default=None)
+    args = parser.parse_args()
+    full_directory = abspath(args.directory)
+    # Check if directory exists
+    if (full_directory is not None
+            and exists(full_directory)
+            and isdir(full_directory)):
+        # Run all checks and print the report
+        report = audit_archive(full_directory, args.workers, args.catalog, use_processes=args.processes)
+        print_report(report, full_directory)
+        # Write the report as JSON, if specified
+        if args.json is not None:
+            with open(abspath(args.json), "w") as out_file:
+                out_file.write(dumps(report, indent=4))
+    else:
+        color_print("Invalid directory", "r")
+
+if __name__ == "__main__":
+    main()
@@ -10,34 +10,60 @@ from os.path import abspath, exists, isdir
 from tqdm import tqdm
 from typing import List
 
-def get_missing_media_dvks(directory:str=None) -> List[str]:
+def is_missing_media(dvk:Dvk=None) -> bool:
+    """
+    Returns whether a Dvk is missing its primary or secondary media file.
+
+    :param dvk: Dvk to check, defaults to None
+    :type dvk: Dvk, optional
+    :return: Whether linked media is missing
+    :rtype: bool
+    """
+    if dvk is None:
+        return False
+    media = dvk.get_media_file()
+    secondary = dvk.get_secondary_file()
+    return (media is None
+            or not exists(media)
+            or (secondary is not None and not exists(secondary)))
+
+def get_missing_media_dvks(directory:str=None,
+            workers:int=1,
+            use_catalog:bool=False,
+            dvk_handler:DvkHandler=None,
+            use_processes:bool=False) -> List[str]:
     """
     Returns list of Dvks missing their associated media file(s).
 
     :param directory: Directory in which to search, defaults to None
     :type directory: str, optional
+    :param workers: Number of workers used to read DVK files, defaults to 1
+    :type workers: int, optional
+    :param use_catalog: Whether to use a catalog to skip unchanged DVK files, defaults to False
+    :type use_catalog: bool, optional
+    :param dvk_handler: Pre-loaded DvkHandler to search instead of a directory, defaults to None
+    :type dvk_handler: DvkHandler, optional
+    :param use_processes: Whether to read DVK files with processes rather than threads, defaults to False
+    :type use_processes: bool, optional
     :return: Dvk files with missing primary or secondary media
     :rtype: list[str]
     """
-    # RETURN EMPTY LIST IF DIRECTORY IS INVALID
-    if directory is None or not exists(directory) or not isdir(directory):
-        return []
-    # READ DVKS FOR THE GIVEN DIRECTORY
-    dvk_handler = DvkHandler()
-    dvk_handler.read_dvks(directory)
-    dvk_handler.sort_dvks("a")
+    # READ DVKS FOR THE GIVEN DIRECTORY IF NO DVK HANDLER IS GIVEN
+    if dvk_handler is None:
+        # RETURN EMPTY LIST IF DIRECTORY IS INVALID
+        if directory is None or not exists(directory) or not isdir(directory):
+            return []
+        dvk_handler = DvkHandler(workers=workers, use_processes=use_processes, use_catalog=use_catalog)
+        dvk_handler.read_dvks(directory)
+        dvk_handler.sort_dvks("a")
     # CHECK EACH DVK TO SEE IF LINKED MEDIA EXISTS
     missing = []
     size = dvk_handler.get_size()
     print("Finding DVKs with missing media:")
     for dvk_num in tqdm(range(0, size)):
         dvk = dvk_handler.get_dvk(dvk_num)
-        media = dvk.get_media_file()
-        secondary = dvk.get_secondary_file()
         # ADD TO MISSING LIST IF MEDIA DOESN'T EXIST
-        if (media is None
-                or not exists(media)
-                or (secondary is not None and not exists(secondary))):
+        if is_missing_media(dvk):
             missing.append(dvk.get_dvk_file())
     # RETURN LIST OF DVKS WITH MISSING MEDIA
     return missing
@@ -53,6 +79,22 @@ def main():
             nargs="?",
             type=str,
             default=str(getcwd()))
+    parser.add_argument(
+            "-w",
+            "--workers",
+            help="Number of workers used to read DVK files.",
+            type=int,
+            default=1)
+    parser.add_argument(
+            "-P",
+            "--processes",
+            help="Reads DVK files with worker processes instead of threads.",
+            action="store_true")
+    parser.add_argument(
+            "-c",
+            "--catalog",
+            help="Uses a catalog file to skip reading unchanged DVK files.",
+            action="store_true")
     args = parser.parse_args()
     full_directory = abspath(args.directory)
     # CHECK IF DIRECTORY EXISTS
@@ -60,7 +102,7 @@ def main():
             and exists(full_directory)
             and isdir(full_directory)):
         # GET LIST OF DVKS WITH MISSING MEDIA
-        missing = get_missing_media_dvks(full_directory)
+        missing = get_missing_media_dvks(full_directory, args.workers, args.catalog, use_processes=args.processes)
         # PRINT LIST
         if len(missing) > 0:
             print()
@@ -2,6 +2,7 @@
 
 from argparse import ArgumentParser
 from dvk_archive.main.color_print import color_print
+from dvk_archive.main.file.dvk import Dvk
 from dvk_archive.main.file.dvk_handler import DvkHandler
 from dvk_archive.main.processing.string_processing import truncate_path
 from os import getcwd
@@ -9,21 +10,47 @@ from os.path import abspath, exists, isdir
 from tqdm import tqdm
 from typing import List
 
-def get_missing_sequence_info(directory:str=None) -> List[str]:
+def is_missing_sequence_info(dvk:Dvk=None) -> bool:
+    """
+    Returns whether a Dvk is missing its prev_id or next_id.
+
+    :param dvk: Dvk to check, defaults to None
+    :type dvk: Dvk, optional
+    :return: Whether sequence info is missing
+    :rtype: bool
+    """
+    if dvk is None:
+        return False
+    return dvk.get_prev_id() is None or dvk.get_next_id() is None
+
+def get_missing_sequence_info(directory:str=None,
+            workers:int=1,
+            use_catalog:bool=False,
+            dvk_handler:DvkHandler=None,
+            use_processes:bool=False) -> List[str]:
     """
     Returns list of Dvks that are missing prev_id or next_id values.
 
     :param directory: Directory in which to search, defaults to None
     :type directory: str, optional
+    :param workers: Number of workers used to read DVK files, defaults to 1
+    :type workers: int, optional
+    :param use_catalog: Whether to use a catalog to skip unchanged DVK files, defaults to False
+    :type use_catalog: bool, optional
+    :param dvk_handler: Pre-loaded DvkHandler to search instead of a directory, defaults to None
+    :type dvk_handler: DvkHandler, optional
+    :param use_processes: Whether to read DVK files with processes rather than threads, defaults to False
+    :type use_processes: bool, optional
     :return: List of paths of DVK files with missing sequence info
     :rtype: list[str]
     """
-    # Return empty list if directory is invalid
-    if directory is None or not exists(directory) or not isdir(directory):
-        return []
-    # Read Dvks for the given directory
-    dvk_handler = DvkHandler(directory)
-    dvk_handler.sort_dvks("a")
+    # Read Dvks for the given directory if no DvkHandler is given
+    if dvk_handler is None:
+        # Return empty list if directory is invalid
+        if directory is None or not exists(directory) or not isdir(directory):
+            return []
+        dvk_handler = DvkHandler(directory, workers, use_processes, use_catalog)
+        dvk_handler.sort_dvks("a")
     # Check each dvk to see if they are missing sequence info
     missing = []
     size = dvk_handler.get_size()
@@ -31,7 +58,7 @@ def get_missing_sequence_info(directory:str=None) -> List[str]:
     for dvk_num in tqdm(range(0, size)):
         dvk = dvk_handler.get_dvk(dvk_num)
         # Add DVK file path to missing list if sequence info is missing
-        if dvk.get_prev_id() is None or dvk.get_next_id() is None:
+        if is_missing_sequence_info(dvk):
             missing.append(dvk.get_dvk_file())
     # Return list of DVK files with missing sequence info
     return missing
@@ -47,6 +74,22 @@ def main():
             nargs="?",
             type=str,
             default=str(getcwd()))
+    parser.add_argument(
+            "-w",
+            "--workers",
+            help="Number of workers used to read DVK files.",
+            type=int,
+            default=1)
+    parser.add_argument(
+            "-P",
+            "--processes",
+            help="Reads DVK files with worker processes instead of threads.",
+            action="store_true")
+    parser.add_argument(
+            "-c",
+            "--catalog",
+            help="Uses a catalog file to skip reading unchanged DVK files.",
+            action="store_true")
     args = parser.parse_args()
     full_directory = abspath(args.directory)
     # Check if directory exists
@@ -54,7 +97,7 @@ def main():
             and exists(full_directory)
             and isdir(full_directory)):
         # Get list of dvks with missing sequence info
-        missing = get_missing_sequence_info(full_directory)
+        missing = get_missing_sequence_info(full_directory, args.workers, args.catalog, use_processes=args.processes)
         # Print list
         if len(missing) > 0:
             print()
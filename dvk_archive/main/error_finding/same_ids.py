@@ -8,47 +8,232 @@ from dvk_archive.main.processing.string_processing import truncate_path
 from os import getcwd
 from os.path import abspath, exists, isdir
 from tqdm import tqdm
-from typing import List
+from typing import Callable, List
 
-def get_same_ids(directory:str=None) -> List[List[str]]:
+def add_group_keys(groups:dict=None, keys:List[str]=None, dvk_num:int=None):
+    """
+    Adds the index of a Dvk to the group for each of its keys.
+    Groups are created in the order keys are first found.
+
+    :param groups: Dict of Dvk indexes grouped by key, defaults to None
+    :type groups: dict, optional
+    :param keys: Keys of the Dvk, defaults to None
+    :type keys: list[str], optional
+    :param dvk_num: Index of the Dvk, defaults to None
+    :type dvk_num: int, optional
+    """
+    if groups is None or keys is None or dvk_num is None:
+        return
+    for key in keys:
+        group = groups.setdefault(key, [])
+        if len(group) == 0 or not group[-1] == dvk_num:
+            group.append(dvk_num)
+
+def get_group_files(dvk_handler:DvkHandler=None, groups:dict=None) -> List[List[str]]:
+    """
+    Returns the DVK files for each group with more than one Dvk.
+
+    :param dvk_handler: DvkHandler holding Dvks, defaults to None
+    :type dvk_handler: DvkHandler, optional
+    :param groups: Dict of Dvk indexes grouped by key, defaults to None
+    :type groups: dict, optional
+    :return: List of DVK file groups that share the same key
+    :rtype: list[list[str]]
+    """
+    same = []
+    if dvk_handler is None or groups is None:
+        return same
+    for group in groups.values():
+        if len(group) > 1:
+            files = []
+            for dvk_num in group:
+                files.append(dvk_handler.get_dvk(dvk_num).get_dvk_file())
+            same.append(files)
+    return same
+
+def group_dvks(dvk_handler:DvkHandler=None,
+            get_keys:Callable[[Dvk], List[str]]=None) -> List[List[str]]:
+    """
+    Returns groups of DVK files that share any of the same keys.
+    Groups are ordered by the first Dvk with each key, as are files within groups.
+
+    :param dvk_handler: DvkHandler holding Dvks, defaults to None
+    :type dvk_handler: DvkHandler, optional
+    :param get_keys: Function returning the keys of a Dvk, defaults to None
+    :type get_keys: Callable[[Dvk], list[str]], optional
+    :return: List of DVK file groups that share the same key
+    :rtype: list[list[str]]
+    """
+    # Return empty list if parameters are invalid
+    if dvk_handler is None or get_keys is None:
+        return []
+    # Group Dvk indexes by key, keeping the order keys were first found
+    groups = dict()
+    for dvk_num in tqdm(range(0, dvk_handler.get_size())):
+        add_group_keys(groups, get_keys(dvk_handler.get_dvk(dvk_num)), dvk_num)
+    # Get DVK files for groups with more than one Dvk
+    return get_group_files(dvk_handler, groups)
+
+def get_id_keys(dvk:Dvk=None) -> List[str]:
+    """
+    Returns the Dvk ID of a Dvk as a list of keys for grouping.
+
+    :param dvk: Dvk to get keys from, defaults to None
+    :type dvk: Dvk, optional
+    :return: List containing the Dvk ID
+    :rtype: list[str]
+    """
+    return [dvk.get_dvk_id()]
+
+def get_page_url_keys(dvk:Dvk=None) -> List[str]:
+    """
+    Returns the page URL of a Dvk as a list of keys for grouping.
+    URLs are upper case, since URLs are compared without case.
+
+    :param dvk: Dvk to get keys from, defaults to None
+    :type dvk: Dvk, optional
+    :return: List containing the page URL, if any
+    :rtype: list[str]
+    """
+    if dvk.get_page_url() is None:
+        return []
+    return [dvk.get_page_url().upper()]
+
+def get_direct_url_keys(dvk:Dvk=None) -> List[str]:
+    """
+    Returns the direct and secondary URLs of a Dvk as a list of keys for grouping.
+    URLs are upper case, since URLs are compared without case.
+
+    :param dvk: Dvk to get keys from, defaults to None
+    :type dvk: Dvk, optional
+    :return: List containing the direct and secondary URLs, if any
+    :rtype: list[str]
+    """
+    keys = []
+    for url in [dvk.get_direct_url(), dvk.get_secondary_url()]:
+        if url is not None and not url.upper() in keys:
+            keys.append(url.upper())
+    return keys
+
+def get_same_ids(directory:str=None,
+            workers:int=1,
+            use_catalog:bool=False,
+            dvk_handler:DvkHandler=None,
+            use_processes:bool=False) -> List[List[str]]:
     """
     Returns a list of Dvks that share the same IDs.
     Files are grouped when they share the same DVK ID.
 
     :param directory: Directory in which to search, defaults to None
     :type directory: str, optional
+    :param workers: Number of workers used to read DVK files, defaults to 1
+    :type workers: int, optional
+    :param use_catalog: Whether to use a catalog to skip unchanged DVK files, defaults to False
+    :type use_catalog: bool, optional
+    :param dvk_handler: Pre-loaded DvkHandler to search instead of a directory, defaults to None
+    :type dvk_handler: DvkHandler, optional
+    :param use_processes: Whether to read DVK files with processes rather than threads, defaults to False
+    :type use_processes: bool, optional
     :return: List of Dvks that have identical Dvk IDs
     :rtype: list[list[str]]
     """
-    # RETURN EMPTY LIST IF DIRECTORY IS INVALID
-    if directory is None or not exists(directory) or not isdir(directory):
-        return []
-    # READ DVKS IN DIRECTORY
-    dvk_handler = DvkHandler()
-    dvk_handler.read_dvks(directory)
-    dvk_handler.sort_dvks("a")
-    # RUN THROUGH ALL DVKS
-    indexes = []
-    same = []
-    size = dvk_handler.get_size()
+    # READ DVKS IN DIRECTORY IF NO DVK HANDLER IS GIVEN
+    if dvk_handler is None:
+        # RETURN EMPTY LIST IF DIRECTORY IS INVALID
+        if directory is None or not exists(directory) or not isdir(directory):
+            return []
+        dvk_handler = DvkHandler(workers=workers, use_processes=use_processes, use_catalog=use_catalog)
+        dvk_handler.read_dvks(directory)
+        dvk_handler.sort_dvks("a")
+    # GROUP DVKS BY ID
     print("Finding DVK files with the same IDs:")
-    for comp_num in tqdm(range(0, size - 1)):
-        comp_dvk = dvk_handler.get_dvk(comp_num)
-        current_same = [comp_dvk.get_dvk_file()]
-        # ONLY CHECK DUPLICATES IF NOT ALREADY INCLUDED
-        if not comp_num in indexes:
-            for cur_num in range(comp_num + 1, size):
-                cur_dvk = dvk_handler.get_dvk(cur_num)
-                # CHECK IF IDS ARE THE SAME
-                if (not cur_num in indexes
-                        and comp_dvk.get_dvk_id() == cur_dvk.get_dvk_id()):
-                    indexes.append(cur_num)
-                    current_same.append(cur_dvk.get_dvk_file())
-        # ADD GROUP TO SAME ID LIST IF MATCHING IDS FOUND
-        if len(current_same) > 1:
-            same.append(current_same)
-    # RETURN LIST OF DVKS WITH THE SAME ID
-    return same
+    return group_dvks(dvk_handler, get_id_keys)
+
+def get_same_page_urls(directory:str=None,
+            workers:int=1,
+            use_catalog:bool=False,
+            dvk_handler:DvkHandler=None,
+            use_processes:bool=False) -> List[List[str]]:
+    """
+    Returns a list of Dvks that share the same page URLs.
+    Files are grouped when they share the same page URL, ignoring case.
+
+    :param directory: Directory in which to search, defaults to None
+    :type directory: str, optional
+    :param workers: Number of workers used to read DVK files, defaults to 1
+    :type workers: int, optional
+    :param use_catalog: Whether to use a catalog to skip unchanged DVK files, defaults to False
+    :type use_catalog: bool, optional
+    :param dvk_handler: Pre-loaded DvkHandler to search instead of a directory, defaults to None
+    :type dvk_handler: DvkHandler, optional
+    :param use_processes: Whether to read DVK files with processes rather than threads, defaults to False
+    :type use_processes: bool, optional
+    :return: List of Dvks that have identical page URLs
+    :rtype: list[list[str]]
+    """
+    # READ DVKS IN DIRECTORY IF NO DVK HANDLER IS GIVEN
+    if dvk_handler is None:
+        # RETURN EMPTY LIST IF DIRECTORY IS INVALID
+        if directory is None or not exists(directory) or not isdir(directory):
+            return []
+        dvk_handler = DvkHandler(workers=workers, use_processes=use_processes, use_catalog=use_catalog)
+        dvk_handler.read_dvks(directory)
+        dvk_handler.sort_dvks("a")
+    # GROUP DVKS BY PAGE URL
+    print("Finding DVK files with the same page URLs:")
+    return group_dvks(dvk_handler, get_page_url_keys)
+
+def get_same_direct_urls(directory:str=None,
+            workers:int=1,
+            use_catalog:bool=False,
+            dvk_handler:DvkHandler=None,
+            use_processes:bool=False) -> List[List[str]]:
+    """
+    Returns a list of Dvks that share the same direct URLs.
+    Files are grouped when any of their direct or secondary URLs match, ignoring case.
+
+    :param directory: Directory in which to search, defaults to None
+    :type directory: str, optional
+    :param workers: Number of workers used to read DVK files, defaults to 1
+    :type workers: int, optional
+    :param use_catalog: Whether to use a catalog to skip unchanged DVK files, defaults to False
+    :type use_catalog: bool, optional
+    :param dvk_handler: Pre-loaded DvkHandler to search instead of a directory, defaults to None
+    :type dvk_handler: DvkHandler, optional
+    :param use_processes: Whether to read DVK files with processes rather than threads, defaults to False
+    :type use_processes: bool, optional
+    :return: List of Dvks that have identical direct URLs
+    :rtype: list[list[str]]
+    """
+    # READ DVKS IN DIRECTORY IF NO DVK HANDLER IS GIVEN
+    if dvk_handler is None:
+        # RETURN EMPTY LIST IF DIRECTORY IS INVALID
+        if directory is None or not exists(directory) or not isdir(directory):
+            return []
+        dvk_handler = DvkHandler(workers=workers, use_processes=use_processes, use_catalog=use_catalog)
+        dvk_handler.read_dvks(directory)
+        dvk_handler.sort_dvks("a")
+    # GROUP DVKS BY DIRECT URL
+    print("Finding DVK files with the same direct URLs:")
+    return group_dvks(dvk_handler, get_direct_url_keys)
+
+def print_groups(directory:str=None, same:List[List[str]]=None, title:str=None):
+    """
+    Prints groups of DVK files that share the same values.
+
+    :param directory: Directory to show paths relative to, defaults to None
+    :type directory: str, optional
+    :param same: Groups of DVK files to print, defaults to None
+    :type same: list[list[str]], optional
+    :param title: Title to print before the groups, defaults to None
+    :type title: str, optional
+    """
+    print()
+    color_print(title, "r")
+    for i in range(0, len(same)):
+        print(truncate_path(directory, same[i][0]))
+        for k in range(1, len(same[i])):
+            print("    " + truncate_path(directory, same[i][k]))
 
 def main():
     """
@@ -61,24 +246,56 @@ def main():
             nargs="?",
             type=str,
             default=str(getcwd()))
+    parser.add_argument(
+            "-w",
+            "--workers",
+            help="Number of workers used to read DVK files.",
+            type=int,
+            default=1)
+    parser.add_argument(
+            "-P",
+            "--processes",
+            help="Reads DVK files with worker processes instead of threads.",
+            action="store_true")
+    parser.add_argument(
+            "-c",
+            "--catalog",
+            help="Uses a catalog file to skip reading unchanged DVK files.",
+            action="store_true")
+    parser.add_argument(
+            "-u",
+            "--urls",
+            help="Also checks for DVKs with identical page and direct URLs.",
+            action="store_true")
     args = parser.parse_args()
     full_directory = abspath(args.directory)
     # CHECK IF DIRECTORY EXISTS
     if (full_directory is not None
             and exists(full_directory)
             and isdir(full_directory)):
+        # READ DVKS IN DIRECTORY
+        dvk_handler = DvkHandler(workers=args.workers, use_processes=args.processes, use_catalog=args.catalog)
+        dvk_handler.read_dvks(full_directory)
+        dvk_handler.sort_dvks("a")
         # GET LIST OF DVKS WITH THE SAME IDS
-        same = get_same_ids(full_directory)
+        same = get_same_ids(dvk_handler=dvk_handler)
         # PRINT LIST
         if len(same) > 0:
-            print()
-            color_print("SAME IDS:", "r")
-            for i in range(0, len(same)):
-                print(truncate_path(full_directory, same[i][0]))
-                for k in range(1, len(same[i])):
-                    print("    " + truncate_path(full_directory, same[i][k]))
+            print_groups(full_directory, same, "SAME IDS:")
         else:
             color_print("All DVKs have unique IDs.", "g")
+        # GET LISTS OF DVKS WITH THE SAME URLS, IF SPECIFIED
+        if args.urls:
+            same = get_same_page_urls(dvk_handler=dvk_handler)
+            if len(same) > 0:
+                print_groups(full_directory, same, "SAME PAGE URLS:")
+            else:
+                color_print("All DVKs have unique page URLs.", "g")
+            same = get_same_direct_urls(dvk_handler=dvk_handler)
+            if len(same) > 0:
+                print_groups(full_directory, same, "SAME DIRECT URLS:")
+            else:
+                color_print("All DVKs have unique direct URLs.", "g")
     else:
         color_print("Invalid directory", "r")
 
@@ -4,7 +4,7 @@ from argparse import ArgumentParser
 from dvk_archive.main.color_print import color_print
 from dvk_archive.main.file.dvk import Dvk
 from dvk_archive.main.file.dvk_handler import DvkHandler
-from dvk_archive.main.file.sequencing import get_sequence
+from dvk_archive.main.file.sequence_graph import SequenceGraph
 from dvk_archive.main.file.sequencing import remove_sequence_info
 from dvk_archive.main.processing.list_processing import clean_list
 from dvk_archive.main.processing.string_processing import truncate_path
@@ -126,38 +126,51 @@ def contains_invalid_start_end(dvk_handler:DvkHandler=None,
     except IndexError:
         return False
     
-def get_sequence_errors(directory:str=None) -> List[List[str]]:
+def get_sequence_errors(directory:str=None,
+            workers:int=1,
+            use_catalog:bool=False,
+            dvk_handler:DvkHandler=None,
+            use_processes:bool=False,
+            sequence_graph:SequenceGraph=None) -> List[List[str]]:
     """
     Gets a list of DVK files with sequence errors in a given directory.
 
     :param directory: Directory in which to search for errors, defaults to None
     :type directory: str, optional
+    :param workers: Number of workers used to read DVK files, defaults to 1
+    :type workers: int, optional
+    :param use_catalog: Whether to use a catalog to skip unchanged DVK files, defaults to False
+    :type use_catalog: bool, optional
+    :param dvk_handler: Pre-loaded DvkHandler to search instead of a directory, defaults to None
+    :type dvk_handler: DvkHandler, optional
+    :param use_processes: Whether to read DVK files with processes rather than threads, defaults to False
+    :type use_processes: bool, optional
+    :param sequence_graph: Pre-built SequenceGraph for the given DvkHandler, defaults to None
+    :type sequence_graph: SequenceGraph, optional
     :return: List of DVK paths grouped by sequence with sequence errors
     :rtype: list[list[str]]
     """
-    # Return empty list if directory is invalid
-    if directory is None or not exists(directory) or not isdir(directory):
-        return []
-    # Read Dvks for the given directory
-    dvk_handler = DvkHandler(directory)
-    dvk_handler.sort_dvks("a")
-    # Run through all the dvks in the DvkHandler
+    # Read Dvks for the given directory if no DvkHandler is given
+    if dvk_handler is None:
+        # Return empty list if directory is invalid
+        if directory is None or not exists(directory) or not isdir(directory):
+            return []
+        dvk_handler = DvkHandler(directory, workers, use_processes, use_catalog)
+        dvk_handler.sort_dvks("a")
+    # Get every sequence from the links between Dvks
+    if sequence_graph is None:
+        sequence_graph = SequenceGraph(dvk_handler)
+    sequences = sequence_graph.get_sequences()
+    # Run through all the sequences in the DvkHandler
     error_indexes = []
-    checked_indexes = []
-    size = dvk_handler.get_size()
     print("Finding sequence errors:")
-    for index in tqdm(range(0, size)):
-        # Only check Dvk if not alreadiy in checked list.
-        if not index in checked_indexes:
-            # Get sequence, then add to checked indexes
-            seq = get_sequence(dvk_handler, index)
-            checked_indexes.extend(seq)
-            # Check if sequence is invalid
-            if (is_invalid_single(dvk_handler, seq) 
-                        or contains_invalid_start_end(dvk_handler, seq)
-                        or contains_invalid_sequence_number(dvk_handler, seq)
-                        or contains_invalid_prev_next(dvk_handler, seq)):
-                error_indexes.append(seq)
+    for seq in tqdm(sequences):
+        # Check if sequence is invalid
+        if (is_invalid_single(dvk_handler, seq) 
+                    or contains_invalid_start_end(dvk_handler, seq)
+                    or contains_invalid_sequence_number(dvk_handler, seq)
+                    or contains_invalid_prev_next(dvk_handler, seq)):
+            error_indexes.append(seq)
     # Get paths for the Dvks with sequence errors
     error_paths = []
     for seq in error_indexes:
@@ -183,6 +196,22 @@ def main():
                 "--remove",
                 help="Removes sequence info from broken sequences without asking",
                 action="store_true")
+    parser.add_argument(
+                "-w",
+                "--workers",
+                help="Number of workers used to read DVK files.",
+                type=int,
+                default=1)
+    parser.add_argument(
+                "-P",
+                "--processes",
+                help="Reads DVK files with worker processes instead of threads.",
+                action="store_true")
+    parser.add_argument(
+                "-c",
+                "--catalog",
+                help="Uses a catalog file to skip reading unchanged DVK files.",
+                action="store_true")
     args = parser.parse_args()
     full_directory = abspath(args.directory)
     remove_all = args.remove
@@ -191,7 +220,7 @@ def main():
             and exists(full_directory)
             and isdir(full_directory)):
         # Get list of sequence errors
-        errors = get_sequence_errors(full_directory)
+        errors = get_sequence_errors(full_directory, args.workers, args.catalog, use_processes=args.processes)
         # Print list
         if len(errors) > 0:
             for group in errors:
@@ -2,48 +2,177 @@
 
 from argparse import ArgumentParser
 from dvk_archive.main.color_print import color_print
+from dvk_archive.main.file.atomic_write import is_part_file
 from dvk_archive.main.file.dvk import Dvk
+from dvk_archive.main.file.dvk_catalog import DvkCatalog
+from dvk_archive.main.file.dvk_catalog import is_catalog_file
 from dvk_archive.main.file.dvk_handler import DvkHandler
-from dvk_archive.main.file.dvk_handler import get_directories
+from dvk_archive.main.file.dvk_handler import load_dvk_files
+from dvk_archive.main.file.dvk_handler import scan_directory
 from dvk_archive.main.processing.string_processing import truncate_path
-from os import getcwd, listdir
-from os.path import abspath, exists, isdir, join
+from os import getcwd
+from os.path import abspath, basename, dirname, exists, isdir
 from tqdm import tqdm
-from typing import List
+from typing import Iterator, List, Set
 
-def get_unlinked_media(directory:str=None) -> List[str]:
+def get_media_paths(dvks:Iterator[Dvk]=None) -> Set[str]:
     """
-    Returns a list of files not linked to a DVK file.
-    Only returns files in the same directories as DVK files.
+    Returns a set of all the media files linked by the given Dvks.
+    Includes both primary and secondary media files.
+
+    :param dvks: Dvks to get linked media from, defaults to None
+    :type dvks: Iterator[Dvk], optional
+    :return: Set of linked media file paths
+    :rtype: set[str]
+    """
+    media = set()
+    if dvks is None:
+        return media
+    for dvk in dvks:
+        if dvk.get_media_file() is not None:
+            media.add(dvk.get_media_file())
+        if dvk.get_secondary_file() is not None:
+            media.add(dvk.get_secondary_file())
+    return media
+
+def get_unlinked_entries(entries:List=None, media:Set[str]=None) -> List[str]:
+    """
+    Returns the paths of the given directory entries that aren't linked media.
+    Catalog files and partial downloads are never included.
+    Paths are returned in alphabetical order.
+
+    :param entries: os.DirEntry objects for non-DVK files, defaults to None
+    :type entries: list[os.DirEntry], optional
+    :param media: Set of linked media file paths, defaults to None
+    :type media: set[str], optional
+    :return: Paths of unlinked files
+    :rtype: list[str]
+    """
+    unlinked = []
+    if entries is None or media is None:
+        return unlinked
+    for entry in sorted(entries, key=lambda entry: entry.name):
+        # ADD TO UNLINKED IF NO DVKS LINK THIS FILE
+        # SKIP CATALOGS AND PARTIAL DOWNLOADS, WHICH ARE NEEDED TO RESUME
+        full_file = abspath(entry.path)
+        if (not is_catalog_file(entry.name)
+                    and not is_part_file(entry.name)
+                    and not full_file in media):
+            unlinked.append(full_file)
+    return unlinked
+
+def get_unlinked_by_directory(directory:str=None,
+            workers:int=1,
+            use_catalog:bool=False,
+            use_processes:bool=False) -> List[str]:
+    """
+    Returns a list of files not linked to a DVK file, checking one directory at a time.
+    Only the Dvks of the directory being checked are held in memory.
 
     :param directory: Directory in which to search, defaults to None
     :type directory: str, optional
+    :param workers: Number of workers used to read DVK files, defaults to 1
+    :type workers: int, optional
+    :param use_catalog: Whether to use a catalog to skip unchanged DVK files, defaults to False
+    :type use_catalog: bool, optional
+    :param use_processes: Whether to read DVK files with processes rather than threads, defaults to False
+    :type use_processes: bool, optional
     :return: List of unlinked files
     :rtype: list[str]
     """
     # RETURN EMPTY LIST IF DIRECTORY IS INVALID
     if directory is None or not exists(directory) or not isdir(directory):
         return []
-    # READ DVKS IN DIRECTORY
-    dvk_handler = DvkHandler()
-    dvk_handler.read_dvks(directory)
-    # GET LIST OF DIRECTORIES WITH DVK FILES
-    dirs = sorted(get_directories(directory))
+    catalog = None
+    if use_catalog:
+        catalog = DvkCatalog(directory)
+    # RUN THROUGH DIRECTORIES CONTAINING DVK FILES
+    unlinked = []
+    print("Finding unlinked media files:")
+    for item in tqdm(scan_directory(directory)):
+        if len(item[1]) > 0:
+            # LOAD ONLY THE DVKS IN THE CURRENT DIRECTORY
+            if catalog is not None:
+                dvks = catalog.load_dvks(item[1], workers, use_processes, [item[0]])
+            else:
+                dvks = load_dvk_files(item[1], workers, use_processes)
+            media = get_media_paths(dvks)
+            unlinked.extend(get_unlinked_entries(item[2], media))
+    if catalog is not None:
+        catalog.close_catalog()
+    # SORT BY DIRECTORY, THEN BY FILENAME
+    return sorted(unlinked, key=lambda file: (dirname(file), basename(file)))
+
+def get_unlinked_in_scan(dvk_handler:DvkHandler=None, media:Set[str]=None) -> List[str]:
+    """
+    Returns files not in the given set of linked media from the directories of a DvkHandler.
+    Uses the DvkHandler's directory scan if kept, otherwise scans the directories of its Dvks.
+
+    :param dvk_handler: DvkHandler with loaded Dvks, defaults to None
+    :type dvk_handler: DvkHandler, optional
+    :param media: Set of linked media file paths, defaults to None
+    :type media: set[str], optional
+    :return: List of unlinked files
+    :rtype: list[str]
+    """
+    if dvk_handler is None or media is None:
+        return []
+    # GET DIRECTORIES WITH DVK FILES FROM THE HANDLER'S DIRECTORY SCAN
+    scan = list(dvk_handler.get_scan())
+    if len(scan) == 0:
+        # SCAN THE DIRECTORIES OF THE LOADED DVKS IF THE SCAN WASN'T KEPT
+        directories = set([dvk.get_dvk_directory() for dvk in dvk_handler.iter_dvks()])
+        directories.discard(None)
+        for dvk_directory in directories:
+            scan.extend(scan_directory(dvk_directory, False))
+    scan = sorted(scan, key=lambda item: item[0])
     # RUN THROUGH DIRECTORIES
     unlinked = []
     print("Finding unlinked media files:")
-    for path in tqdm(dirs):
-        files = sorted(listdir(abspath(path)))
-        # RUN THROUGH ALL FILES IN THE DIRECTORY
-        for file in files:
-            # ADD TO UNLINKED IF NO DVKS LINK THIS FILE
-            full_file = abspath(join(path, file))
-            if (not file.endswith(".dvk")
-                    and not isdir(full_file)
-                    and not dvk_handler.contains_media_file(full_file)):
-                unlinked.append(abspath(full_file))
+    for item in tqdm(scan):
+        unlinked.extend(get_unlinked_entries(item[2], media))
     return unlinked
 
+def get_unlinked_media(directory:str=None,
+            workers:int=1,
+            use_catalog:bool=False,
+            dvk_handler:DvkHandler=None,
+            use_processes:bool=False,
+            per_directory:bool=False) -> List[str]:
+    """
+    Returns a list of files not linked to a DVK file.
+    Only returns files in the same directories as DVK files.
+
+    :param directory: Directory in which to search, defaults to None
+    :type directory: str, optional
+    :param workers: Number of workers used to read DVK files, defaults to 1
+    :type workers: int, optional
+    :param use_catalog: Whether to use a catalog to skip unchanged DVK files, defaults to False
+    :type use_catalog: bool, optional
+    :param dvk_handler: Pre-loaded DvkHandler to search instead of a directory, defaults to None
+    :type dvk_handler: DvkHandler, optional
+    :param use_processes: Whether to read DVK files with processes rather than threads, defaults to False
+    :type use_processes: bool, optional
+    :param per_directory: Whether to only load Dvks for one directory at a time, defaults to False
+    :type per_directory: bool, optional
+    :return: List of unlinked files
+    :rtype: list[str]
+    """
+    # CHECK ONE DIRECTORY AT A TIME, IF SPECIFIED
+    if dvk_handler is None and per_directory:
+        return get_unlinked_by_directory(directory, workers, use_catalog, use_processes)
+    # READ DVKS IN DIRECTORY IF NO DVK HANDLER IS GIVEN
+    if dvk_handler is None:
+        # RETURN EMPTY LIST IF DIRECTORY IS INVALID
+        if directory is None or not exists(directory) or not isdir(directory):
+            return []
+        dvk_handler = DvkHandler(workers=workers, use_processes=use_processes, use_catalog=use_catalog)
+        dvk_handler.read_dvks(directory, keep_scan=True)
+    # GET SET OF ALL LINKED MEDIA FILES
+    media = get_media_paths(dvk_handler.iter_dvks())
+    # FIND FILES NOT IN THE LINKED MEDIA
+    return get_unlinked_in_scan(dvk_handler, media)
+
 def main():
     """
     Sets up commands for getting files with no corresponding DVKs
@@ -55,6 +184,27 @@ def main():
             nargs="?",
             type=str,
             default=str(getcwd()))
+    parser.add_argument(
+            "-w",
+            "--workers",
+            help="Number of workers used to read DVK files.",
+            type=int,
+            default=1)
+    parser.add_argument(
+            "-P",
+            "--processes",
+            help="Reads DVK files with worker processes instead of threads.",
+            action="store_true")
+    parser.add_argument(
+            "-c",
+            "--catalog",
+            help="Uses a catalog file to skip reading unchanged DVK files.",
+            action="store_true")
+    parser.add_argument(
+            "-p",
+            "--per-directory",
+            help="Only loads the DVK files of one directory at a time to save memory.",
+            action="store_true")
     args = parser.parse_args()
     full_directory = abspath(args.directory)
     # CHECK IF DIRECTORY EXISTS
@@ -62,7 +212,9 @@ def main():
             and exists(full_directory)
             and isdir(full_directory)):
         # GET LIST OF UNLINKED MEDIA FILES
-        unlinked = get_unlinked_media(full_directory)
+        unlinked = get_unlinked_media(full_directory, args.workers, args.catalog,
+                    use_processes=args.processes,
+                    per_directory=args.per_directory)
         # PRINT LIST
         if len(unlinked) > 0:
             color_print("UNLINKED MEDIA:", "r")
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+
+from atexit import register
+from os import chmod, close, environ, fsync, getpid, makedirs, remove, replace, stat, write
+from os import open as open_descriptor
+from os import O_CREAT, O_EXCL, O_RDONLY, O_WRONLY
+from os.path import abspath, basename, dirname, expanduser, join
+from threading import Lock, get_ident
+
+# Durability modes: "n" = No fsync, "f" = fsync every file, "b" = fsync in batches
+DURABILITY = {"mode":"n", "batch_size":100}
+PENDING = {"writes":0, "directories":set()}
+PENDING_LOCK = Lock()
+
+# Extensions added to files while they are being downloaded
+PART_EXTENSION = ".part"
+PART_INFO_EXTENSION = ".part.json"
+
+def set_durability(mode:str="n", batch_size:int=100):
+    """
+    Sets how atomic writes are synced to disk.
+    "n" relies on the operating system, which survives the program being killed.
+    "f" syncs every file and its directory, which also survives power loss.
+    "b" syncs every file, but only syncs directories once every batch_size writes.
+
+    :param mode: Durability mode ("n", "f", "b"), defaults to "n"
+    :type mode: str, optional
+    :param batch_size: Number of writes per sync in batched mode, defaults to 100
+    :type batch_size: int, optional
+    """
+    flush_writes()
+    DURABILITY["mode"] = "n"
+    if mode == "f" or mode == "b":
+        DURABILITY["mode"] = mode
+    DURABILITY["batch_size"] = 1
+    if batch_size is not None and batch_size > 1:
+        DURABILITY["batch_size"] = batch_size
+
+def get_durability() -> str:
+    """
+    Returns the current durability mode for atomic writes.
+
+    :return: Durability mode ("n", "f", "b")
+    :rtype: str
+    """
+    return DURABILITY["mode"]
+
+def is_part_file(filename:str=None) -> bool:
+    """
+    Returns whether a given filename belongs to a partial download.
+    Partial downloads are kept next to the file being downloaded so they can be resumed.
+
+    :param filename: Filename to check, defaults to None
+    :type filename: str, optional
+    :return: Whether the file is a partial download or its resume info
+    :rtype: bool
+    """
+    if filename is None:
+        return False
+    return filename.endswith(PART_EXTENSION) or filename.endswith(PART_INFO_EXTENSION)
+
+def get_cache_directory(name:str=None) -> str:
+    """
+    Returns a directory for files cached between runs, creating it if necessary.
+    Cache directories are kept in the user's cache directory
+    ($XDG_CACHE_HOME or ~/.cache) and are only readable by the user.
+
+    :param name: Name of the subdirectory for a type of cached file, defaults to None
+    :type name: str, optional
+    :return: Path of the cache directory, None if it couldn't be created
+    :rtype: str
+    """
+    base = environ.get("XDG_CACHE_HOME")
+    if base is None or base == "":
+        base = join(expanduser("~"), ".cache")
+    directory = abspath(join(base, "dvk_archive"))
+    if name is not None:
+        directory = abspath(join(directory, name))
+    try:
+        makedirs(directory, mode=0o700, exist_ok=True)
+        # Limit existing directories to the user as well
+        chmod(directory, 0o700)
+        if name is not None:
+            chmod(dirname(directory), 0o700)
+    except OSError:
+        return None
+    return directory
+
+def get_temp_file(file:str=None) -> str:
+    """
+    Returns the temporary file used while atomically writing the given file.
+    The temporary file is hidden and unique to the current process and thread.
+
+    :param file: File that will be written, defaults to None
+    :type file: str, optional
+    :return: Path of the temporary file
+    :rtype: str
+    """
+    if file is None:
+        return None
+    path = abspath(file)
+    name = "." + basename(path) + "." + str(getpid()) + "." + str(get_ident()) + ".tmp"
+    return join(dirname(path), name)
+
+def sync_path(path:str=None):
+    """
+    Flushes a file or directory to disk.
+    Ignores paths that can't be synced, such as directories on Windows.
+
+    :param path: Path of the file or directory to sync, defaults to None
+    :type path: str, optional
+    """
+    try:
+        descriptor = open_descriptor(path, O_RDONLY)
+        try:
+            fsync(descriptor)
+        finally:
+            close(descriptor)
+    except (OSError, TypeError):
+        pass
+
+def flush_writes():
+    """
+    Syncs all directories written to since the last batch was synced.
+    File data is already synced before each file is replaced.
+    """
+    with PENDING_LOCK:
+        directories = PENDING["directories"]
+        PENDING["writes"] = 0
+        PENDING["directories"] = set()
+    for directory in directories:
+        sync_path(directory)
+
+def write_file_atomic(file:str=None, data:bytes=None) -> bool:
+    """
+    Writes data to a file so the file is either fully written or unchanged.
+    Data is written to a temporary file that then replaces the given file.
+
+    :param file: Path of the file to write, defaults to None
+    :type file: str, optional
+    :param data: Data to write to the file, defaults to None
+    :type data: bytes, optional
+    :return: Whether the file was written successfully
+    :rtype: bool
+    """
+    if file is None or data is None:
+        return False
+    path = abspath(file)
+    temp_file = get_temp_file(path)
+    mode = DURABILITY["mode"]
+    try:
+        # Write data to the temporary file
+        flags = O_WRONLY | O_CREAT | O_EXCL
+        try:
+            descriptor = open_descriptor(temp_file, flags, 0o666)
+        except FileExistsError:
+            # Remove temporary file left behind by an interrupted write
+            remove(temp_file)
+            descriptor = open_descriptor(temp_file, flags, 0o666)
+        try:
+            view = memoryview(data)
+            while len(view) > 0:
+                view = view[write(descriptor, view):]
+            # Sync the data before replacing so a crash can't leave an empty file
+            if not mode == "n":
+                fsync(descriptor)
+        finally:
+            close(descriptor)
+        # Keep the permissions of the file being replaced
+        try:
+            chmod(temp_file, stat(path).st_mode)
+        except OSError:
+            pass
+        # Replace the original file with the temporary file
+        replace(temp_file, path)
+    except OSError:
+        try:
+            remove(temp_file)
+        except OSError:
+            pass
+        return False
+    # Sync the directory so the rename itself is stored
+    if mode == "f":
+        sync_path(dirname(path))
+    elif mode == "b":
+        with PENDING_LOCK:
+            PENDING["writes"] += 1
+            PENDING["directories"].add(dirname(path))
+            full = PENDING["writes"] >= DURABILITY["batch_size"]
+        if full:
+            flush_writes()
+    return True
+
+# Make sure batched writes are synced before the program exits
+register(flush_writes)
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+
+from concurrent.futures import ThreadPoolExecutor
+from dvk_archive.main.file.atomic_write import get_temp_file
+from dvk_archive.main.file.atomic_write import write_file_atomic
+from dvk_archive.main.file.dvk import Dvk
+from html_string_tools.main.html_string_tools import get_extension
+from os import listdir, pardir, remove, rename
+from os.path import abspath, basename, exists, join
+from typing import Callable, List
+
+def run_batch(function:Callable=None, items:List=None, workers:int=1) -> List:
+    """
+    Runs a function on every item of a list, returning results in the same order.
+    Uses a pool of worker threads if more than one worker is given.
+
+    :param function: Function to run on each item, defaults to None
+    :type function: Callable, optional
+    :param items: Items to run the function on, defaults to None
+    :type items: list, optional
+    :param workers: Number of worker threads to use, defaults to 1
+    :type workers: int, optional
+    :return: Results of the function for each item
+    :rtype: list
+    """
+    if function is None or items is None:
+        return []
+    if workers is None or workers < 2 or len(items) < 2:
+        return [function(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(function, items))
+
+def read_file_data(file:str=None) -> bytes:
+    """
+    Returns the contents of a file, or None if the file can't be read.
+
+    :param file: Path of the file to read, defaults to None
+    :type file: str, optional
+    :return: Contents of the file
+    :rtype: bytes
+    """
+    try:
+        with open(file, "rb") as in_file:
+            return in_file.read()
+    except (OSError, TypeError):
+        return None
+
+def move_file(move:List[str]=None) -> List[str]:
+    """
+    Renames a file from one path to another.
+
+    :param move: [from, to] paths of the file, defaults to None
+    :type move: list[str], optional
+    :return: The given [from, to] paths, or None if the file couldn't be moved
+    :rtype: list[str]
+    """
+    try:
+        rename(move[0], move[1])
+        return move
+    except (OSError, TypeError):
+        return None
+
+def write_media_files(dvks:List[Dvk]=None, get_time:bool=False, workers:int=4) -> List[bool]:
+    """
+    Writes a group of Dvks and downloads their media, several Dvks at a time.
+    Each Dvk is written with Dvk.write_media, so files are removed if their downloads fail.
+    Connections to each host are shared and limited by bs_connect.
+
+    :param dvks: Dvks to write, defaults to None
+    :type dvks: list[Dvk], optional
+    :param get_time: Whether to get time from the media page, defaults to False
+    :type get_time: bool, optional
+    :param workers: Number of Dvks to download at once, defaults to 4
+    :type workers: int, optional
+    :return: Whether each Dvk and its media were written
+    :rtype: list[bool]
+    """
+    if dvks is None:
+        return []
+    return run_batch(lambda dvk: dvk.write_media(get_time), dvks, workers)
+
+def get_rename_plan(dvks:List[Dvk]=None) -> List[List[str]]:
+    """
+    Returns the new DVK, media, and secondary media files for renaming each Dvk.
+    Names are chosen as if each Dvk were renamed in order with Dvk.rename_files,
+    but directories are only listed once.
+
+    :param dvks: Dvks to get new filenames for, defaults to None
+    :type dvks: list[Dvk], optional
+    :return: New [dvk_file, media_file, secondary_file] for each Dvk
+    :rtype: list[list[str]]
+    """
+    if dvks is None:
+        return []
+    listings = dict()
+    plan = []
+    for dvk in dvks:
+        # Get the lower case filenames in the Dvk's directory
+        parent = abspath(join(abspath(dvk.get_dvk_file()), pardir))
+        if not parent in listings:
+            listings[parent] = set()
+            try:
+                for path in listdir(parent):
+                    listings[parent].add(path.lower())
+            except OSError:
+                pass
+        names = listings[parent]
+        # Keep the current filenames if no new name can be found
+        old = [dvk.get_dvk_file(), dvk.get_media_file(), dvk.get_secondary_file()]
+        filename = dvk.get_filename(parent, False, names)
+        secondary = dvk.get_filename(parent, True, names)
+        if filename == "":
+            plan.append(old)
+            continue
+        # Get the new filenames
+        new = [abspath(join(parent, filename + ".dvk")), None, None]
+        if old[1] is not None:
+            new[1] = abspath(join(parent, filename + get_extension(basename(old[1]))))
+        if old[2] is not None:
+            new[2] = abspath(join(parent, secondary + get_extension(basename(old[2]))))
+        # Update the directory listing for the next Dvks
+        for file in old:
+            if file is not None:
+                names.discard(basename(file).lower())
+        for file in new:
+            if file is not None:
+                names.add(basename(file).lower())
+        plan.append(new)
+    return plan
+
+def move_files(moves:List[List[str]]=None, workers:int=1) -> List[List[str]]:
+    """
+    Renames files from one path to another.
+    Files are moved to temporary names first so files can swap names safely.
+
+    :param moves: List of [from, to] paths, defaults to None
+    :type moves: list[list[str]], optional
+    :param workers: Number of worker threads to use, defaults to 1
+    :type workers: int, optional
+    :return: List of [from, to] paths that were moved successfully, or None if any move failed
+    :rtype: list[list[str]]
+    """
+    if moves is None:
+        return []
+    # Move files to their temporary names
+    temp_moves = []
+    for move in moves:
+        temp_moves.append([move[0], get_temp_file(move[1]) + ".move"])
+    done = run_batch(move_file, temp_moves, workers)
+    failed = None in done
+    # Move files to their final names
+    final_moves = []
+    if not failed:
+        for move in moves:
+            final_moves.append([get_temp_file(move[1]) + ".move", move[1]])
+        final_done = run_batch(move_file, final_moves, workers)
+        failed = None in final_done
+        for i in range(0, len(final_done)):
+            # Record completed moves as going straight to the final name
+            if final_done[i] is not None:
+                done[i] = moves[i]
+    if failed:
+        # Move files back if any move failed
+        for move in done:
+            if move is not None:
+                try:
+                    rename(move[1], move[0])
+                except OSError:
+                    pass
+        return None
+    return moves
+
+def write_dvks(dvks:List[Dvk]=None, rename_files:bool=False, workers:int=1) -> bool:
+    """
+    Writes a group of Dvks as one transaction, optionally renaming them to their default names.
+    Dvks missing the info needed to be written are skipped, as with Dvk.write_dvk.
+    Each DVK file is written once, and old DVK files are only removed once every write succeeds.
+    If any write fails, all DVK and media files are restored to their previous state,
+    and the Dvks are given back their previous file paths.
+    Other changes already made to the Dvks are kept.
+
+    :param dvks: Dvks to write, defaults to None
+    :type dvks: list[Dvk], optional
+    :param rename_files: Whether to rename Dvks and their media to their default names, defaults to False
+    :type rename_files: bool, optional
+    :param workers: Number of worker threads used to write files, defaults to 1
+    :type workers: int, optional
+    :return: Whether all the writable Dvks were written successfully
+    :rtype: bool
+    """
+    if dvks is None:
+        return False
+    # Skip Dvks that can't be written
+    dvks = [dvk for dvk in dvks if dvk.can_write()]
+    # Get the current and new files for every Dvk
+    old = []
+    for dvk in dvks:
+        old.append([dvk.get_dvk_file(), dvk.get_media_file(), dvk.get_secondary_file()])
+    new = old
+    if rename_files:
+        new = get_rename_plan(dvks)
+    # Keep the existing DVK files in case they need to be restored
+    old_data = run_batch(read_file_data, [files[0] for files in old], workers)
+    # Rename media files
+    moves = []
+    for i in range(0, len(dvks)):
+        for k in range(1, 3):
+            if (old[i][k] is not None and not old[i][k] == new[i][k]
+                    and exists(old[i][k])):
+                moves.append([old[i][k], new[i][k]])
+    moved = move_files(moves, workers)
+    success = moved is not None
+    # Write every Dvk to its new DVK file
+    if success:
+        if rename_files:
+            for i in range(0, len(dvks)):
+                dvks[i].set_dvk_file(new[i][0])
+                dvks[i].set_media_file(new[i][1])
+                dvks[i].set_secondary_file(new[i][2])
+        success = not False in run_batch(Dvk.write_dvk, dvks, workers)
+    if success:
+        # Remove old DVK files that weren't replaced by new ones
+        new_files = set([files[0] for files in new])
+        for files in old:
+            if not files[0] in new_files and exists(files[0]):
+                try:
+                    remove(files[0])
+                except OSError:
+                    pass
+        return True
+    # Remove DVK files that didn't exist before the batch was written
+    existing = set()
+    for i in range(0, len(dvks)):
+        if old_data[i] is not None:
+            existing.add(old[i][0])
+    for i in range(0, len(dvks)):
+        if not new[i][0] in existing and exists(new[i][0]):
+            try:
+                remove(new[i][0])
+            except OSError:
+                pass
+    # Restore the old DVK files
+    for i in range(0, len(dvks)):
+        if old_data[i] is not None:
+            write_file_atomic(old[i][0], old_data[i])
+    # Move media files back
+    if moved is not None:
+        move_files([[move[1], move[0]] for move in moved], workers)
+    # Restore the file paths of the Dvks
+    for i in range(0, len(dvks)):
+        dvks[i].set_dvk_file(old[i][0])
+        dvks[i].set_media_file(old[i][1])
+        dvks[i].set_secondary_file(old[i][2])
+    return False
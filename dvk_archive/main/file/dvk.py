@@ -1,22 +1,29 @@
 #!/usr/bin/env python3
 
 from dvk_archive.main.color_print import color_print
-from dvk_archive.main.web.bs_connect import download
-from dvk_archive.main.web.bs_connect import get_last_modified
+from dvk_archive.main.file.atomic_write import write_file_atomic
 from dvk_archive.main.processing.list_processing import clean_list
+from dvk_archive.main.processing.string_compare import AlphanumKey
 from dvk_archive.main.processing.string_processing import get_filename
 from dvk_archive.main.processing.string_processing import pad_num
 from html_string_tools.main.html_string_tools import get_extension
 from html_string_tools.main.html_string_tools import remove_whitespace
 from html_string_tools.main.html_string_tools import replace_reserved_in_html
-from filetype import guess
-from json import dump, load
-from os import listdir, pardir, rename, remove
-from os.path import abspath, basename, exists, isdir, join
+from json import dumps
+from os import listdir, pardir, rename, remove, stat
+from os.path import abspath, basename, exists, isdir, join, samefile
 from random import seed, randint
 from shutil import move
+from sys import intern
 from traceback import print_exc
 from typing import List
+from weakref import ref
+
+# Use orjson to decode DVK files if it's installed, since it is much faster
+try:
+    from orjson import loads
+except ImportError:
+    from json import loads
 
 def dictadd(dictionary:dict=None,
                 key:str=None,
@@ -65,8 +72,73 @@ def dictget(dictionary:dict=None, key:str=None, default=None):
     except:
         return default
 
+def is_same_file_data(file:str=None, data:bytes=None) -> bool:
+    """
+    Returns whether a file already contains exactly the given data.
+    Only reads the file if its size matches the size of the data.
+
+    :param file: Path of the file to check, defaults to None
+    :type file: str, optional
+    :param data: Data to compare to the file contents, defaults to None
+    :type data: bytes, optional
+    :return: Whether the file contents match the given data
+    :rtype: bool
+    """
+    if file is None or data is None:
+        return False
+    try:
+        if not stat(file).st_size == len(data):
+            return False
+        with open(file, "rb") as in_file:
+            return in_file.read() == data
+    except OSError:
+        return False
+
+def intern_list(array:List[str]=None) -> tuple:
+    """
+    Returns a tuple of interned strings from a given list.
+    Artists and tags repeat across many Dvks, so interning lets them share strings.
+
+    :param array: List of strings to intern, defaults to None
+    :type array: list[str], optional
+    :return: Tuple of interned strings
+    :rtype: tuple
+    """
+    if array is None:
+        return ()
+    return tuple([intern(item) for item in array])
+
 class Dvk:
 
+    # Use slots rather than a dict for each Dvk to save memory in large archives
+    __slots__ = ("dvk_file",
+                "dvk_directory",
+                "media_path",
+                "secondary_path",
+                "dvk_id",
+                "title",
+                "title_key",
+                "artists",
+                "time",
+                "web_tags",
+                "description",
+                "page_url",
+                "direct_url",
+                "secondary_url",
+                "media_file",
+                "secondary_file",
+                "favorites",
+                "single",
+                "next_id",
+                "prev_id",
+                "seq_title",
+                "section_title",
+                "sequence_number",
+                "sequence_total",
+                "dirty",
+                "loaded",
+                "handler")
+
     def __init__(self, dvk_file:str=None):
         """
         Initializes the Dvk object by loading from a given DVK file.
@@ -75,6 +147,9 @@ class Dvk:
         :param dvk_file: Given DVK file path, defaults to None
         :type dvk_file: str, optional
         """
+        self.handler = None
+        self.dirty = True
+        self.loaded = False
         self.set_dvk_file()
         self.clear_dvk()
         if dvk_file is not None:
@@ -105,6 +180,72 @@ class Dvk:
         self.set_sequence_number()
         self.set_sequence_total()
 
+    def get_fields(self) -> tuple:
+        """
+        Returns all Dvk fields except the DVK file as a tuple of basic values.
+        Used for storing already parsed Dvks without rewriting them as JSON.
+
+        :return: Tuple containing the values of all Dvk fields
+        :rtype: tuple
+        """
+        return (self.dvk_id,
+                    self.title,
+                    self.artists,
+                    self.time,
+                    self.web_tags,
+                    self.description,
+                    self.page_url,
+                    self.direct_url,
+                    self.secondary_url,
+                    self.media_file,
+                    self.secondary_file,
+                    self.favorites,
+                    self.single,
+                    self.next_id,
+                    self.prev_id,
+                    self.seq_title,
+                    self.section_title,
+                    self.sequence_number,
+                    self.sequence_total)
+
+    def set_fields(self, fields:tuple=None):
+        """
+        Sets all Dvk fields except the DVK file from a tuple made by get_fields.
+        Values are assumed to be already cleaned, so they are set directly.
+
+        :param fields: Tuple containing the values of all Dvk fields, defaults to None
+        :type fields: tuple, optional
+        """
+        self.dirty = True
+        try:
+            (self.dvk_id,
+                    self.title,
+                    artists,
+                    self.time,
+                    web_tags,
+                    self.description,
+                    self.page_url,
+                    self.direct_url,
+                    self.secondary_url,
+                    self.media_file,
+                    self.secondary_file,
+                    favorites,
+                    self.single,
+                    self.next_id,
+                    self.prev_id,
+                    self.seq_title,
+                    self.section_title,
+                    self.sequence_number,
+                    self.sequence_total) = fields
+            self.artists = intern_list(artists)
+            self.web_tags = intern_list(web_tags)
+            self.favorites = intern_list(favorites)
+            self.title_key = None
+            self.media_path = None
+            self.secondary_path = None
+        except (TypeError, ValueError):
+            self.clear_dvk()
+
     def can_write(self) -> bool:
         """
         Returns whether the Dvk object can be written.
@@ -122,12 +263,18 @@ class Dvk:
             return False
         return True
 
-    def write_dvk(self):
+    def write_dvk(self) -> bool:
         """
         Writes the Dvk object parameters to dvk_file
+
+        :return: Whether the DVK file now contains the Dvk's data
+        :rtype: bool
         """
         # Check if Dvk oject contains all necessary info.
         if self.can_write():
+            # Skip writing if nothing changed since the DVK file was read or written
+            if not self.dirty:
+                return True
             # Create dict for the DVK file identifiers.
             dvk_data = dict()
             dvk_data["file_type"] = "dvk"
@@ -169,21 +316,34 @@ class Dvk:
             dvk_data = dictadd(dvk_data, "download", dvk_download, dict())
             dvk_data = dictadd(dvk_data, "sequence", dvk_seq, dict())
             # Write dvk_data dict to a DVK(JSON) file.
-            try:
-                with open(self.get_dvk_file(), "w") as out_file:
-                    dump(dvk_data, out_file, indent=4, separators=(",", ": "))
-            except IOError as e:
-                color_print("File error: " + str(e), "r")
+            # Uses the standard json encoder so DVK files keep the same format.
+            data = dumps(dvk_data, indent=4, separators=(",", ": ")).encode("utf-8")
+            # Fields of a loaded Dvk may be set to the values they already had,
+            # so check if the DVK file already contains the same data
+            if not (self.loaded and is_same_file_data(self.get_dvk_file(), data)):
+                # Write to a temporary file first so the DVK file is never left half written
+                if not write_file_atomic(self.get_dvk_file(), data):
+                    color_print("File error: Could not write " + self.get_dvk_file(), "r")
+                    return False
+            self.set_saved()
+            return True
+        return False
 
-    def write_media(self, get_time:bool=False):
+    def write_media(self, get_time:bool=False) -> bool:
         """
         Writes the Dvk object, as well as downloading associated media.
         Downloads from direct_url and secondary_url.
         Writes to media_file and secondary_file.
+        Interrupted downloads are kept as partial files and resumed by later calls.
 
         :param get_time: Whether to get time from the media page, defaults to False
         :type get_time: bool, optional
+        :return: Whether the DVK file and its media were written
+        :rtype: bool
         """
+        # Import here so requests is only loaded when downloading
+        from dvk_archive.main.web.bs_connect import download
+        from dvk_archive.main.web.bs_connect import get_last_modified
         headers = ""
         self.write_dvk()
         if exists(self.get_dvk_file()):
@@ -201,15 +361,18 @@ class Dvk:
                     if not exists(self.get_secondary_file()):
                         remove(self.get_dvk_file())
                         remove(self.get_media_file())
+                        self.set_saved(False)
             else:
                 # IF DOWNLOAD FAILED, DELETE DVK
                 remove(self.get_dvk_file())
+                self.set_saved(False)
         # GETS THE MODIFIED DATE FROM THE DOWNLOADED FILE
         if get_time and exists(self.get_media_file()):
             self.set_time(get_last_modified(headers))
             self.write_dvk()
         # UPDATE EXTENSTIONS
         self.update_extensions()
+        return self.get_dvk_file() is not None and exists(self.get_dvk_file())
 
     def read_dvk(self):
         """
@@ -218,8 +381,8 @@ class Dvk:
         self.clear_dvk()
         # Read DVK file as a JSON object
         try:
-            with open(self.get_dvk_file()) as in_file:
-                json = load(in_file)
+            with open(self.get_dvk_file(), "rb") as in_file:
+                json = loads(in_file.read())
                 # Check if file is a proper DVK file.
                 if json["file_type"] == "dvk":
                     # Get DVK ID.
@@ -254,6 +417,7 @@ class Dvk:
                     self.set_section_title(dictget(dvk_sequence, "section_title", None))
                     self.set_sequence_total(dictget(dvk_sequence, "seq_total", 1))
                     self.set_sequence_number(dictget(dvk_sequence, "seq_num", 0))
+                    self.set_saved()
         except:
             color_print("Error reading DVK file: " + self.get_dvk_file(), "r")
             print_exc()
@@ -267,6 +431,97 @@ class Dvk:
         :type dvk_file: str, optional
         """
         self.dvk_file = dvk_file
+        # The new DVK file may not contain what was loaded or last written
+        self.dirty = True
+        self.loaded = False
+        # Clear paths resolved from the previous DVK file
+        self.dvk_directory = None
+        self.media_path = None
+        self.secondary_path = None
+        self.set_key_changed()
+
+    def set_handler(self, handler=None):
+        """
+        Sets the DvkHandler whose lookup indexes contain this Dvk.
+        Only a weak reference is kept, so the Dvk doesn't keep the handler alive.
+        A handler that loses the Dvk to another handler rebuilds its indexes.
+
+        :param handler: DvkHandler indexing this Dvk, defaults to None
+        :type handler: DvkHandler, optional
+        """
+        old_handler = self.get_handler()
+        if (old_handler is not None
+                    and handler is not None
+                    and old_handler is not handler):
+            old_handler.clear_indexes()
+        self.handler = None
+        if handler is not None:
+            self.handler = ref(handler)
+
+    def set_saved(self, saved:bool=True):
+        """
+        Sets whether the Dvk fields match the contents of the DVK file.
+        Saved Dvks aren't written again until one of their fields is set.
+
+        :param saved: Whether the Dvk fields match the DVK file, defaults to True
+        :type saved: bool, optional
+        """
+        self.dirty = not saved
+        if saved:
+            self.loaded = True
+
+    def is_saved(self) -> bool:
+        """
+        Returns whether the Dvk fields match the DVK file, with nothing set since.
+
+        :return: Whether the Dvk has no unsaved changes
+        :rtype: bool
+        """
+        return not self.dirty
+
+    def get_handler(self):
+        """
+        Returns the DvkHandler whose lookup indexes contain this Dvk.
+
+        :return: DvkHandler indexing this Dvk, None if not indexed
+        :rtype: DvkHandler
+        """
+        if self.handler is None:
+            return None
+        return self.handler()
+
+    def set_key_changed(self):
+        """
+        Tells the DvkHandler indexing this Dvk that a field used for lookups has changed.
+        Only this Dvk's index entries are updated on the handler's next lookup.
+        """
+        handler = self.get_handler()
+        if handler is not None:
+            handler.set_dvk_changed(self)
+
+    def __getstate__(self) -> dict:
+        """
+        Returns the fields of the Dvk for pickling, leaving out its DvkHandler.
+
+        :return: Dict of slot names and values
+        :rtype: dict
+        """
+        state = dict()
+        for name in self.__slots__:
+            if not name == "handler":
+                state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state:dict=None):
+        """
+        Restores the fields of a pickled Dvk, which isn't indexed by any DvkHandler.
+
+        :param state: Dict of slot names and values, defaults to None
+        :type state: dict, optional
+        """
+        self.handler = None
+        for name in state:
+            setattr(self, name, state[name])
 
     def get_dvk_file(self) -> str:
         """
@@ -277,6 +532,25 @@ class Dvk:
         """
         return self.dvk_file
 
+    def get_dvk_directory(self) -> str:
+        """
+        Returns the directory containing the DVK file.
+        Returns None if the directory doesn't exist.
+        The directory is only checked until it is found to exist.
+
+        :return: Parent directory of the DVK file
+        :rtype: str
+        """
+        if self.dvk_directory is None:
+            try:
+                parent = abspath(join(abspath(self.dvk_file), pardir))
+            except TypeError:
+                return None
+            if not exists(parent):
+                return None
+            self.dvk_directory = parent
+        return self.dvk_directory
+
     def set_dvk_id(self, dvk_id:str=None):
         """
         Sets the Dvk ID.
@@ -284,12 +558,14 @@ class Dvk:
         :param dvk_id: Dvk ID, defaults to None
         :type dvk_id: str, optional
         """
+        self.dirty = True
         try:
             self.dvk_id = remove_whitespace(dvk_id.upper())
             if self.dvk_id == "":
                 self.dvk_id = None
         except AttributeError:
-            self.dvk_id = None            
+            self.dvk_id = None
+        self.set_key_changed()
 
     def get_dvk_id(self) -> str:
         """
@@ -307,7 +583,9 @@ class Dvk:
         :param title: Dvk title, defaults to None
         :type title: str, optional
         """
+        self.dirty = True
         self.title = title
+        self.title_key = None
         if self.title is not None:
             self.title = remove_whitespace(self.title)
 
@@ -320,6 +598,18 @@ class Dvk:
         """
         return self.title
 
+    def get_title_key(self) -> AlphanumKey:
+        """
+        Returns a sort key for the Dvk title.
+        The key is created when first needed and kept until the title changes.
+
+        :return: Alphanumeric sort key for the title
+        :rtype: AlphanumKey
+        """
+        if self.title_key is None:
+            self.title_key = AlphanumKey(self.title)
+        return self.title_key
+
     def set_artist(self, artist:str=None):
         """
         Sets the Dvk artists variable for a single artist.
@@ -336,10 +626,10 @@ class Dvk:
         :param artists: Dvk artists, defaults to None
         :type artists: list[str], optional
         """
+        self.dirty = True
         # Sort artists as well as removing duplicates
         array = sorted(clean_list(artists, True), key=str.casefold)
-        self.artists = array
-            
+        self.artists = intern_list(array)
 
     def get_artists(self) -> List[str]:
         """
@@ -348,7 +638,7 @@ class Dvk:
         :return: Dvk artists
         :rtype: list[str]
         """
-        return self.artists
+        return list(self.artists)
 
     def set_time_int(
             self,
@@ -372,6 +662,7 @@ class Dvk:
         :param minute: Minute published (0-59), defaults to 0
         :type minute: int, optional
         """
+        self.dirty = True
         # Check if time is valid.
         if (year < 1
                 or year > 9999
@@ -403,6 +694,7 @@ class Dvk:
         :param time_str: Time string formatted YYYY/MM/DD|hh:mm, defaults to None
         :type time_str: str, optional
         """
+        self.dirty = True
         # If time string is not in the proper format, set empty date
         if time_str is None or not len(time_str) == 16:
             self.time = "0000/00/00|00:00"
@@ -436,7 +728,8 @@ class Dvk:
         :param web_tags: Dvk web tags, defaults to None
         :type web_tags: list[str], optional
         """
-        self.web_tags = clean_list(web_tags, True)
+        self.dirty = True
+        self.web_tags = intern_list(clean_list(web_tags, True))
 
     def get_web_tags(self) -> List[str]:
         """
@@ -445,7 +738,7 @@ class Dvk:
         :return: Dvk web tags
         :rtype: list[str]
         """
-        return self.web_tags
+        return list(self.web_tags)
 
     def set_description(self, description:str=None):
         """
@@ -454,6 +747,7 @@ class Dvk:
         :param description: Dvk description, defaults to None
         :type description: str, optional
         """
+        self.dirty = True
         self.description = replace_reserved_in_html(remove_whitespace(description))
         if self.description == "":
             self.description = None
@@ -474,9 +768,11 @@ class Dvk:
         :param page_url: Page URL, defaults to None
         :type page_url: str, optional
         """
+        self.dirty = True
         self.page_url = page_url
         if self.page_url == "":
             self.page_url = None
+        self.set_key_changed()
 
     def get_page_url(self) -> str:
         """
@@ -494,9 +790,11 @@ class Dvk:
         :param direct_url: Direct media URL, defaults to None
         :type direct_url: str, optional
         """
+        self.dirty = True
         self.direct_url = direct_url
         if self.direct_url == "":
             self.direct_url = None
+        self.set_key_changed()
 
     def get_direct_url(self) -> str:
         """
@@ -514,9 +812,11 @@ class Dvk:
         :param secondary_url: Direct secondary media URL, defaults to None
         :type secondary_url: str, optional
         """
+        self.dirty = True
         self.secondary_url = secondary_url
         if self.secondary_url == "":
             self.secondary_url = None
+        self.set_key_changed()
 
     def get_secondary_url(self) -> str:
         """
@@ -535,9 +835,12 @@ class Dvk:
         :param filename: Filename for the associated media, defaults to None
         :type filename: str, optional
         """
+        self.dirty = True
         self.media_file = filename
+        self.media_path = None
         if self.media_file == "":
             self.media_file = None
+        self.set_key_changed()
 
     def get_media_file(self) -> str:
         """
@@ -546,13 +849,15 @@ class Dvk:
         :return: Associated media file path
         :rtype: str
         """
-        try:
-            parent = abspath(join(abspath(self.get_dvk_file()), pardir))
-            if not exists(parent):
+        if self.media_path is None:
+            parent = self.get_dvk_directory()
+            if parent is None or self.media_file is None:
                 return None
-            return abspath(join(parent, self.media_file))
-        except:
-            return None
+            try:
+                self.media_path = abspath(join(parent, self.media_file))
+            except TypeError:
+                return None
+        return self.media_path
 
     def set_secondary_file(self, filename:str=None):
         """
@@ -562,9 +867,12 @@ class Dvk:
         :param filename: Filename for the secondary associated media, defaults to None
         :type filename: str, optional
         """
+        self.dirty = True
         self.secondary_file = filename
+        self.secondary_path = None
         if self.secondary_file == "":
             self.secondary_file = None
+        self.set_key_changed()
 
     def get_secondary_file(self) -> str:
         """
@@ -573,13 +881,15 @@ class Dvk:
         :return: Associated seconsary media file path
         :rtype: str
         """
-        try:
-            parent = abspath(join(abspath(self.get_dvk_file()), pardir))
-            if not exists(parent):
+        if self.secondary_path is None:
+            parent = self.get_dvk_directory()
+            if parent is None or self.secondary_file is None:
                 return None
-            return abspath(join(parent, self.secondary_file))
-        except:
-            return None
+            try:
+                self.secondary_path = abspath(join(parent, self.secondary_file))
+            except TypeError:
+                return None
+        return self.secondary_path
 
     def set_favorites(self, favorites:List[str]=None):
         """
@@ -588,6 +898,7 @@ class Dvk:
         :param favorites: List of favorites artists, defaults to None
         :type favorites: list[str], optional
         """
+        self.dirty = True
         # GET LEGACY FAVORITES FROM WEB TAGS
         index = 0
         array = []
@@ -606,7 +917,7 @@ class Dvk:
             array.extend(favorites)
         # SORTS FAVORITES AND REMOVES DUPLICATES
         array = sorted(clean_list(array), key=str.casefold)
-        self.favorites = array
+        self.favorites = intern_list(array)
 
     def get_favorites(self) -> List[str]:
         """
@@ -615,7 +926,7 @@ class Dvk:
         :return: List of favorites artists
         :rtype: list[str]
         """
-        return self.favorites
+        return list(self.favorites)
 
     def set_single(self, single:bool=False):
         """
@@ -624,6 +935,7 @@ class Dvk:
         :param single: Whether the Dvk is a single file, defaults to False
         :type single: bool, optional
         """
+        self.dirty = True
         # GET LEGACY SINGLE TAG FROM WEB TAGS
         index = 0
         r_single = False
@@ -657,6 +969,7 @@ class Dvk:
         :param next_id: Next ID in the sequnce, defaults to None
         :type next_id: str, optional 
         """
+        self.dirty = True
         self.next_id = next_id
 
     def get_next_id(self) -> str:
@@ -675,6 +988,7 @@ class Dvk:
         :param prev_id: Previous ID in the sequnce, defaults to None
         :type prev_id: str, optional 
         """
+        self.dirty = True
         self.prev_id = prev_id
 
     def get_prev_id(self) -> str:
@@ -729,6 +1043,7 @@ class Dvk:
         :param seq_title: Sequence title, defaults to None
         :type seq_title: str, optional
         """
+        self.dirty = True
         self.seq_title = remove_whitespace(seq_title)
         if self.seq_title == "":
             self.seq_title = None
@@ -749,6 +1064,7 @@ class Dvk:
         :param section_title: Section title, defaults to None
         :type section_title: str, optional
         """
+        self.dirty = True
         self.section_title = remove_whitespace(section_title)
         if self.section_title == "":
             self.section_title = None
@@ -769,6 +1085,7 @@ class Dvk:
         :param seq_num: Sequence number, defaults to 0
         :type seq_num: int, optional
         """
+        self.dirty = True
         if seq_num < 1 or seq_num > self.get_sequence_total():
             self.sequence_number = 0
         else:
@@ -790,6 +1107,7 @@ class Dvk:
         :param seq_total: Total number of files in the sequence, defaults to 1
         :type seq_total: int, optional
         """
+        self.dirty = True
         if seq_total < 2:
             self.sequence_total = 1
         else:
@@ -804,7 +1122,7 @@ class Dvk:
         """
         return self.sequence_total
 
-    def get_filename(self, directory:str=None, secondary:bool=False) -> str:
+    def get_filename(self, directory:str=None, secondary:bool=False, paths:set=None) -> str:
         """
         Returns a filename for the Dvk based on title and id.
         Doesn't include extension.
@@ -813,6 +1131,8 @@ class Dvk:
         :type directory: str, optional
         :param secondary: Whether to get name for a secondary file, defaults to False
         :type secondary: bool, optional
+        :param paths: Lower case filenames in the directory, read from the directory if None, defaults to None
+        :type paths: set, optional
         """
         if (directory is None
                     or not exists(directory)
@@ -834,9 +1154,10 @@ class Dvk:
         else:
             ext = ""
         # Get list of files in the directory
-        paths = listdir(directory)
-        for i in range(0, len(paths)):
-            paths[i] = paths[i].lower()
+        if paths is None:
+            paths = set()
+            for path in listdir(directory):
+                paths.add(path.lower())
         # Get default filename
         filename = get_filename(self.get_title())
         if (self.get_sequence_total() > 1
@@ -876,9 +1197,9 @@ class Dvk:
         :param secondary: Filename to use for secondary media, defaults to None
         :type secondary: str, optional
         """
-        # RENAME DVK FILE
-        remove(self.get_dvk_file())
-        parent = abspath(join(self.get_dvk_file(), pardir))
+        # GET NEW DVK FILE
+        old_file = self.get_dvk_file()
+        parent = abspath(join(old_file, pardir))
         file = join(parent, filename + ".dvk")
         self.set_dvk_file(file)
         # RENAME MEDIA FILE
@@ -915,8 +1236,14 @@ class Dvk:
                     rename(from_file, to_file)
                 except:
                     self.set_secondary_file(to_file)
-        # REWRITE DVK FILE
+        # WRITE THE NEW DVK FILE BEFORE REMOVING THE OLD ONE
         self.write_dvk()
+        try:
+            if (exists(old_file) and exists(file)
+                    and not samefile(old_file, file)):
+                remove(old_file)
+        except OSError:
+            pass
 
     def delete_dvk(self):
         """
@@ -934,6 +1261,7 @@ class Dvk:
         file = self.get_secondary_file()
         if file is not None and exists(file):
             remove(file)
+        self.set_saved(False)
 
     def move_dvk(self, directory:str=None):
         """
@@ -973,6 +1301,8 @@ class Dvk:
         """
         Updates media file extensions to mach magic number file type.
         """
+        # Import here so filetype is only loaded when checking media
+        from filetype import guess
         if exists(self.get_dvk_file()):
             # GET PARENT DIRECTORY
             parent = abspath(join(self.get_dvk_file(), pardir))
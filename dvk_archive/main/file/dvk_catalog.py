@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+
+from dvk_archive.main.file.dvk import Dvk
+from marshal import dumps, loads
+from os import stat
+from os.path import abspath, dirname, join
+from sqlite3 import connect
+from sqlite3 import Error as SQLiteError
+from typing import List
+
+CATALOG_NAME = ".dvk_catalog.sqlite"
+
+def is_catalog_file(filename:str=None) -> bool:
+    """
+    Returns whether a given filename belongs to a DVK catalog.
+    Includes the temporary journal files SQLite creates next to the catalog.
+
+    :param filename: Filename to check, defaults to None
+    :type filename: str, optional
+    :return: Whether the file is part of a DVK catalog
+    :rtype: bool
+    """
+    if filename is None:
+        return False
+    return filename.startswith(CATALOG_NAME)
+
+class DvkCatalog:
+
+    def __init__(self, directory:str=None):
+        """
+        Initializes the DvkCatalog object.
+        Opens the catalog stored at the root of the given directory if specified.
+
+        :param directory: Root directory of the DVK archive, defaults to None
+        :type directory: str, optional
+        """
+        self.connection = None
+        self.catalog_file = None
+        if directory is not None:
+            self.open_catalog(directory)
+
+    def open_catalog(self, directory:str=None):
+        """
+        Opens the catalog file at the root of the given directory.
+        Creates the catalog if it doesn't already exist.
+
+        :param directory: Root directory of the DVK archive, defaults to None
+        :type directory: str, optional
+        """
+        self.close_catalog()
+        if directory is None:
+            return
+        try:
+            self.catalog_file = abspath(join(abspath(directory), CATALOG_NAME))
+            self.connection = connect(self.catalog_file, timeout=30)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS dvks ("
+                        + "path TEXT PRIMARY KEY, "
+                        + "mtime INTEGER, "
+                        + "size INTEGER, "
+                        + "inode INTEGER, "
+                        + "fields BLOB)")
+            self.connection.commit()
+        except SQLiteError:
+            self.close_catalog()
+
+    def close_catalog(self):
+        """
+        Closes the catalog file if it is open.
+        """
+        if self.connection is not None:
+            self.connection.close()
+        self.connection = None
+        self.catalog_file = None
+
+    def get_catalog_file(self) -> str:
+        """
+        Returns the path of the currently open catalog file.
+
+        :return: Path of the catalog file
+        :rtype: str
+        """
+        return self.catalog_file
+
+    def load_dvks(self,
+                paths:List[str]=None,
+                workers:int=1,
+                use_processes:bool=False,
+                directories:List[str]=None) -> List[Dvk]:
+        """
+        Loads Dvks for the given DVK files, only parsing files that changed.
+        Files are treated as unchanged if their mtime, size, and inode match the catalog.
+        Dvks are returned in the same order as the given paths.
+
+        :param paths: Paths of the DVK files to load, defaults to None
+        :type paths: list[str], optional
+        :param workers: Number of workers used to parse changed DVK files, defaults to 1
+        :type workers: int, optional
+        :param use_processes: Whether to parse with processes rather than threads, defaults to False
+        :type use_processes: bool, optional
+        :param directories: Directories that were searched for paths, defaults to None (whole archive)
+        :type directories: list[str], optional
+        :return: List of Dvks loaded from the given paths
+        :rtype: list[Dvk]
+        """
+        # Import here to avoid a circular import with the DvkHandler
+        from dvk_archive.main.file.dvk_handler import load_dvk_files
+        if paths is None:
+            return []
+        # Get the current catalog entries
+        entries = dict()
+        if self.connection is not None:
+            try:
+                rows = self.connection.execute(
+                            "SELECT path, mtime, size, inode, fields FROM dvks")
+                for row in rows:
+                    entries[row[0]] = row
+            except SQLiteError:
+                entries = dict()
+        # Restore Dvks for files that haven't changed
+        dvks = []
+        stats = []
+        changed = []
+        for path in paths:
+            try:
+                info = stat(path)
+            except OSError:
+                continue
+            key = (info.st_mtime_ns, info.st_size, info.st_ino)
+            entry = entries.get(path)
+            dvk = None
+            if entry is not None and (entry[1], entry[2], entry[3]) == key:
+                try:
+                    dvk = Dvk()
+                    dvk.set_dvk_file(path)
+                    dvk.set_fields(loads(entry[4]))
+                    dvk.set_saved()
+                except (EOFError, TypeError, ValueError):
+                    dvk = None
+            if dvk is None:
+                changed.append(len(dvks))
+            dvks.append(dvk)
+            stats.append((path, key))
+        # Parse DVK files that changed since they were last cataloged
+        changed_paths = [stats[index][0] for index in changed]
+        parsed = load_dvk_files(changed_paths, workers, use_processes)
+        updates = []
+        for index, dvk in zip(changed, parsed):
+            dvks[index] = dvk
+            key = stats[index][1]
+            updates.append((stats[index][0], key[0], key[1], key[2], dumps(dvk.get_fields())))
+        # Update the catalog with the newly parsed and deleted DVK files
+        if self.connection is not None:
+            try:
+                self.connection.executemany(
+                            "INSERT OR REPLACE INTO dvks VALUES (?, ?, ?, ?, ?)",
+                            updates)
+                # Only remove missing entries from directories that were searched
+                found = set([item[0] for item in stats])
+                searched = None
+                if directories is not None:
+                    searched = set([abspath(directory) for directory in directories])
+                removed = []
+                for path in entries:
+                    if not path in found and (searched is None
+                                or dirname(path) in searched):
+                        removed.append((path,))
+                self.connection.executemany("DELETE FROM dvks WHERE path = ?", removed)
+                self.connection.commit()
+            except SQLiteError:
+                self.connection.rollback()
+        return dvks
@@ -1,13 +1,62 @@
 #!/usr/bin/env python3
 
-from _functools import cmp_to_key
+from bisect import insort
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dvk_archive.main.file.dvk import Dvk
+from dvk_archive.main.file.dvk_catalog import DvkCatalog
 from dvk_archive.main.processing.string_compare import compare_alphanum
 from dvk_archive.main.processing.string_compare import compare_strings
 from tqdm import tqdm
-from typing import List
-from os import listdir, walk
-from os.path import abspath, exists, isdir, join
+from typing import Iterator, List
+from os import scandir
+from os.path import abspath, exists, isdir
+
+def scan_directory(directory:str=None, include_subs:bool=True) -> Iterator[tuple]:
+    """
+    Scans a directory and its subdirectories, listing each directory only once.
+    Yields a (directory, DVK file paths, other file entries) tuple for each directory.
+    Directories are yielded top-down in the same order as os.walk.
+    Other file entries are os.DirEntry objects, which cache their stat results.
+
+    :param directory: Directory to scan, defaults to None
+    :type directory: str, optional
+    :param include_subs: Whether to scan subdirectories, defaults to True
+    :type include_subs: bool, optional
+    :return: Iterator of (directory, DVK paths, file entries) tuples
+    :rtype: Iterator[tuple]
+    """
+    # Return nothing if the given directory is invalid
+    if directory is None:
+        return
+    path = abspath(directory)
+    if not exists(path) or not isdir(path):
+        return
+    stack = [path]
+    while len(stack) > 0:
+        path = stack.pop()
+        dvk_paths = []
+        entries = []
+        subs = []
+        try:
+            with scandir(path) as iterator:
+                for entry in iterator:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        # Don't follow symbolic links, matching os.walk
+                        if include_subs and not entry.is_symlink():
+                            subs.append(abspath(entry.path))
+                    elif entry.name.endswith(".dvk"):
+                        dvk_paths.append(abspath(entry.path))
+                    else:
+                        entries.append(entry)
+        except OSError:
+            continue
+        yield (path, dvk_paths, entries)
+        # Add subdirectories in reverse so they are scanned in listed order
+        stack.extend(reversed(subs))
 
 
 def get_directories(directory:str=None, only_dvk:bool=True) -> List[str]:
@@ -23,49 +72,277 @@ def get_directories(directory:str=None, only_dvk:bool=True) -> List[str]:
     :return: Sub-directories of the given directory
     :rtype: list[str]
     """
-    # RETURN EMPTY LIST IF GIVEN DIRECTORY IS INVALID
-    if directory is None:
-        return []
-    path = abspath(directory)
-    if not exists(path) or not isdir(path):
-        return []
     # GET ALL DIRECTORIES AND SUBDIRECTORIES
-    dirs = []
-    for p in walk(path):
-        dirs.append(abspath(p[0]))
     # IF SET TO ONLY RETURN DIRECTORIES WITH DVK FILES,
     # FILTER OUT DIRECTORIES WITHOUT DVK FILES
-    if only_dvk:
-        i = 0
-        while i < len(dirs):
-            dvk_dirs = listdir(dirs[i])
-            delete = True
-            for file in dvk_dirs:
-                if file.endswith(".dvk"):
-                    delete = False
-                    break
-            if delete:
-                del dirs[i]
-                i = i - 1
-            # INCREMENT COUNTER
-            i = i + 1
+    dirs = []
+    for scan in scan_directory(directory):
+        if not only_dvk or len(scan[1]) > 0:
+            dirs.append(scan[0])
     return dirs
 
+def load_dvk_files(paths:List[str]=None,
+                workers:int=1,
+                use_processes:bool=False) -> Iterator[Dvk]:
+    """
+    Loads Dvk objects from a list of DVK file paths.
+    Dvks are returned in the same order as the given paths.
+    Uses a pool of worker threads or processes if more than one worker is given.
+
+    :param paths: Paths of the DVK files to load, defaults to None
+    :type paths: list[str], optional
+    :param workers: Number of workers used to read DVK files, defaults to 1
+    :type workers: int, optional
+    :param use_processes: Whether to use processes rather than threads, defaults to False
+    :type use_processes: bool, optional
+    :return: Iterator of Dvks loaded from the given paths
+    :rtype: Iterator[Dvk]
+    """
+    # Return nothing if the list of paths is invalid
+    if paths is None or len(paths) == 0:
+        return
+    # Read DVK files on the current thread if no extra workers are requested
+    if workers is None or workers < 2 or len(paths) < 2:
+        for path in paths:
+            yield Dvk(path)
+        return
+    # Read DVK files with a pool of workers, keeping the original order
+    if use_processes:
+        # Send paths to processes in chunks to reduce communication overhead
+        chunksize = max(1, len(paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(Dvk, paths, chunksize=chunksize)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(Dvk, paths)
+
+def get_index_keys(dvk:Dvk=None) -> List[tuple]:
+    """
+    Returns the keys used to index a Dvk for fast lookups.
+    Each key is a tuple of the index name and the value to look up.
+
+    :param dvk: Dvk to get index keys for, defaults to None
+    :type dvk: Dvk, optional
+    :return: List of (index name, key) tuples
+    :rtype: list[tuple]
+    """
+    keys = []
+    if dvk is None:
+        return keys
+    # Get the Dvk ID, which is always stored in upper case
+    if dvk.get_dvk_id() is not None:
+        keys.append(("id", dvk.get_dvk_id()))
+    # Get URLs as upper case for case insensitive lookups
+    if dvk.get_page_url() is not None:
+        keys.append(("page", dvk.get_page_url().upper()))
+    if dvk.get_direct_url() is not None:
+        keys.append(("direct", dvk.get_direct_url().upper()))
+    if dvk.get_secondary_url() is not None:
+        keys.append(("direct", dvk.get_secondary_url().upper()))
+    # Get media files, which are always stored as absolute paths
+    if dvk.get_media_file() is not None:
+        keys.append(("media", dvk.get_media_file()))
+    if dvk.get_secondary_file() is not None:
+        keys.append(("media", dvk.get_secondary_file()))
+    return keys
+
+def get_time_key(dvk:Dvk=None) -> tuple:
+    """
+    Returns a sort key ordering Dvks the same way as DvkHandler.compare_time.
+
+    :param dvk: Dvk to get a sort key for, defaults to None
+    :type dvk: Dvk, optional
+    :return: Sort key of the time followed by the title
+    :rtype: tuple
+    """
+    return (dvk.get_time().upper(), dvk.get_title_key())
+
+def get_alpha_key(dvk:Dvk=None) -> tuple:
+    """
+    Returns a sort key ordering Dvks the same way as DvkHandler.compare_alpha.
+
+    :param dvk: Dvk to get a sort key for, defaults to None
+    :type dvk: Dvk, optional
+    :return: Sort key of the title followed by the time
+    :rtype: tuple
+    """
+    return (dvk.get_title_key(), dvk.get_time().upper())
+
 class DvkHandler:
 
-    def __init__(self, directory:str=None):
+    def __init__(self,
+                directory:str=None,
+                workers:int=1,
+                use_processes:bool=False,
+                use_catalog:bool=False,
+                keep_scan:bool=False):
         """
         Initializes the DvkHandler object.
         Loads dvks from a given directory if specified.
 
         :param directory: Directory from which to load DVKs, defaults to None
         :type directory: str, optional
+        :param workers: Number of workers used to read DVK files, defaults to 1
+        :type workers: int, optional
+        :param use_processes: Whether to read DVK files with processes, defaults to False
+        :type use_processes: bool, optional
+        :param use_catalog: Whether to cache parsed DVKs in a catalog file, defaults to False
+        :type use_catalog: bool, optional
+        :param keep_scan: Whether to keep the directory scan for get_scan, defaults to False
+        :type keep_scan: bool, optional
         """
         self.dvks = []
+        self.scan = []
+        self.clear_indexes()
+        self.set_workers(workers, use_processes)
+        self.set_use_catalog(use_catalog)
         if directory is not None:
-            self.read_dvks(directory)
-    
-    def read_dvks(self, directory:str=None, include_subs:bool=True):
+            self.read_dvks(directory, keep_scan=keep_scan)
+
+    def set_workers(self, workers:int=1, use_processes:bool=False):
+        """
+        Sets the number of workers used when reading DVK files.
+        Threads suit I/O bound reads, processes suit JSON decoding bound reads.
+
+        :param workers: Number of workers used to read DVK files, defaults to 1
+        :type workers: int, optional
+        :param use_processes: Whether to read DVK files with processes, defaults to False
+        :type use_processes: bool, optional
+        """
+        self.workers = 1
+        if workers is not None and workers > 1:
+            self.workers = workers
+        self.use_processes = use_processes
+
+    def get_workers(self) -> int:
+        """
+        Returns the number of workers used when reading DVK files.
+
+        :return: Number of workers
+        :rtype: int
+        """
+        return self.workers
+
+    def set_use_catalog(self, use_catalog:bool=False):
+        """
+        Sets whether to use a catalog file when reading DVK files.
+        The catalog is stored at the root of the directory being read,
+        so only DVK files that changed since the last read are parsed again.
+
+        :param use_catalog: Whether to use a DVK catalog, defaults to False
+        :type use_catalog: bool, optional
+        """
+        self.use_catalog = use_catalog
+
+    def clear_indexes(self):
+        """
+        Clears the lookup indexes so they are rebuilt on the next lookup.
+        """
+        self.indexes = None
+        self.index_keys = None
+        self.positions = None
+        self.changed = set()
+
+    def index_dvks(self):
+        """
+        Builds lookup indexes for the IDs, URLs, and media files of the loaded Dvks.
+        Each index maps a key to the sorted list of Dvk indexes containing it.
+        If an indexed Dvk's lookup fields change, only its entries are updated.
+        """
+        self.indexes = {"id":dict(), "page":dict(), "direct":dict(), "media":dict()}
+        self.index_keys = []
+        self.positions = dict()
+        self.changed = set()
+        for i in range(0, self.get_size()):
+            self.dvks[i].set_handler(self)
+            self.positions[self.dvks[i]] = i
+            keys = get_index_keys(self.dvks[i])
+            self.index_keys.append(keys)
+            for key in keys:
+                indexes = self.indexes[key[0]].setdefault(key[1], [])
+                if len(indexes) == 0 or not indexes[-1] == i:
+                    indexes.append(i)
+
+    def add_index_keys(self, index:int=-1):
+        """
+        Adds the lookup keys of the Dvk at the given index to the indexes.
+        Must only be called while the indexes are built.
+
+        :param index: Index of the Dvk to add keys for, defaults to -1
+        :type index: int, optional
+        """
+        dvk = self.dvks[index]
+        dvk.set_handler(self)
+        self.positions[dvk] = index
+        keys = get_index_keys(dvk)
+        self.index_keys[index] = keys
+        for key in keys:
+            indexes = self.indexes[key[0]].setdefault(key[1], [])
+            if not index in indexes:
+                insort(indexes, index)
+
+    def remove_index_keys(self, index:int=-1):
+        """
+        Removes the lookup keys of the Dvk at the given index from the indexes.
+        Must only be called while the indexes are built.
+
+        :param index: Index of the Dvk to remove keys for, defaults to -1
+        :type index: int, optional
+        """
+        for key in self.index_keys[index]:
+            indexes = self.indexes[key[0]].get(key[1], [])
+            if index in indexes:
+                indexes.remove(index)
+            if len(indexes) == 0:
+                self.indexes[key[0]].pop(key[1], None)
+        self.index_keys[index] = []
+
+    def set_dvk_changed(self, dvk:Dvk=None):
+        """
+        Records that a lookup field of an indexed Dvk has changed.
+        The Dvk's index entries are updated on the next lookup.
+
+        :param dvk: Dvk that changed, defaults to None
+        :type dvk: Dvk, optional
+        """
+        if dvk is not None and self.indexes is not None:
+            self.changed.add(dvk)
+
+    def update_changed(self):
+        """
+        Updates the index entries of every Dvk changed since the last lookup.
+        Rebuilds all the indexes if a changed Dvk can't be found.
+        """
+        changed = self.changed
+        self.changed = set()
+        for dvk in changed:
+            index = self.positions.get(dvk)
+            if index is None or not self.dvks[index] is dvk:
+                self.index_dvks()
+                return
+            self.remove_index_keys(index)
+            self.add_index_keys(index)
+
+    def get_indexed(self, index_name:str=None, key:str=None) -> List[int]:
+        """
+        Returns the indexes of the Dvks containing the given key in the given index.
+        Rebuilds the lookup indexes if they are missing or out of date.
+
+        :param index_name: Name of the index ("id", "page", "direct", "media"), defaults to None
+        :type index_name: str, optional
+        :param key: Key to look up, defaults to None
+        :type key: str, optional
+        :return: Sorted indexes of the Dvks containing the key
+        :rtype: list[int]
+        """
+        if self.indexes is None:
+            self.index_dvks()
+        elif len(self.changed) > 0:
+            # Re-key only the Dvks modified since the last lookup
+            self.update_changed()
+        return self.indexes[index_name].get(key, [])
+
+    def read_dvks(self, directory:str=None, include_subs:bool=True, keep_scan:bool=False):
         """
         Reads all the DVK files in a given directory and stores them in a list.
 
@@ -73,22 +350,57 @@ class DvkHandler:
         :type directory: str, optional
         :param include_subs: Whether to include subdirectories when loading Dvks, defaults to True
         :type include_subs: bool, optional
+        :param keep_scan: Whether to keep the directory scan for get_scan, defaults to False
+        :type keep_scan: bool, optional
         """
+        # RELEASE THE PREVIOUSLY LOADED DVKS FROM THE INDEXES
+        for dvk in self.dvks:
+            if dvk.get_handler() is self:
+                dvk.set_handler(None)
         self.dvks = []
+        self.scan = []
         if directory is not None:
-            # GET LIST OF DIRECTORIES CONTAINING DVK FILES
+            # GET DVK FILES FROM DIRECTORIES CONTAINING DVK FILES
             absolute = abspath(directory)
-            dirs = [absolute]
-            if include_subs:
-                dirs = get_directories(absolute)
-            # LOAD LIST OF DVK FILES
+            dirs = []
+            paths = []
+            for scan in scan_directory(absolute, include_subs):
+                if len(scan[1]) > 0:
+                    # Only hold the other file entries if they will be used
+                    if keep_scan:
+                        self.scan.append(scan)
+                    dirs.append(scan[0])
+                    paths.extend(scan[1])
+            # LOAD DVK FILES
             print("Reading DVK files:")
-            for path in tqdm(dirs):
-                for file in listdir(path):
-                    if file.endswith(".dvk"):
-                        dvk = Dvk(abspath(join(path, file)))
-                        if dvk.get_title() is not None:
-                            self.dvks.append(dvk)
+            if self.use_catalog:
+                # ONLY PARSE DVK FILES THAT CHANGED SINCE LAST CATALOGED
+                searched = None
+                if not include_subs:
+                    searched = dirs
+                catalog = DvkCatalog(absolute)
+                dvks = catalog.load_dvks(paths,
+                            self.workers,
+                            self.use_processes,
+                            searched)
+                catalog.close_catalog()
+            else:
+                dvks = load_dvk_files(paths, self.workers, self.use_processes)
+            for dvk in tqdm(dvks, total=len(paths)):
+                if dvk.get_title() is not None:
+                    self.dvks.append(dvk)
+        self.clear_indexes()
+
+    def get_scan(self) -> List[tuple]:
+        """
+        Returns the results of scanning the directories DVKs were last read from.
+        Only includes directories that contain DVK files.
+        Empty unless the Dvks were read with keep_scan.
+
+        :return: List of (directory, DVK paths, other file entries) tuples
+        :rtype: list[tuple]
+        """
+        return self.scan
 
     def sort_dvks(self, sort_type:str=None):
         """
@@ -100,10 +412,11 @@ class DvkHandler:
         print("Sorting DVK files...")
         if sort_type is not None and self.get_size() > 0:
             if sort_type == "t":
-                comparator = cmp_to_key(self.compare_time)
+                key = get_time_key
             else:
-                comparator = cmp_to_key(self.compare_alpha)
-            self.dvks = sorted(self.dvks, key=comparator)
+                key = get_alpha_key
+            self.dvks = sorted(self.dvks, key=key)
+            self.clear_indexes()
 
     def compare_time(self, x:Dvk=None, y:Dvk=None) -> int:
         """
@@ -167,6 +480,15 @@ class DvkHandler:
         """
         return self.dvks[index]
 
+    def iter_dvks(self) -> Iterator[Dvk]:
+        """
+        Returns an iterator over the Dvks in the DvkHandler, in their current order.
+
+        :return: Iterator over the Dvk list
+        :rtype: Iterator[Dvk]
+        """
+        return iter(self.dvks)
+
     def add_dvk(self, dvk:Dvk=None):
         """
         Adds a given Dvk to the DvkHandler's list of Dvks.
@@ -177,6 +499,10 @@ class DvkHandler:
         """
         if dvk is not None and dvk.can_write():
             self.dvks.append(dvk)
+            # Add the new Dvk to the indexes
+            if self.indexes is not None:
+                self.index_keys.append([])
+                self.add_index_keys(self.get_size() - 1)
 
     def set_dvk(self, dvk:Dvk=None, index:int=-1):
         """
@@ -192,7 +518,16 @@ class DvkHandler:
                 and dvk.can_write()
                 and index > -1
                 and index < self.get_size()):
+            old_dvk = self.dvks[index]
             self.dvks[index] = dvk
+            # Replace the keys of the old Dvk in the indexes
+            if self.indexes is not None:
+                self.update_changed()
+                self.remove_index_keys(index)
+                self.positions.pop(old_dvk, None)
+                if old_dvk.get_handler() is self and not old_dvk is dvk:
+                    old_dvk.set_handler(None)
+                self.add_index_keys(index)
 
     def remove_dvk(self, index:int=-1):
         """
@@ -202,7 +537,12 @@ class DvkHandler:
         :type index: int, optional
         """
         if index > -1 and index < self.get_size():
+            dvk = self.dvks[index]
             del self.dvks[index]
+            if dvk.get_handler() is self:
+                dvk.set_handler(None)
+            # Indexes after the removed Dvk shift, so rebuild on next lookup
+            self.clear_indexes()
 
     def get_dvk_by_id(self, dvk_id:str=None) -> int:
         """
@@ -218,10 +558,9 @@ class DvkHandler:
         if dvk_id is None:
             return -1
         # SEARCH FOR GIVEN ID IN LOADED DVKS
-        upper_id = dvk_id.upper()
-        for i in range(0, self.get_size()):
-            if self.get_dvk(i).get_dvk_id() == upper_id:
-                return i
+        indexes = self.get_indexed("id", dvk_id.upper())
+        if len(indexes) > 0:
+            return indexes[0]
         return -1
 
     def contains_id(self, dvk_id:str=None) -> bool:
@@ -251,11 +590,7 @@ class DvkHandler:
         if page_url is None:
             return False
         # SEARCH FOR GIVEN PAGE URL IN LOADED DVKS
-        upper_url = page_url.upper()
-        for i in range(0, self.get_size()):
-            if self.get_dvk(i).get_page_url().upper() == upper_url:
-                return True
-        return False
+        return len(self.get_indexed("page", page_url.upper())) > 0
 
     def contains_direct_url(self, direct_url:str=None) -> bool:
         """
@@ -270,15 +605,7 @@ class DvkHandler:
         if direct_url is None:
             return False
         # SEARCH FOR GIVEN DIRECT URL IN LOADED DVKS
-        upper_url = direct_url.upper()
-        for i in range(0, self.get_size()):
-            dvk = self.get_dvk(i)
-            if ((dvk.get_direct_url() is not None
-                    and dvk.get_direct_url().upper() == upper_url)
-                    or (dvk.get_secondary_url() is not None
-                    and dvk.get_secondary_url().upper() == upper_url)):
-                return True
-        return False
+        return len(self.get_indexed("direct", direct_url.upper())) > 0
 
     def contains_media_file(self, media_file:str=None) -> bool:
         """
@@ -294,12 +621,4 @@ class DvkHandler:
         if media_file is None:
             return False
         # SEARCH FOR GIVEN MEDIA FILE IN LOADED DVKS
-        path = abspath(media_file)
-        for i in range(0, self.get_size()):
-            dvk = self.get_dvk(i)
-            media = dvk.get_media_file()
-            secondary = dvk.get_secondary_file()
-            if ((media is not None and media == path)
-                    or (secondary is not None and secondary == path)):
-                return True
-        return False
+        return len(self.get_indexed("media", abspath(media_file))) > 0
@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
 
 from argparse import ArgumentParser
+from codecs import BOM_UTF8, BOM_UTF16_BE, BOM_UTF16_LE
+from concurrent.futures import ProcessPoolExecutor
+from dvk_archive.main.file.atomic_write import get_cache_directory
+from dvk_archive.main.file.atomic_write import write_file_atomic
 from dvk_archive.main.file.dvk import Dvk
 from dvk_archive.main.file.dvk_handler import DvkHandler
 from dvk_archive.main.color_print import color_print
@@ -10,14 +14,19 @@ from dvk_archive.main.processing.list_processing import clean_list
 from dvk_archive.main.processing.list_processing import list_to_string
 from html_string_tools.main.html_string_tools import get_extension
 from html_string_tools.main.html_string_tools import replace_reserved_characters
-from os import mkdir, pardir
+from hashlib import sha256
+from json import dumps, loads
+from os import mkdir, pardir, remove, stat
 from os.path import abspath, exists, isdir, join
 from shutil import rmtree
-from tempfile import gettempdir
 from traceback import print_exc
 from typing import List
 from webbrowser import open as web_open
 
+# Version of the HTML written for Dvk pages
+# Increase whenever the page layout changes so existing pages are rewritten
+PAGE_VERSION = 1
+
 def get_file_as_url(file:str=None) -> str:
     """
     Converts a file path to be read as a URL in a web browser.
@@ -50,27 +59,60 @@ def get_file_as_url(file:str=None) -> str:
     # Return path with "file://" url tag
     return "file://" + url
 
-def get_temp_directory(delete:bool=False) -> str:
+def get_temp_directory(delete:bool=False, archive:str=None) -> str:
     """
-    Returns a temporary directory for holding HTML files.
+    Returns a directory for holding HTML files, kept in the user's cache directory.
+    Each archive directory gets its own subdirectory, so pages from different
+    archives don't overwrite each other.
 
     :param delete: Whether to delete previous directory contents, defaults to False
     :type delete: bool, optional
-    :return: Path of the temporary directory
+    :param archive: Archive directory the HTML files are made for, defaults to None
+    :type archive: str, optional
+    :return: Path of the HTML directory, None if it couldn't be created
     :rtype: str
     """
-    # Get path of the temp directory
-    temp_dir = abspath(join(abspath(gettempdir()), "dvk_html"))
-    # Delete directory if specified
-    temp_exists = exists(temp_dir)
-    if delete and temp_exists:
-        rmtree(temp_dir)
-        temp_exists = False
-    # Create temp directory if necessary
-    if not temp_exists:
-        mkdir(temp_dir)
+    # Get path of the HTML directory
+    temp_dir = get_cache_directory("dvk_html")
+    if temp_dir is None:
+        return None
+    if archive is not None:
+        name = sha256(abspath(archive).encode("utf-8")).hexdigest()[:16]
+        temp_dir = abspath(join(temp_dir, name))
+    try:
+        # Delete directory if specified
+        temp_exists = exists(temp_dir)
+        if delete and temp_exists:
+            rmtree(temp_dir)
+            temp_exists = False
+        # Create directory if necessary
+        if not temp_exists:
+            mkdir(temp_dir, 0o700)
+    except OSError:
+        return None
     return temp_dir
 
+def get_page_filename(dvk:Dvk=None) -> str:
+    """
+    Returns the filename of the HTML page for a Dvk in a list of pages.
+    Pages are named by a hash of the DVK file, or the Dvk ID if there is no DVK file,
+    so a page keeps its filename when Dvks are added to or removed from the list.
+
+    :param dvk: Dvk the page is created from, defaults to None
+    :type dvk: Dvk, optional
+    :return: Filename of the HTML page, empty string if the Dvk has no file or ID
+    :rtype: str
+    """
+    if dvk is None:
+        return ""
+    if dvk.get_dvk_file() is not None:
+        key = "file:" + abspath(dvk.get_dvk_file())
+    elif dvk.get_dvk_id() is not None:
+        key = "id:" + dvk.get_dvk_id()
+    else:
+        return ""
+    return sha256(key.encode("utf-8")).hexdigest()[:16] + ".html"
+
 def list_to_lines(lst:List[str]=None) -> str:
     """
     Converts a list of strings into a single string with items on separate lines.
@@ -163,6 +205,35 @@ def is_image_extension(extension:str=None) -> bool:
         return True
     return False
 
+def read_text_media(file:str=None) -> str:
+    """
+    Returns the text from a text media file, reading the file only once.
+    The encoding is found from any byte order mark, otherwise
+    UTF-8 is used if valid, falling back to ISO-8859-1.
+
+    :param file: Path of the text file, defaults to None
+    :type file: str, optional
+    :return: Text of the file with normalized line endings, or None if the file can't be read
+    :rtype: str
+    """
+    try:
+        with open(file, "rb") as in_file:
+            data = in_file.read()
+    except (OSError, TypeError):
+        return None
+    # Get the encoding from the byte order mark, if there is one
+    if data.startswith(BOM_UTF8):
+        text = data.decode("utf-8-sig", errors="replace")
+    elif data.startswith(BOM_UTF16_LE) or data.startswith(BOM_UTF16_BE):
+        text = data.decode("utf-16", errors="replace")
+    else:
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            # Every byte is valid in ISO-8859-1
+            text = data.decode("iso-8859-1")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
 def get_text_media_html(dvk:Dvk=None) -> str:
     """
     Returns an HTML tag that contains embeded text found in the linked text media file for a given Dvk.
@@ -179,15 +250,9 @@ def get_text_media_html(dvk:Dvk=None) -> str:
     media_file = dvk.get_media_file()
     extension = get_extension(media_file)
     # Read the text file linked by the Dvk
-    try:
-        with open(media_file, encoding="utf-8") as f:
-            contents = f.read()
-    except Exception:
-        try:
-            with open(media_file, encoding="iso-8859-1") as f:
-                contents = f.read()
-        except Exception:
-            return ""
+    contents = read_text_media(media_file)
+    if contents is None:
+        return ""
     # Modify the contents depending on the type of text
     if extension == ".txt":
         # Add escape characters to standard text
@@ -408,17 +473,13 @@ def get_navbar_html(prev_path:str=None, next_path:str=None) -> str:
     navbar_tag = create_html_tag("div", attr, list_to_lines([prev_tag, next_tag]))
     return navbar_tag
 
-def create_css(directory:str=None) -> str:
+def get_css() -> str:
     """
-    Creates a CSS file for styling DVK HTML.
+    Returns the CSS for styling DVK HTML.
 
-    :param directory: Directory to save the CSS file, defaults to None
-    :type directory: str, optional
-    :return: Path to the written CSS file
+    :return: Contents of the CSS file
     :rtype: str
     """
-    if directory is None or not isdir(directory) or not exists(directory):
-        return ""
     # Color variables
     pad_space = 6
     border_width = "1px"
@@ -593,14 +654,103 @@ def create_css(directory:str=None) -> str:
     css.append("    margin-right: auto;")
     css.append(f"    max-width: {portrait_width_size};")
     css.append("}")
+    return list_to_lines(css)
+
+def create_css(directory:str=None) -> str:
+    """
+    Creates a CSS file for styling DVK HTML.
+    The file is only written if it doesn't already contain the current CSS.
+
+    :param directory: Directory to save the CSS file, defaults to None
+    :type directory: str, optional
+    :return: Path to the written CSS file
+    :rtype: str
+    """
+    if directory is None or not isdir(directory) or not exists(directory):
+        return ""
     # Write CSS File
+    css = get_css()
     css_file = abspath(join(directory, "dvk_style.css"))
-    with open(css_file, "w") as out_file:
-        out_file.write(list_to_lines(css))
-    if not exists(css_file):
-        return ""
+    try:
+        with open(css_file, encoding="utf-8") as in_file:
+            current = in_file.read()
+    except (OSError, ValueError):
+        current = None
+    if not current == css:
+        if not write_file_atomic(css_file, css.encode("utf-8")):
+            return ""
     return css_file
 
+def get_page_hash(dvk:Dvk=None,
+                css_hash:str=None,
+                prev_path:str=None,
+                next_path:str=None) -> str:
+    """
+    Returns a hash of everything used to create the HTML page for a Dvk.
+    Includes the Dvk's fields, the size and modified time of its media,
+    the linked pages, the version of the CSS, and the PAGE_VERSION.
+
+    :param dvk: Dvk the page is created from, defaults to None
+    :type dvk: Dvk, optional
+    :param css_hash: Hash of the CSS used by the page, defaults to None
+    :type css_hash: str, optional
+    :param prev_path: Path of the previous Dvk HTML in navbar, defaults to None
+    :type prev_path: str, optional
+    :param next_path: Path of the next Dvk HTML in navbar, defaults to None
+    :type next_path: str, optional
+    :return: Hash of the page inputs
+    :rtype: str
+    """
+    if dvk is None:
+        return ""
+    inputs = [PAGE_VERSION, dvk.get_dvk_file(), dvk.get_fields(),
+                css_hash, prev_path, next_path]
+    # Text media is copied into the page, so include when media files change
+    for file in [dvk.get_media_file(), dvk.get_secondary_file()]:
+        try:
+            info = stat(file)
+            inputs.append([file, info.st_mtime_ns, info.st_size])
+        except (OSError, TypeError):
+            inputs.append([file, None, None])
+    data = dumps(inputs, sort_keys=True, default=str)
+    return sha256(data.encode("utf-8")).hexdigest()
+
+def read_manifest(directory:str=None) -> dict:
+    """
+    Returns the hashes of the HTML pages previously written to a directory.
+
+    :param directory: Directory containing the HTML pages, defaults to None
+    :type directory: str, optional
+    :return: Dict of HTML filenames and their page hashes
+    :rtype: dict
+    """
+    if directory is None:
+        return dict()
+    try:
+        with open(join(directory, "dvk_manifest.json"), "rb") as in_file:
+            manifest = loads(in_file.read())
+        if isinstance(manifest, dict):
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return dict()
+
+def write_manifest(directory:str=None, manifest:dict=None) -> bool:
+    """
+    Writes the hashes of the HTML pages written to a directory.
+
+    :param directory: Directory containing the HTML pages, defaults to None
+    :type directory: str, optional
+    :param manifest: Dict of HTML filenames and their page hashes, defaults to None
+    :type manifest: dict, optional
+    :return: Whether the manifest was written
+    :rtype: bool
+    """
+    if directory is None or manifest is None:
+        return False
+    data = dumps(manifest, sort_keys=True).encode("utf-8")
+    return write_file_atomic(join(directory, "dvk_manifest.json"), data)
+
 def get_dvk_html(dvk:Dvk=None,
                 css:str=None,
                 prev_path:str=None,
@@ -651,7 +801,9 @@ def write_dvk_html(dvk:Dvk=None,
                    filename:str=None,
                    prev_path:str=None,
                    next_path:str=None,
-                   delete:bool=True) -> str:
+                   delete:bool=True,
+                   css_file:str=None,
+                   directory:str=None) -> str:
     """
     Creates an HTML file from Dvk info.
 
@@ -665,6 +817,10 @@ def write_dvk_html(dvk:Dvk=None,
     :type next_path: str, optional
     :param delete: Whether to delete the contents of temp directory before writing, defaults to False
     :type delete: bool, optional
+    :param css_file: Path of an existing CSS file, creates the CSS file if None, defaults to None
+    :type css_file: str, optional
+    :param directory: Directory to write the HTML file in, uses get_temp_directory if None, defaults to None
+    :type directory: str, optional
     :return: Path of the written HTML file
     :rtype: str
     """
@@ -672,60 +828,135 @@ def write_dvk_html(dvk:Dvk=None,
     if dvk is None or filename is None:
         return ""
     # Get the filename for the dvk
-    temp_dir = get_temp_directory(delete)
+    temp_dir = directory
+    if temp_dir is None:
+        temp_dir = get_temp_directory(delete)
+    if temp_dir is None:
+        return ""
     html_file = abspath(join(temp_dir, filename))
     # Get HTML for the given Dvk
-    css_file = create_css(temp_dir)
+    if css_file is None:
+        css_file = create_css(temp_dir)
     html = get_dvk_html(dvk,
                 css=css_file,
                 prev_path=prev_path,
                 next_path=next_path)
     if html == "":
         return ""
-    # Write html to disk
-    with open(html_file, "w") as out_file:
-        out_file.write(html)
-    if not exists(html_file):
+    # Write html to disk, never leaving a half written page
+    if not write_file_atomic(html_file, html.encode("utf-8")):
         return ""
     # Return the path to the html file
     return html_file
 
-def write_dvk_html_list(dvks:List[Dvk]=None, delete:bool=True) -> List[str]:
+def write_dvk_html_page(page:list=None) -> str:
+    """
+    Writes one HTML page for write_dvk_html_list.
+    Takes a single list so pages can be sent to worker processes.
+
+    :param page: [dvk, filename, prev_path, next_path, css_file, directory] for the page, defaults to None
+    :type page: list, optional
+    :return: Path of the written HTML file
+    :rtype: str
+    """
+    if page is None:
+        return ""
+    return write_dvk_html(page[0],
+                filename=page[1],
+                prev_path=page[2],
+                next_path=page[3],
+                delete=False,
+                css_file=page[4],
+                directory=page[5])
+
+def write_dvk_html_list(dvks:List[Dvk]=None,
+                delete:bool=True,
+                workers:int=1,
+                archive:str=None) -> List[str]:
     """
     Writes HTML files for a list of Dvks.
-    Each Dvk HTML file links to next/previous HTMLs in the navbar
+    Each Dvk HTML file links to next/previous HTMLs in the navbar.
+    Pages are only written again if their Dvk, media, linked pages, or CSS
+    changed since the last time they were written to the archive's HTML directory.
 
     :param dvks: List of Dvks to create HTMLs from, defaults to None
     :type dvks: list[Dvk], optional
     :param delete: Whether to delete temp directory contents before writing, defaults to True
     :type delete: bool, optional
+    :param workers: Number of processes used to write HTML files, defaults to 1
+    :type workers: int, optional
+    :param archive: Archive directory the Dvks are from, uses the first DVK file's directory if None, defaults to None
+    :type archive: str, optional
     :return: List of paths to the generated HTML files
     :rtype: list[str]
     """
     # Return empty list if list of Dvks is invalid
-    if dvks is None:
+    if dvks is None or len(dvks) == 0:
+        return []
+    # Get the archive's HTML directory and write the CSS once for every page
+    if archive is None and dvks[0].get_dvk_file() is not None:
+        archive = abspath(join(dvks[0].get_dvk_file(), pardir))
+    temp_dir = get_temp_directory(delete, archive)
+    if temp_dir is None:
         return []
-    # Get the temporary directory
-    temp_dir = get_temp_directory(delete)
-    # Get HTML for each Dvk
+    css_file = create_css(temp_dir)
+    css_hash = sha256(get_css().encode("utf-8")).hexdigest()
+    manifest = read_manifest(temp_dir)
+    # Get the pages that need to be written for each Dvk
     size = len(dvks)
+    filenames = []
+    for i in range(0, size):
+        # Name pages by position if their Dvk can't be identified
+        filename = get_page_filename(dvks[i])
+        if filename == "":
+            filename = str(i) + ".html"
+        filenames.append(filename)
     htmls = []
+    hashes = []
+    pages = []
     for i in range(0, size):
         # Get previous HTML to link
         prev_path = None
         if i > 0:
-            prev_path = abspath(join(temp_dir, str(i-1) + ".html"))
+            prev_path = abspath(join(temp_dir, filenames[i-1]))
         # Get the next HTML to link
         next_path = None
         if i < (size-1):
-            next_path = abspath(join(temp_dir, str(i+1) + ".html"))
-        # Write the HTML file
-        html = write_dvk_html(dvks[i],
-                    filename=str(i) + ".html",
-                    prev_path=prev_path,
-                    next_path=next_path,
-                    delete=False)
+            next_path = abspath(join(temp_dir, filenames[i+1]))
+        # Skip writing the HTML file if nothing has changed
+        filename = filenames[i]
+        page_hash = get_page_hash(dvks[i], css_hash, prev_path, next_path)
+        html = abspath(join(temp_dir, filename))
+        if not (manifest.get(filename) == page_hash and exists(html)):
+            pages.append([dvks[i], filename, prev_path, next_path, css_file, temp_dir])
+            html = None
         htmls.append(html)
+        hashes.append(page_hash)
+    # Write pages, using a pool of processes if more than one worker is given
+    if workers is None or workers < 2 or len(pages) < 2:
+        written = [write_dvk_html_page(page) for page in pages]
+    else:
+        # Send pages to processes in chunks to reduce communication overhead
+        chunksize = max(1, len(pages) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            written = list(executor.map(write_dvk_html_page, pages, chunksize=chunksize))
+    # Fill in the paths of written pages in their original order
+    index = 0
+    new_manifest = dict()
+    for i in range(0, size):
+        if htmls[i] is None:
+            htmls[i] = written[index]
+            index += 1
+        if not htmls[i] == "":
+            new_manifest[filenames[i]] = hashes[i]
+    # Remove pages from previous lists that are no longer used
+    for filename in manifest:
+        if not filename in new_manifest:
+            try:
+                remove(join(temp_dir, filename))
+            except OSError:
+                pass
+    write_manifest(temp_dir, new_manifest)
     # Return HTML paths
     return htmls
 
@@ -743,19 +974,35 @@ def main():
         "--load_directory",
         help="Also creates and links HTML files for the whole parent directory",
         action="store_true")
+    parser.add_argument(
+        "-w",
+        "--workers",
+        help="Number of workers used to read DVK files and write HTML files.",
+        type=int,
+        default=1)
+    parser.add_argument(
+        "-P",
+        "--processes",
+        help="Reads DVK files with worker processes instead of threads.",
+        action="store_true")
+    parser.add_argument(
+        "-c",
+        "--catalog",
+        help="Uses a catalog file to skip reading unchanged DVK files.",
+        action="store_true")
     args = parser.parse_args()
     dvk = Dvk(abspath(args.dvk))
     if dvk is not None and dvk.get_title() is not None:
         if not args.load_directory:
             # Write single HTML file
-            html = write_dvk_html(dvk, "dvk")
+            html = write_dvk_html(dvk, "dvk", delete=False)
             if not html == "":
                 web_open(get_file_as_url(abspath(html)))
             else:
                 color_print("Failed writing HTML", "r")
         else:
             # Write HTML files for the whole directory
-            dvk_handler = DvkHandler()
+            dvk_handler = DvkHandler(workers=args.workers, use_processes=args.processes, use_catalog=args.catalog)
             parent = join(dvk.get_dvk_file(), pardir)
             dvk_handler.read_dvks(parent, False)
             # Get list of all dvks in the parent directory
@@ -764,8 +1011,8 @@ def main():
             size = dvk_handler.get_size()
             for i in range(0, size):
                 dvks.append(dvk_handler.get_dvk(i))
-            # Create HTML files
-            htmls = write_dvk_html_list(dvks, True)
+            # Create HTML files, keeping unchanged pages from previous runs
+            htmls = write_dvk_html_list(dvks, False, args.workers, abspath(parent))
             # Open Dvk HTML
             index = dvk_handler.get_dvk_by_id(dvk.get_dvk_id())
             web_open(get_file_as_url(abspath(htmls[index])))
@@ -192,6 +192,22 @@ def main():
             nargs="?",
             type=str,
             default=str(getcwd()))
+    parser.add_argument(
+            "-w",
+            "--workers",
+            help="Number of workers used to read DVK files.",
+            type=int,
+            default=1)
+    parser.add_argument(
+            "-P",
+            "--processes",
+            help="Reads DVK files with worker processes instead of threads.",
+            action="store_true")
+    parser.add_argument(
+            "-c",
+            "--catalog",
+            help="Uses a catalog file to skip reading unchanged DVK files.",
+            action="store_true")
     args = parser.parse_args()
     full_directory = abspath(args.directory)
     # Check if directory exists
@@ -204,7 +220,7 @@ def main():
         for data_dvk in tqdm(data_dvks):
             create_dvks(data_dvk)
         # Rename files
-        rename_directory(full_directory)
+        rename_directory(full_directory, args.workers, args.catalog, use_processes=args.processes)
     else:
         color_print("Invalid directory", "r")
 
@@ -2,6 +2,8 @@
 
 from argparse import ArgumentParser
 from dvk_archive.main.color_print import color_print
+from dvk_archive.main.file.atomic_write import flush_writes
+from dvk_archive.main.file.atomic_write import set_durability
 from dvk_archive.main.file.dvk import Dvk
 from dvk_archive.main.file.dvk_handler import DvkHandler
 from dvk_archive.main.processing.html_processing import clean_element
@@ -28,25 +30,34 @@ def reformat_dvks(dvk_handler:DvkHandler=None):
             if desc is not None:
                 desc = clean_element(desc, False)
                 dvk.set_description(desc)
-            # WRITE DVK
+            # WRITE DVK, EVEN IF UNCHANGED, IN CASE IT USES AN OLD FORMAT
+            dvk.set_saved(False)
             dvk.write_dvk()
             # UPDATE EXTENSIONS
             dvk.update_extensions()
 
-def reformat_directory(directory:str=None):
+def reformat_directory(directory:str=None, workers:int=1, use_catalog:bool=False, use_processes:bool=False):
     """
     Reformats DVKs in a given directory.
 
     :param directory: Directory in which to reformat DVKs, defaults to None
     :type directory: str, optional
+    :param workers: Number of workers used to read DVK files, defaults to 1
+    :type workers: int, optional
+    :param use_catalog: Whether to use a catalog to skip unchanged DVK files, defaults to False
+    :type use_catalog: bool, optional
+    :param use_processes: Whether to read DVK files with processes rather than threads, defaults to False
+    :type use_processes: bool, optional
     """
     # CHECK IF DIRECTORY EXISTS
     if directory is not None and exists(directory) and isdir(directory):
         # READ DVKS IN THE GIVEN DIRECTORY
-        dvk_handler = DvkHandler()
+        dvk_handler = DvkHandler(workers=workers, use_processes=use_processes, use_catalog=use_catalog)
         dvk_handler.read_dvks(directory)
         # REFORMAT DVKS
         reformat_dvks(dvk_handler)
+        # SYNC ANY BATCHED WRITES
+        flush_writes()
     else:
         color_print("Invalid directory", "r")
 
@@ -61,8 +72,31 @@ def main():
         nargs="?",
         type=str,
         default=str(getcwd()))
+    parser.add_argument(
+        "-w",
+        "--workers",
+        help="Number of workers used to read DVK files.",
+        type=int,
+        default=1)
+    parser.add_argument(
+        "-P",
+        "--processes",
+        help="Reads DVK files with worker processes instead of threads.",
+        action="store_true")
+    parser.add_argument(
+        "-c",
+        "--catalog",
+        help="Uses a catalog file to skip reading unchanged DVK files.",
+        action="store_true")
+    parser.add_argument(
+        "-d",
+        "--durability",
+        help="How DVK writes are synced to disk (n = None, f = Every file, b = Batched).",
+        choices=["n", "f", "b"],
+        default="n")
     args = parser.parse_args()
-    reformat_directory(abspath(args.directory))
+    set_durability(args.durability)
+    reformat_directory(abspath(args.directory), args.workers, args.catalog, use_processes=args.processes)
 
 if __name__ == "__main__":
     main()
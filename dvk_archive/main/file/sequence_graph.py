@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+from dvk_archive.main.file.dvk_handler import DvkHandler
+from typing import List
+
+class SequenceGraph:
+    """
+    Links between the Dvks of a DvkHandler, built from their prev_ids and next_ids.
+    Lets whole sequences be followed without searching the DvkHandler for each ID.
+    The graph is only valid until Dvks in the DvkHandler are added, removed or sorted.
+    """
+
+    def __init__(self, dvk_handler:DvkHandler=None):
+        """
+        Creates a SequenceGraph for the Dvks in the given DvkHandler.
+
+        :param dvk_handler: DvkHandler with loaded Dvks, defaults to None
+        :type dvk_handler: DvkHandler, optional
+        """
+        self.dvk_handler = dvk_handler
+        self.ids = dict()
+        self.next_indexes = []
+        self.prev_indexes = []
+        self.next_missing = []
+        self.prev_missing = []
+        self.build_graph()
+
+    def build_graph(self):
+        """
+        Reads the prev and next links of every Dvk in the DvkHandler.
+        """
+        self.ids = dict()
+        self.next_indexes = []
+        self.prev_indexes = []
+        self.next_missing = []
+        self.prev_missing = []
+        if self.dvk_handler is None:
+            return
+        # Map each ID to the first Dvk that uses it
+        size = self.dvk_handler.get_size()
+        for i in range(0, size):
+            dvk_id = self.dvk_handler.get_dvk(i).get_dvk_id()
+            if dvk_id is not None:
+                self.ids.setdefault(dvk_id.upper(), i)
+        # Get the indexes of the prev and next Dvks
+        for i in range(0, size):
+            dvk = self.dvk_handler.get_dvk(i)
+            next_index = -1
+            next_missing = False
+            if not dvk.is_last() and dvk.get_next_id() is not None:
+                next_index = self.ids.get(dvk.get_next_id().upper(), -1)
+                next_missing = next_index == -1
+            prev_index = -1
+            prev_missing = False
+            if not dvk.is_first() and dvk.get_prev_id() is not None:
+                prev_index = self.ids.get(dvk.get_prev_id().upper(), -1)
+                prev_missing = prev_index == -1
+            self.next_indexes.append(next_index)
+            self.prev_indexes.append(prev_index)
+            self.next_missing.append(next_missing)
+            self.prev_missing.append(prev_missing)
+
+    def get_size(self) -> int:
+        """
+        Returns the number of Dvks in the graph.
+
+        :return: Number of Dvks
+        :rtype: int
+        """
+        return len(self.next_indexes)
+
+    def get_sequence(self, index:int=None) -> List[int]:
+        """
+        Gets a group of Dvks in a sequence from a given starting index.
+        Gives the same result as sequencing.get_sequence.
+
+        :param index: Index of a Dvk in the sequence, defaults to None
+        :type index: int, optional
+        :return: List of indexes for the Dvks in the sequence
+        :rtype: list[int]
+        """
+        # Return empty list if index is invalid
+        if index is None or index < 0 or index >= self.get_size():
+            return []
+        # Get all Dvks from after the given index
+        next_ids = []
+        visited = set()
+        cur_index = self.next_indexes[index]
+        while cur_index != -1 and not cur_index in visited:
+            next_ids.append(cur_index)
+            visited.add(cur_index)
+            cur_index = self.next_indexes[cur_index]
+        # Get all Dvks from before the given index
+        ids = []
+        visited = set()
+        cur_index = self.prev_indexes[index]
+        while cur_index != -1 and not cur_index in visited:
+            ids.append(cur_index)
+            visited.add(cur_index)
+            cur_index = self.prev_indexes[cur_index]
+        ids.reverse()
+        # Combine lists of indexes
+        ids.append(index)
+        ids.extend(next_ids)
+        return ids
+
+    def get_sequences(self) -> List[List[int]]:
+        """
+        Returns every sequence in the graph, each Dvk being used to start at most one sequence.
+        Sequences are ordered by the first index found of each sequence.
+
+        :return: List of sequences as lists of Dvk indexes
+        :rtype: list[list[int]]
+        """
+        sequences = []
+        checked = set()
+        for index in range(0, self.get_size()):
+            if not index in checked:
+                seq = self.get_sequence(index)
+                checked.update(seq)
+                sequences.append(seq)
+        return sequences
+
+    def get_orphans(self) -> List[int]:
+        """
+        Returns indexes of Dvks with a prev_id or next_id not matching any loaded Dvk.
+
+        :return: Indexes of Dvks with broken links
+        :rtype: list[int]
+        """
+        orphans = []
+        for index in range(0, self.get_size()):
+            if self.next_missing[index] or self.prev_missing[index]:
+                orphans.append(index)
+        return orphans
+
+    def get_forks(self) -> List[int]:
+        """
+        Returns indexes of Dvks that are linked to by more than one prev_id or next_id.
+
+        :return: Indexes of Dvks where sequences fork
+        :rtype: list[int]
+        """
+        next_counts = [0] * self.get_size()
+        prev_counts = [0] * self.get_size()
+        for index in range(0, self.get_size()):
+            if self.next_indexes[index] != -1:
+                next_counts[self.next_indexes[index]] += 1
+            if self.prev_indexes[index] != -1:
+                prev_counts[self.prev_indexes[index]] += 1
+        forks = []
+        for index in range(0, self.get_size()):
+            if next_counts[index] > 1 or prev_counts[index] > 1:
+                forks.append(index)
+        return forks
+
+    def get_cycles(self) -> List[List[int]]:
+        """
+        Returns groups of Dvks whose next_ids loop back around to themselves.
+
+        :return: List of cycles as lists of Dvk indexes in next_id order
+        :rtype: list[list[int]]
+        """
+        # 0 = Unvisited, 1 = On current path, 2 = Finished
+        states = [0] * self.get_size()
+        cycles = []
+        for start in range(0, self.get_size()):
+            # Follow next links until reaching a visited Dvk
+            path = []
+            index = start
+            while index != -1 and states[index] == 0:
+                states[index] = 1
+                path.append(index)
+                index = self.next_indexes[index]
+            # Path looped back on itself if it ended on the current path
+            if index != -1 and states[index] == 1:
+                cycles.append(path[path.index(index):])
+            for item in path:
+                states[item] = 2
+        return cycles
@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
 
-from _functools import cmp_to_key
 from argparse import ArgumentParser
 from dvk_archive.main.color_print import color_print
+from dvk_archive.main.file.batch_write import write_dvks
 from dvk_archive.main.file.dvk_handler import Dvk
 from dvk_archive.main.file.dvk_handler import DvkHandler
-from dvk_archive.main.processing.list_processing import clean_list
-from dvk_archive.main.processing.string_compare import compare_alphanum
+from dvk_archive.main.file.sequence_graph import SequenceGraph
+from dvk_archive.main.processing.string_compare import AlphanumKey
 from dvk_archive.main.processing.string_processing import pad_num
 from os import getcwd, pardir
 from os.path import abspath, basename, exists, isdir, join
@@ -37,7 +37,7 @@ def set_sequence_from_indexes(dvk_handler:DvkHandler=None,
         for i in range(0, len(dvks)):
             dvk_handler.set_dvk(dvks[i], indexes[i])
 
-def set_sequence(dvks:List[Dvk], seq_title:str=None) -> List[Dvk]:
+def set_sequence(dvks:List[Dvk], seq_title:str=None, write:bool=True) -> List[Dvk]:
     """
     Sets a group of Dvks as a sequence.
 
@@ -45,6 +45,8 @@ def set_sequence(dvks:List[Dvk], seq_title:str=None) -> List[Dvk]:
     :type dvks: list[Dvk] optional
     :param seq_title: Sequence title for Dvk if desired, defaults to None
     :type seq_title: str, optional
+    :param write: Whether to write the Dvks to their DVK files, defaults to True
+    :type write: bool, optional
     :return: List of Dvks wit sequence data added
     :rtype: List[Dvk]
     """
@@ -80,9 +82,10 @@ def set_sequence(dvks:List[Dvk], seq_title:str=None) -> List[Dvk]:
         edit_dvk.set_sequence_number(0)
         if total > 1:
             edit_dvk.set_sequence_number(i + 1)
-        # Write Dvk and update the DvkHandler
-        edit_dvk.write_dvk()
         sequenced[i] = edit_dvk
+    # Write all the Dvks
+    if write:
+        write_dvks(sequenced)
     return sequenced
 
 def get_sequence(dvk_handler:DvkHandler=None, index:int=None) -> List[int]:
@@ -146,43 +149,39 @@ def get_default_sequence_order(dvk_handler:DvkHandler=None, respect_seq:bool=Tru
         return []
     # Sort Dvks
     dvk_handler.sort_dvks("a")
-    # Get list of parent directories
+    # Group Dvk indexes by parent directory
+    groups = dict()
     size = dvk_handler.get_size()
-    parents = []
     for i in range(0, size):
-        parent = abspath(join(dvk_handler.get_dvk(i).get_dvk_file(), pardir))
-        parents.append(str(parent))
-    # Get list of unique parent directories
-    directories = []
-    directories.extend(parents)
-    directories = clean_list(directories)
-    comparator = cmp_to_key(compare_alphanum)
-    directories = sorted(directories, key=comparator)
+        parent = str(abspath(join(dvk_handler.get_dvk(i).get_dvk_file(), pardir)))
+        if not parent in groups:
+            groups[parent] = []
+        groups[parent].append(i)
     # Add Dvks by directory
     indexes = []
-    for directory in directories:
-        for i in range(0, size):
-            # Add Dvk if in the right directory
-            if directory == parents[i]:
-                indexes.append(i)
+    for directory in sorted(groups, key=AlphanumKey):
+        indexes.extend(groups[directory])
     # Get sequence order, if specified
     if respect_seq:
-        new_indexes = []
-        while len(indexes) > 0:
-            # Add sequence to indexes
-            seq = get_sequence(dvk_handler, indexes[0])
+        graph = SequenceGraph(dvk_handler)
+        sequences = []
+        singles = []
+        done = set()
+        for index in indexes:
+            # Skip Dvks already added as part of a sequence
+            if index in done:
+                continue
+            seq = graph.get_sequence(index)
+            done.update(seq)
+            # Sequences are added before all the Dvks found so far
             if len(seq) > 1:
-                seq.extend(new_indexes)
-                new_indexes = []
-            new_indexes.extend(seq)
-            # Remove sequence from existing indexes
-            for index in seq:
-                try:
-                    del_num = indexes.index(index)
-                    del indexes[del_num]
-                except ValueError:
-                    continue
-        indexes = new_indexes
+                sequences.append(seq)
+            else:
+                singles.extend(seq)
+        indexes = []
+        for seq in reversed(sequences):
+            indexes.extend(seq)
+        indexes.extend(singles)
     # Convert Indexes to List of Dvks
     dvks = []
     for index in indexes:
@@ -190,12 +189,14 @@ def get_default_sequence_order(dvk_handler:DvkHandler=None, respect_seq:bool=Tru
     # Return list of Dvks
     return dvks  
 
-def remove_sequence_info(dvks:List[Dvk]=None) -> List[Dvk]:
+def remove_sequence_info(dvks:List[Dvk]=None, write:bool=True) -> List[Dvk]:
     """
     Removes all sequence information from a given list of Dvks.
 
     :param dvks: List of Dvk to remove sequence info from, defaults to None
     :type dvks: List[Dvk], optional
+    :param write: Whether to write the Dvks to their DVK files, defaults to True
+    :type write: bool, optional
     :return: Given list of Dvks with all the sequence data removed
     :rtype: List[Dvk]
     """
@@ -210,7 +211,9 @@ def remove_sequence_info(dvks:List[Dvk]=None) -> List[Dvk]:
             removed[i].set_sequence_total()
             removed[i].set_sequence_title()
             removed[i].set_section_title()
-            removed[i].write_dvk()
+        # Write all the Dvks
+        if write:
+            write_dvks(removed)
         return removed
     except (AttributeError, TypeError):
         return []
@@ -263,17 +266,23 @@ def separate_into_sections(dvk_handler:DvkHandler=None, respect_seq:bool=True, k
     # Return section groups
     return sections
 
-def user_create_standalone(directory:str=None) -> bool:
+def user_create_standalone(directory:str=None, workers:int=1, use_catalog:bool=False, use_processes:bool=False) -> bool:
     """
     Allows the user to set all the DVKs from a given directory as standalone media.
 
     :param directory: Directory in which to create the Dvk sequence, defaults to None
     :type directory: str, optional
+    :param workers: Number of workers used to read DVK files, defaults to 1
+    :type workers: int, optional
+    :param use_catalog: Whether to use a catalog to skip unchanged DVK files, defaults to False
+    :type use_catalog: bool, optional
+    :param use_processes: Whether to read DVK files with processes rather than threads, defaults to False
+    :type use_processes: bool, optional
     :return: Whether or not writing standalone sequence info was successful
     :rtype: bool
     """
     # Get Dvks and sort them alphabetimally
-    dvk_handler = DvkHandler(directory)
+    dvk_handler = DvkHandler(directory, workers, use_processes, use_catalog)
     dvk_handler.sort_dvks("a")
     # Print List of Dvks
     size = dvk_handler.get_size()
@@ -285,20 +294,23 @@ def user_create_standalone(directory:str=None) -> bool:
     # Add single sequence info if requested
     if response == "Y":
         print("Setting sequence info:")
+        dvks = []
         for i in tqdm(range(0, size)):
             # Remove existing sequenc info from the Dvk
             dvk = dvk_handler.get_dvk(i)
-            dvks = remove_sequence_info([dvk])
+            remove_sequence_info([dvk], False)
             # Set Dvk as a standalone media file
-            dvks = set_sequence(dvks)
-            # Rename file
-            parent = abspath(join(abspath(dvk.get_dvk_file()), pardir))
-            dvk.rename_files(dvk.get_filename(parent, False), dvk.get_filename(parent, True))
+            set_sequence([dvk], write=False)
+            dvks.append(dvk)
+        # Write and rename all the Dvks at once
+        if not write_dvks(dvks, True, workers):
+            color_print("Failed to write sequence data, no files were changed.", "r")
+            return False
         color_print("Finished writing sequence data!", "g")
         return True
     return False
 
-def user_create_sequence(directory:str=None, respect_seq:bool=True, keep_sections:bool=True) -> bool:
+def user_create_sequence(directory:str=None, respect_seq:bool=True, keep_sections:bool=True, workers:int=1, use_catalog:bool=False, use_processes:bool=False) -> bool:
     """
     Allows the user to create a sequence out of the Dvks from a given directory.
 
@@ -308,11 +320,17 @@ def user_create_sequence(directory:str=None, respect_seq:bool=True, keep_section
     :type respect_seq: bool, optional
     :param keep_existing: Whether to keep existing section titles, defaults to True
     :type keep_sections:bool, optional
+    :param workers: Number of workers used to read DVK files, defaults to 1
+    :type workers: int, optional
+    :param use_catalog: Whether to use a catalog to skip unchanged DVK files, defaults to False
+    :type use_catalog: bool, optional
+    :param use_processes: Whether to read DVK files with processes rather than threads, defaults to False
+    :type use_processes: bool, optional
     :return: Whether or not creating the sequence was successful
     :rtype: bool
     """
     # Get Dvks separated into sections based on directory
-    dvk_handler = DvkHandler(directory)
+    dvk_handler = DvkHandler(directory, workers, use_processes, use_catalog)
     sections = separate_into_sections(dvk_handler, respect_seq, keep_sections)
     # Return False if no sections were found
     if len(sections) == 0:
@@ -355,11 +373,11 @@ def user_create_sequence(directory:str=None, respect_seq:bool=True, keep_section
                 group[i].set_section_title(section_titles[sec_num])
         dvks.extend(group)
     # Set sequence
-    dvks = set_sequence(dvks, seq_title)
-    # Renmame files
-    for dvk in dvks:
-        parent = abspath(join(abspath(dvk.get_dvk_file()), pardir))
-        dvk.rename_files(dvk.get_filename(parent, False), dvk.get_filename(parent, True))
+    dvks = set_sequence(dvks, seq_title, False)
+    # Write and rename all the Dvks at once
+    if not write_dvks(dvks, True, workers):
+        color_print("Failed to write sequence, no files were changed.", "r")
+        return False
     color_print("Finished writing sequence!", "g")
     return True
 
@@ -389,6 +407,22 @@ def main():
                 "--ignore",
                 help="Whether to ignore existing sequence info.",
                 action="store_true")
+    parser.add_argument(
+                "-w",
+                "--workers",
+                help="Number of workers used to read DVK files.",
+                type=int,
+                default=1)
+    parser.add_argument(
+                "-P",
+                "--processes",
+                help="Reads DVK files with worker processes instead of threads.",
+                action="store_true")
+    parser.add_argument(
+                "-c",
+                "--catalog",
+                help="Uses a catalog file to skip reading unchanged DVK files.",
+                action="store_true")
     args = parser.parse_args()
     full_directory = abspath(args.directory)
     # Check if directory exists
@@ -396,9 +430,9 @@ def main():
                 and exists(full_directory)
                 and isdir(full_directory)):
         if not args.standalone:
-            user_create_sequence(full_directory, not args.ignore, not args.overwrite)
+            user_create_sequence(full_directory, not args.ignore, not args.overwrite, args.workers, args.catalog, use_processes=args.processes)
         else:
-            user_create_standalone(full_directory)
+            user_create_standalone(full_directory, args.workers, args.catalog, use_processes=args.processes)
     else:
         color_print("Invalid directory", "r")
 
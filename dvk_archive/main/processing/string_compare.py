@@ -119,3 +119,74 @@ def compare_alphanum(str1:str=None, str2:str=None):
         end2 = end2[len(section2):]
         result = compare_sections(section1, section2)
     return result
+
+class AlphanumKey:
+    """
+    Sort key that orders strings the same way as compare_alphanum.
+    Strings are split into a tuple of sections once when the key is created,
+    so comparing keys is a plain tuple comparison.
+    Unlike compare_alphanum, numbers of any length are compared by value,
+    keeping the order consistent when long and short numbers are mixed.
+    Invalid strings are sorted as empty strings.
+    """
+
+    __slots__ = ("key",)
+
+    def __init__(self, input_str:str=None):
+        """
+        Initializes the AlphanumKey object by splitting a string into sections.
+
+        :param input_str: String to create a sort key for, defaults to None
+        :type input_str: str, optional
+        """
+        sections = []
+        end = input_str
+        if end is None:
+            end = ""
+        while not end == "":
+            section = get_section(end)
+            if section == "":
+                section = end
+            end = end[len(section):]
+            # Numbers are compared by value, and placed between text
+            # starting with punctuation and text starting with letters
+            if is_number_string(section):
+                sections.append((1, float(section.replace(",", "."))))
+            elif section < "0":
+                sections.append((0, section.upper()))
+            else:
+                sections.append((2, section.upper()))
+        self.key = tuple(sections)
+
+    def compare(self, other) -> int:
+        """
+        Compares this sort key to another AlphanumKey.
+
+        :param other: AlphanumKey to compare to
+        :type other: AlphanumKey
+        :return: Which key should come first
+        :rtype: int
+        """
+        if self.key < other.key:
+            return -1
+        if self.key > other.key:
+            return 1
+        return 0
+
+    def __lt__(self, other) -> bool:
+        return self.key < other.key
+
+    def __le__(self, other) -> bool:
+        return self.key <= other.key
+
+    def __gt__(self, other) -> bool:
+        return self.key > other.key
+
+    def __ge__(self, other) -> bool:
+        return self.key >= other.key
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, AlphanumKey) and self.key == other.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
@@ -2,19 +2,160 @@
 
 from binascii import a2b_base64
 from binascii import Error as BinError
-from bs4 import BeautifulSoup
 from dvk_archive.main.color_print import color_print
+from dvk_archive.main.file.atomic_write import PART_EXTENSION, PART_INFO_EXTENSION
 from dvk_archive.main.processing.string_processing import pad_num
-from io import BytesIO
-from json import loads
-from os.path import abspath, exists
+from dvk_archive.main.web.http_cache import HttpCache
+from dvk_archive.main.web.http_cache import get_conditional_headers
+from dvk_archive.main.web.request_scheduler import RequestScheduler
+from dvk_archive.main.web.request_scheduler import get_host
+from json import dumps, loads
+from os import remove, replace
+from os.path import abspath, exists, getsize
 from re import findall
 from requests import exceptions
 from requests import Response
 from requests import Session
-from shutil import copyfileobj
+from requests.adapters import HTTPAdapter
+from threading import BoundedSemaphore, Lock
+from typing import Callable, TYPE_CHECKING
 from urllib.error import HTTPError
 
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+# Sessions are shared for each host so connections can be reused
+CONNECTIONS = {"per_host":4}
+SESSIONS = dict()
+HOST_LIMITS = dict()
+SESSIONS_LOCK = Lock()
+# Scheduler shared by all requests for rate limiting and retries
+SCHEDULER = {"scheduler":RequestScheduler()}
+# Optional cache for revalidating pages with conditional requests
+CACHE = {"cache":None}
+CACHE_LOCK = Lock()
+
+def get_scheduler() -> RequestScheduler:
+    """
+    Returns the RequestScheduler used for all requests.
+
+    :return: Shared RequestScheduler
+    :rtype: RequestScheduler
+    """
+    return SCHEDULER["scheduler"]
+
+def set_scheduler(scheduler:RequestScheduler=None):
+    """
+    Sets the RequestScheduler used for all requests.
+    Uses a default RequestScheduler if None is given.
+
+    :param scheduler: RequestScheduler to use, defaults to None
+    :type scheduler: RequestScheduler, optional
+    """
+    if scheduler is None:
+        scheduler = RequestScheduler()
+    SCHEDULER["scheduler"] = scheduler
+
+def get_cache(create:bool=False) -> HttpCache:
+    """
+    Returns the HttpCache used for requests, or None if caching is disabled.
+
+    :param create: Whether to open a cache in the default cache directory if none is set, defaults to False
+    :type create: bool, optional
+    :return: Shared HttpCache
+    :rtype: HttpCache
+    """
+    if create and CACHE["cache"] is None:
+        with CACHE_LOCK:
+            if CACHE["cache"] is None:
+                CACHE["cache"] = HttpCache()
+    return CACHE["cache"]
+
+def set_cache(cache:HttpCache=None):
+    """
+    Sets the HttpCache used for requests.
+    Once set, basic_connect, bs_connect, and json_connect always use the cache.
+    Disables caching if None is given.
+
+    :param cache: HttpCache to use, defaults to None
+    :type cache: HttpCache, optional
+    """
+    CACHE["cache"] = cache
+
+def set_connection_limit(per_host:int=4):
+    """
+    Sets the maximum number of simultaneous connections to any one host.
+    Closes all existing sessions so the new limit is used.
+
+    :param per_host: Maximum connections per host, defaults to 4
+    :type per_host: int, optional
+    """
+    close_sessions()
+    CONNECTIONS["per_host"] = 1
+    if per_host is not None and per_host > 1:
+        CONNECTIONS["per_host"] = per_host
+
+def get_session(url:str=None) -> Session:
+    """
+    Returns the shared Session used for connecting to the host of a URL.
+
+    :param url: URL that will be connected to, defaults to None
+    :type url: str, optional
+    :return: Session for the URL's host
+    :rtype: Session
+    """
+    host = get_host(url)
+    with SESSIONS_LOCK:
+        if not host in SESSIONS:
+            # Keep as many connections open as can be used at once
+            # Streamed responses hold their connection, so wait for one to be free
+            session = Session()
+            adapter = HTTPAdapter(pool_connections=1,
+                        pool_maxsize=CONNECTIONS["per_host"], pool_block=True)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            SESSIONS[host] = session
+            HOST_LIMITS[host] = BoundedSemaphore(CONNECTIONS["per_host"])
+        return SESSIONS[host]
+
+def get_host_limit(url:str=None) -> BoundedSemaphore:
+    """
+    Returns the semaphore limiting simultaneous connections to the host of a URL.
+
+    :param url: URL that will be connected to, defaults to None
+    :type url: str, optional
+    :return: Semaphore for the URL's host
+    :rtype: BoundedSemaphore
+    """
+    get_session(url)
+    with SESSIONS_LOCK:
+        return HOST_LIMITS[get_host(url)]
+
+def limit_request(url:str=None, request:Callable=None) -> Response:
+    """
+    Sends a request while holding the semaphore for the host of its URL.
+    The semaphore is released once the request returns, not while waiting to retry.
+
+    :param url: URL being requested, defaults to None
+    :type url: str, optional
+    :param request: Function that sends the request and returns a Response, defaults to None
+    :type request: Callable, optional
+    :return: Response of the request
+    :rtype: Response
+    """
+    with get_host_limit(url):
+        return request()
+
+def close_sessions():
+    """
+    Closes all shared sessions and their connections.
+    """
+    with SESSIONS_LOCK:
+        for host in SESSIONS:
+            SESSIONS[host].close()
+        SESSIONS.clear()
+        HOST_LIMITS.clear()
+
 def get_default_headers() -> dict:
     """
     Return headers to use when making a URL connection.
@@ -26,39 +167,94 @@ def get_default_headers() -> dict:
         "en-US,en;q=0.5"}
     return headers
 
-def get_direct_response(url:str=None, headers:dict=None, data:dict=None) -> Response:
+def get_cached_response(response:Response=None, entry:dict=None) -> Response:
+    """
+    Returns a Response containing a cached body, for a request the server said was unchanged.
+
+    :param response: 304 Not Modified response from the server, defaults to None
+    :type response: Response, optional
+    :param entry: Stored response from HttpCache.get_entry, defaults to None
+    :type entry: dict, optional
+    :return: Response with the cached body
+    :rtype: Response
+    """
+    cached = Response()
+    cached.status_code = 200
+    cached._content = entry["body"]
+    cached.encoding = entry["encoding"]
+    cached.headers = response.headers
+    cached.url = response.url
+    cached.request = response.request
+    response.close()
+    return cached
+
+def get_direct_response(url:str=None,
+                headers:dict=None,
+                data:dict=None,
+                use_cache:bool=False) -> Response:
     """
     Sends an HTTP request and returns the exact HTTP response.
+    If use_cache is True, cached responses are revalidated with a conditional request
+    and returned from the cache if unchanged. The default HttpCache is opened if none is set.
 
     :param url: URL to retrieve, defaults to None
     :type url: str, optional
-    :param encoding: Text encoding to use, defaults to "utf-8"
-    :type encoding: str, optional
+    :param headers: Headers to send with the request, defaults to None
+    :type headers: dict, optional
     :param data: Request payload for post requests, defaults to None
     :type data: str, optional
+    :param use_cache: Whether to use the HttpCache, defaults to False
+    :type use_cache: bool, optional
     :return: HTTP response
     :rtype: Response
     """
     # Return None if URL is invalid
     if url is None or url == "":
         return None
-    session = Session()
+    session = get_session(url)
+    # Ask only for changes if the response is cached
+    cache = None
+    entry = None
+    if use_cache:
+        cache = get_cache(True)
+        entry = cache.get_entry(url, data)
+        if headers is None:
+            headers = dict()
+        headers = dict(headers)
+        headers.update(cache.get_validators(entry))
     try:
         # Send request
         if data is None:
             # Send GET request if there is no POST data
-            response = session.get(url, headers=headers)
+            response = get_scheduler().send(url,
+                        lambda: limit_request(url,
+                                    lambda: session.get(url, headers=headers)))
         else:
             # Send POST request if POST data is provided
-            response = session.post(url, data=data)
+            response = get_scheduler().send(url,
+                        lambda: limit_request(url,
+                                    lambda: session.post(url, data=data,
+                                                headers=get_conditional_headers(headers))),
+                        False)
+        if cache is not None:
+            # Use the cached response if it hasn't changed
+            if entry is not None and response.status_code == 304:
+                cache.touch(url, data)
+                return get_cached_response(response, entry)
+            cache.store(url, data, response)
         return response
     except:
         return None
     return None
 
-def basic_connect(url:str=None, encoding:str="utf-8", data:dict=None) -> str:
+def basic_connect(url:str=None,
+                encoding:str="utf-8",
+                data:dict=None,
+                use_cache:bool=False) -> str:
     """
     Connects to a URL and returns the HTML source.
+    If use_cache is True or a cache is set with set_cache, cached pages are
+    revalidated with a conditional request and only downloaded again if changed.
     Doesn't work with JavaScript
 
     :param url: URL to retrieve, defaults to None
@@ -67,6 +263,8 @@ def basic_connect(url:str=None, encoding:str="utf-8", data:dict=None) -> str:
     :type encoding: str, optional
     :param data: Request payload for post requests, defaults to None
     :type data: str, optional
+    :param use_cache: Whether to use the HttpCache, defaults to False
+    :type use_cache: bool, optional
     :return: HTML source
     :rtype: str
     """
@@ -74,18 +272,22 @@ def basic_connect(url:str=None, encoding:str="utf-8", data:dict=None) -> str:
     if url is None or url == "":
         return None
     try:
-        # Get request
-        response = get_direct_response(url, get_default_headers(), data)
+        # Get request, asking only for changes if the page is cached
+        use_cache = use_cache or get_cache() is not None
+        response = get_direct_response(url, get_default_headers(), data, use_cache)
         # Set encoding
-        if encoding is None:
-            response.encoding = request.apparent_encoding
-        else:
+        if encoding is not None:
             response.encoding = encoding
+        elif response.encoding is None:
+            response.encoding = response.apparent_encoding
         return response.text
     except:
         return None
 
-def bs_connect(url:str=None, encoding:str="utf-8", data:dict=None) -> BeautifulSoup:
+def bs_connect(url:str=None,
+                encoding:str="utf-8",
+                data:dict=None,
+                use_cache:bool=False) -> "BeautifulSoup":
     """
     Connects to a URL and returns a BeautifulSoup object.
     Doesn't work with JavaScript
@@ -96,15 +298,22 @@ def bs_connect(url:str=None, encoding:str="utf-8", data:dict=None) -> BeautifulS
     :type encoding: str, optional
     :param data: Request payload for post requests, defaults to None
     :type data: str, optional
+    :param use_cache: Whether to use the HttpCache, defaults to False
+    :type use_cache: bool, optional
     :return: BeautifulSoup object of the URL page
     :rtype: str
     """
-    html = basic_connect(url, encoding, data)
+    # Import here so bs4 and lxml are only loaded when parsing pages
+    from bs4 import BeautifulSoup
+    html = basic_connect(url, encoding, data, use_cache)
     if html is None or html == "":
         return None
     return BeautifulSoup(html, features="lxml")
 
-def json_connect(url:str=None, encoding:str="utf-8", data:dict=None) -> dict:
+def json_connect(url:str=None,
+                encoding:str="utf-8",
+                data:dict=None,
+                use_cache:bool=False) -> dict:
     """
     Connects to a URL and returns a dict with JSON data.
 
@@ -114,10 +323,12 @@ def json_connect(url:str=None, encoding:str="utf-8", data:dict=None) -> dict:
     :type encoding: str, optional
     :param data: Request payload for post requests, defaults to None
     :type data: str, optional
+    :param use_cache: Whether to use the HttpCache, defaults to False
+    :type use_cache: bool, optional
     :return: Dictionary with JSON data
     :rtype: dict
     """
-    html = basic_connect(url, encoding, data)
+    html = basic_connect(url, encoding, data, use_cache)
     # Return None if returned data is None or invalid
     if html is None or html == "":
         return None
@@ -157,41 +368,208 @@ def convert_data_uri(data_uri:str=None, filepath:str=None) -> str:
     except (BinError, FileNotFoundError, TypeError):
         return ""
 
-def download(url:str=None, file_path:str=None) -> dict:
+def get_part_file(file_path:str=None) -> str:
+    """
+    Returns the file used to hold a partially downloaded file.
+
+    :param file_path: Path of the file being downloaded, defaults to None
+    :type file_path: str, optional
+    :return: Path of the partial file
+    :rtype: str
+    """
+    if file_path is None:
+        return None
+    return abspath(file_path) + PART_EXTENSION
+
+def get_part_info_file(file_path:str=None) -> str:
+    """
+    Returns the file storing how to resume downloading a partial file.
+
+    :param file_path: Path of the file being downloaded, defaults to None
+    :type file_path: str, optional
+    :return: Path of the partial file info
+    :rtype: str
+    """
+    if file_path is None:
+        return None
+    return abspath(file_path) + PART_INFO_EXTENSION
+
+def read_part_info(file_path:str=None) -> dict:
+    """
+    Returns the URL, ETag, and Last-Modified headers stored for a partial download.
+
+    :param file_path: Path of the file being downloaded, defaults to None
+    :type file_path: str, optional
+    :return: Dict with "url", "etag", and "modified" keys, or None if there is no valid info
+    :rtype: dict
+    """
+    try:
+        with open(get_part_info_file(file_path), "rb") as in_file:
+            info = loads(in_file.read())
+        if not isinstance(info, dict) or not "url" in info:
+            return None
+        return info
+    except (OSError, TypeError, ValueError):
+        return None
+
+def remove_part(file_path:str=None):
+    """
+    Removes the partial file and partial file info for a download.
+
+    :param file_path: Path of the file being downloaded, defaults to None
+    :type file_path: str, optional
+    """
+    for file in [get_part_file(file_path), get_part_info_file(file_path)]:
+        try:
+            if file is not None and exists(file):
+                remove(file)
+        except OSError:
+            pass
+
+def download(url:str=None,
+                file_path:str=None,
+                chunk_size:int=65536,
+                resume:bool=True,
+                use_cache:bool=False) -> dict:
     """
     Downloads a file from given URL to given file.
+    The response is streamed to a partial file in chunks,
+    which replaces the given file once the download is complete.
+    If resume is True and the server gives an ETag or Last-Modified header,
+    the partial file is kept when a download fails so the next attempt can
+    continue from where it stopped using a Range request.
+    Only complete chunks are written, so an interrupted chunk is downloaded again.
+    If use_cache is True, files small enough to fit in the HttpCache are stored,
+    and are written from the cache if the server says they haven't changed.
 
     :param url: Given URL, defaults to None
     :type url: str, optional
     :param file_path: Given file path, defaults to None
     :type file_path: str, optional
+    :param chunk_size: Number of bytes to read from the response at a time, defaults to 65536
+    :type chunk_size: int, optional
+    :param resume: Whether to resume and keep partial downloads, defaults to True
+    :type resume: bool, optional
+    :param use_cache: Whether to use the HttpCache, defaults to False
+    :type use_cache: bool, optional
     :return: Headers retrieved from the given media URL
     :rtype: dict
     """
-    try:
-        file = abspath(file_path)
-        # Convert URI if it is a data URI
-        if url.startswith("data:"):
-            convert_data_uri(url, file_path)
-            return dict()
-        # Try downloading normally
-        session = Session()
-        headers = get_default_headers()
-        response = session.get(url, headers=headers)
-        byte_obj = BytesIO(response.content)
-        byte_obj.seek(0)
-        with open(file, "wb") as f:
-            copyfileobj(byte_obj, f)
-        return response.headers
-    except (AttributeError,
-                HTTPError,
-                exceptions.ConnectionError,
-                exceptions.MissingSchema,
-                ConnectionResetError,
-                TypeError):
-        if url is not None:
-            color_print("Failed to download:" + url, "r")
-    return dict()
+    scheduler = get_scheduler()
+    attempt = 0
+    while True:
+        keep_part = False
+        streaming = False
+        try:
+            file = abspath(file_path)
+            # Convert URI if it is a data URI
+            if url.startswith("data:"):
+                convert_data_uri(url, file_path)
+                return dict()
+            # Get where to resume downloading, if possible
+            part_file = get_part_file(file)
+            headers = get_default_headers()
+            start = 0
+            info = None
+            if resume:
+                info = read_part_info(file)
+            if info is not None and info["url"] == url and exists(part_file):
+                validator = info.get("etag")
+                if validator is None:
+                    validator = info.get("modified")
+                if validator is not None:
+                    start = getsize(part_file)
+                    headers["Range"] = "bytes=" + str(start) + "-"
+                    headers["If-Range"] = validator
+            if start == 0:
+                remove_part(file)
+            keep_part = start > 0
+            # Ask only for changes if the file is cached and not being resumed
+            cache = None
+            entry = None
+            if use_cache:
+                cache = get_cache(True)
+                if start == 0:
+                    entry = cache.get_entry(url)
+                    headers.update(cache.get_validators(entry))
+            # Try downloading normally
+            session = get_session(url)
+            response = scheduler.send(url,
+                        lambda: limit_request(url,
+                                    lambda: session.get(url, headers=headers, stream=True)))
+            with response:
+                # Start over if the partial file can't be resumed
+                if start > 0 and response.status_code == 416:
+                    remove_part(file)
+                    continue
+                content_range = response.headers.get("Content-Range", "")
+                if response.status_code == 206:
+                    if start > 0 and content_range.startswith("bytes " + str(start) + "-"):
+                        mode = "ab"
+                    elif start > 0:
+                        # Start over if the server sent a different part of the file
+                        remove_part(file)
+                        continue
+                    else:
+                        raise exceptions.RequestException("Unexpected partial content")
+                elif response.status_code == 200:
+                    mode = "wb"
+                elif response.status_code == 304 and entry is not None:
+                    mode = None
+                else:
+                    raise exceptions.HTTPError("Status " + str(response.status_code))
+                if mode is None:
+                    # Write the cached file if it hasn't changed
+                    cache.touch(url)
+                    with open(part_file, "wb") as f:
+                        f.write(entry["body"])
+                else:
+                    if mode == "wb" and resume:
+                        # Store info for resuming the download if the server supports it
+                        remove_part(file)
+                        etag = response.headers.get("ETag")
+                        modified = response.headers.get("Last-Modified")
+                        if (response.headers.get("Accept-Ranges") == "bytes"
+                                    and (etag is not None or modified is not None)):
+                            info = {"url":url, "etag":etag, "modified":modified}
+                            with open(get_part_info_file(file), "w") as out_file:
+                                out_file.write(dumps(info))
+                    keep_part = resume and exists(get_part_info_file(file))
+                    # Write the response to the partial file as it is received
+                    streaming = True
+                    with open(part_file, mode) as f:
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            f.write(chunk)
+            # Replace the given file once the download is complete
+            replace(part_file, file)
+            remove_part(file)
+            # Store the downloaded file so it can be revalidated later
+            if cache is not None and mode is not None:
+                if getsize(file) <= cache.max_size:
+                    with open(file, "rb") as in_file:
+                        cache.store(url, None, response, in_file.read())
+                else:
+                    cache.remove(url)
+            return response.headers
+        except (AttributeError,
+                    HTTPError,
+                    exceptions.RequestException,
+                    OSError,
+                    TypeError) as error:
+            # Remove any partially downloaded file that can't be resumed
+            if not keep_part:
+                remove_part(file_path)
+            # Try again if the connection was lost while downloading
+            if (streaming and attempt < scheduler.retries
+                        and isinstance(error, (exceptions.ChunkedEncodingError,
+                                    exceptions.ConnectionError,
+                                    exceptions.Timeout))):
+                scheduler.wait_to_retry(url, attempt)
+                attempt += 1
+                continue
+            if url is not None:
+                color_print("Failed to download:" + url, "r")
+        return dict()
 
 def get_last_modified(headers:dict=None) -> str:
     """
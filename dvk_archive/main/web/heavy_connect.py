@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
 
 from bs4 import BeautifulSoup
+from dvk_archive.main.color_print import color_print
+from concurrent.futures import ThreadPoolExecutor
 from dvk_archive.main.processing.string_processing import get_url_directory
 from json import loads
-from os import listdir, mkdir, remove
-from os.path import abspath, exists, join
+from os import listdir, makedirs, mkdir, remove
+from os.path import abspath, exists, getsize, isdir, islink, join
+from queue import Queue
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
 from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.firefox.options import Options as FO
@@ -13,8 +17,8 @@ from selenium.webdriver import Firefox
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 from shutil import move, rmtree
-from tempfile import gettempdir
-from time import sleep
+from tempfile import gettempdir, mkdtemp
+from time import monotonic, sleep
 from traceback import print_exc
 
 def print_driver_instructions():
@@ -32,14 +36,75 @@ def print_driver_instructions():
     print("(On Windows, find PATH with command \"echo %PATH%\" )")
     print("(On Mac/Linux, find PATH with command \"echo $PATH\" )")
 
+def wait_for_download(directory:str=None,
+                timeout:float=10,
+                interval:float=0.1,
+                stable_time:float=0.5) -> str:
+    """
+    Waits for a download in the given directory to finish and returns the downloaded file.
+    The download is finished once it is the only file in the directory,
+    it isn't a partial (.part) file, and its size has stopped changing.
+
+    :param directory: Directory the file is being downloaded to, defaults to None
+    :type directory: str, optional
+    :param timeout: Maximum seconds to wait, defaults to 10
+    :type timeout: float, optional
+    :param interval: Seconds between checking the directory, defaults to 0.1
+    :type interval: float, optional
+    :param stable_time: Seconds the file size must stay the same, defaults to 0.5
+    :type stable_time: float, optional
+    :return: Path of the downloaded file, or None if the download didn't finish
+    :rtype: str
+    """
+    if directory is None:
+        return None
+    end = monotonic() + timeout
+    last = None
+    stable_since = 0
+    while True:
+        try:
+            files = listdir(directory)
+            # Firefox writes to a .part file until the download is complete
+            if len(files) == 1 and not files[0].endswith(".part"):
+                file = abspath(join(directory, files[0]))
+                current = [file, getsize(file)]
+                if not current == last:
+                    last = current
+                    stable_since = monotonic()
+                elif monotonic() - stable_since >= stable_time:
+                    return file
+            else:
+                last = None
+        except OSError:
+            last = None
+        if monotonic() >= end:
+            return None
+        sleep(interval)
+
 class HeavyConnect:
 
     def __init__(self, headless:bool=True):
         """
         Initialize the HeavyConnect class.
+        Each HeavyConnect object downloads to its own directory,
+        so several can be used at the same time.
         """
+        self.driver = None
+        self.download_dir = None
         self.initialize_driver(headless)
 
+    def __enter__(self):
+        """
+        Returns the HeavyConnect object for use in a with statement.
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Closes the driver when leaving a with statement.
+        """
+        self.close_driver()
+
     def initialize_driver(self, headless:bool=True):
         """
         Starts the Selenium driver.
@@ -51,8 +116,13 @@ class HeavyConnect:
             # Set up temporary directory
             self.tempdir = abspath(gettempdir())
             self.tempdir = abspath(join(self.tempdir, "dvk_connection"))
-            if not exists(self.tempdir):
-                mkdir(self.tempdir)
+            makedirs(self.tempdir, exist_ok=True)
+            # Create a download directory only used by this object
+            self.download_dir = abspath(mkdtemp(prefix="dvk_downloads_", dir=self.tempdir))
+        except OSError:
+            self.driver = None
+            return
+        try:
             # Create Firefox driver
             options = FO()
             options.headless = headless
@@ -69,19 +139,33 @@ class HeavyConnect:
             # Prints instructions for getting Selenium driver
             self.driver = None
             print_driver_instructions()
+        finally:
+            # Remove the download directory if the driver didn't start
+            if self.driver is None:
+                rmtree(self.download_dir, ignore_errors=True)
+                self.download_dir = None
 
     def get_download_dir(self) -> str:
         """
-        Creates and returns a directory for storing downloaded files.
+        Empties and returns the directory for storing this object's downloaded files.
+        The browser's download directory is set when the driver starts,
+        so the same directory is cleared for each download.
+        Only the contents are removed, so the directory keeps its private permissions.
 
         :return: File path of the download directory
         :rtype: str
         """
-        ddir = abspath(join(self.tempdir, "dvk_downloads"))
-        if exists(ddir):
-            rmtree(ddir)
-        mkdir(ddir)
-        return ddir
+        if self.download_dir is None:
+            return None
+        if not exists(self.download_dir):
+            mkdir(self.download_dir, 0o700)
+        for filename in listdir(self.download_dir):
+            path = join(self.download_dir, filename)
+            if isdir(path) and not islink(path):
+                rmtree(path)
+            else:
+                remove(path)
+        return self.download_dir
 
     def get_page(self,
                     url:str=None,
@@ -117,14 +201,32 @@ class HeavyConnect:
             if element is not None and not element == "":
                 WebDriverWait(self.driver, timeout).until(
                      EC.presence_of_all_elements_located((By.XPATH, element)))
-            else:
-                sleep(timeout)
+            elif not self.wait_for_ready(timeout):
+                return None
             bs = BeautifulSoup(self.driver.page_source, "lxml")
             return bs
         except:
             return None
         return None
 
+    def wait_for_ready(self, timeout:int=20) -> bool:
+        """
+        Waits until the current page has finished loading.
+
+        :param timeout: Seconds before timeout, defaults to 20
+        :type timeout: int, optional
+        :return: Whether the page finished loading before timing out
+        :rtype: bool
+        """
+        if self.driver is None:
+            return False
+        try:
+            WebDriverWait(self.driver, timeout).until(
+                     lambda driver: driver.execute_script("return document.readyState") == "complete")
+            return True
+        except (TimeoutException, WebDriverException):
+            return False
+
     def get_json(self, url:str=None) -> dict:
         """
         Returns a dict containing JSON info from a given JSON URL.
@@ -155,11 +257,16 @@ class HeavyConnect:
 
     def close_driver(self):
         """
-        Closes the Selenium driver if possible.
+        Closes the Selenium driver if possible and removes the download directory.
         """
-        # Close the Selenium driver
+        # Quit the Selenium driver, ending the browser and geckodriver processes
         if self.driver is not None:
-            self.driver.close()
+            self.driver.quit()
+            self.driver = None
+        # Remove the download directory
+        if self.download_dir is not None:
+            rmtree(self.download_dir, ignore_errors=True)
+            self.download_dir = None
         # Try getting and deleting geckodriver log.
         log_file = abspath("geckodriver.log")
         if exists(log_file):
@@ -182,6 +289,7 @@ class HeavyConnect:
             assert file_path is not None
             # Get download directory
             directory = self.get_download_dir()
+            assert directory is not None
             bs = self.get_page(url, "//img")
             new_url = str(bs.find("img")["src"])
             # Download file to temporary download directory
@@ -190,24 +298,151 @@ class HeavyConnect:
                          + "link.download = \"blah\";"\
                          + "document.body.appendChild(link);link.click();"
             self.driver.execute_script(js_command)
-            # Wait until file starts downloading or times out
-            sec = 0
-            while sec < 10 and len(listdir(directory)) == 0:
-                sleep(1)
-                sec += 1
-            assert not len(listdir(directory)) == 0
-            # Wait until file finishes downloading or times out
-            sec = 0
-            while sec < 10 and len(listdir(directory)) > 1:
-                sleep(1)
-                sec += 1
-            assert len(listdir(directory)) == 1
-            # Get downloaded file
-            file = abspath(join(directory, listdir(directory)[0]))
-            assert exists(file)
-            # Wait
-            sleep(2)
+            # Wait until the file finishes downloading or times out
+            file = wait_for_download(directory, 20)
+            assert file is not None
             # Move file to given path
             move(file, abspath(file_path))
         except:
             self.get_download_dir()
+
+class HeavyConnectPool:
+    """
+    Pool of HeavyConnect drivers for loading several pages at the same time.
+    Each call borrows a driver from the pool and returns it once finished.
+    """
+
+    def __init__(self, size:int=2, headless:bool=True):
+        """
+        Starts the Selenium drivers for the pool.
+        Drivers that fail to start are left out of the pool.
+
+        :param size: Number of drivers to start, defaults to 2
+        :type size: int, optional
+        :param headless: Whether to run in headless mode, defaults to True
+        :type headless: bool, optional
+        """
+        if size is None or size < 1:
+            size = 1
+        # Start drivers at the same time, since each takes a while to start
+        with ThreadPoolExecutor(max_workers=size) as executor:
+            connections = list(executor.map(
+                        lambda index: HeavyConnect(headless), range(0, size)))
+        self.connections = []
+        for connection in connections:
+            if connection.get_driver() is not None:
+                self.connections.append(connection)
+        if len(self.connections) < size:
+            color_print("Started " + str(len(self.connections))
+                        + " of " + str(size) + " drivers.", "r")
+        self.available = Queue()
+        for connection in self.connections:
+            self.available.put(connection)
+
+    def __enter__(self):
+        """
+        Returns the HeavyConnectPool for use in a with statement.
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Closes every driver when leaving a with statement.
+        """
+        self.close_drivers()
+
+    def get_size(self) -> int:
+        """
+        Returns the number of drivers in the pool.
+
+        :return: Number of drivers
+        :rtype: int
+        """
+        return len(self.connections)
+
+    def get_connection(self) -> HeavyConnect:
+        """
+        Waits for a driver to be free and removes it from the pool.
+        The driver must be given back with release_connection.
+
+        :return: HeavyConnect object with a free driver, None if the pool has no drivers
+        :rtype: HeavyConnect
+        """
+        if self.get_size() == 0:
+            return None
+        return self.available.get()
+
+    def release_connection(self, connection:HeavyConnect=None):
+        """
+        Returns a driver taken with get_connection to the pool.
+
+        :param connection: HeavyConnect object to return, defaults to None
+        :type connection: HeavyConnect, optional
+        """
+        if connection is not None:
+            self.available.put(connection)
+
+    def get_page(self,
+                    url:str=None,
+                    element:str=None,
+                    timeout:int=20) -> BeautifulSoup:
+        """
+        Loads a page with the next free driver and returns a BeautifulSoup object.
+
+        :param url: URL to retrieve, defaults to None
+        :type url: str, optional
+        :param element: XPATH Element to wait for, defaults to None
+        :type element: str, optional
+        :param timeout: Seconds before timeout, defaults to 20
+        :type timeout: int, optional
+        :return: BeautifulSoup object for the web page
+        :rtype: BeautifulSoup
+        """
+        connection = self.get_connection()
+        if connection is None:
+            return None
+        try:
+            return connection.get_page(url, element, timeout)
+        finally:
+            self.release_connection(connection)
+
+    def get_json(self, url:str=None) -> dict:
+        """
+        Loads JSON data with the next free driver.
+
+        :param url: URL to retrieve, defaults to None
+        :type url: str, optional
+        :return: Dictionary with JSON data
+        :rtype: dict
+        """
+        connection = self.get_connection()
+        if connection is None:
+            return None
+        try:
+            return connection.get_json(url)
+        finally:
+            self.release_connection(connection)
+
+    def download(self, url:str=None, file_path:str=None):
+        """
+        Downloads a file with the next free driver.
+
+        :param url: Given URL, defaults to None
+        :type url: str, optional
+        :param file_path: Given file path, defaults to None
+        :type file_path: str, optional
+        """
+        connection = self.get_connection()
+        if connection is None:
+            return
+        try:
+            connection.download(url, file_path)
+        finally:
+            self.release_connection(connection)
+
+    def close_drivers(self):
+        """
+        Closes every Selenium driver in the pool.
+        """
+        for connection in self.connections:
+            connection.close_driver()
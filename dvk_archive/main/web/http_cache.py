@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+
+from dvk_archive.main.file.atomic_write import get_cache_directory
+from json import dumps
+from os import makedirs
+from os.path import abspath, join
+from requests import Response
+from sqlite3 import connect
+from sqlite3 import Error as SQLiteError
+from threading import Lock
+
+CACHE_NAME = "dvk_http_cache.sqlite"
+
+def get_default_cache_dir() -> str:
+    """
+    Returns the default directory for storing the HTTP cache.
+    The directory is in the user's cache directory and only readable by the user.
+
+    :return: Path of the default cache directory, None if it couldn't be created
+    :rtype: str
+    """
+    return get_cache_directory("http")
+
+def get_cache_key(url:str=None, data:dict=None) -> str:
+    """
+    Returns the key used to store the response for a request in the cache.
+    Requests to the same URL with different POST data get different keys.
+
+    :param url: URL of the request, defaults to None
+    :type url: str, optional
+    :param data: Request payload for post requests, defaults to None
+    :type data: dict, optional
+    :return: Cache key
+    :rtype: str
+    """
+    if url is None:
+        return None
+    if data is None:
+        return "GET " + url
+    try:
+        payload = dumps(data, sort_keys=True, default=str)
+    except (TypeError, ValueError):
+        payload = str(data)
+    return "POST " + url + "\n" + payload
+
+def get_conditional_headers(headers:dict=None) -> dict:
+    """
+    Returns only the headers used for conditional requests from the given headers.
+
+    :param headers: Headers of a request, defaults to None
+    :type headers: dict, optional
+    :return: Dict with any If-None-Match and If-Modified-Since headers
+    :rtype: dict
+    """
+    conditional = dict()
+    if headers is None:
+        return conditional
+    for key in ["If-None-Match", "If-Modified-Since"]:
+        if key in headers:
+            conditional[key] = headers[key]
+    return conditional
+
+class HttpCache:
+    """
+    Stores HTTP responses on disk so they can be revalidated with conditional requests.
+    Only responses with an ETag or Last-Modified header are stored.
+    The least recently used responses are removed once the cache is over its size limit.
+    """
+
+    def __init__(self, directory:str=None, max_size:int=104857600):
+        """
+        Opens the cache stored in the given directory, creating it if necessary.
+
+        :param directory: Directory to store the cache in, uses get_default_cache_dir if None, defaults to None
+        :type directory: str, optional
+        :param max_size: Maximum size of all stored response bodies in bytes, defaults to 104857600
+        :type max_size: int, optional
+        """
+        self.lock = Lock()
+        self.connection = None
+        self.cache_file = None
+        self.accessed = 0
+        self.max_size = 0
+        if max_size is not None and max_size > 0:
+            self.max_size = max_size
+        if directory is None:
+            directory = get_default_cache_dir()
+        if directory is None:
+            return
+        try:
+            makedirs(abspath(directory), mode=0o700, exist_ok=True)
+            self.cache_file = abspath(join(abspath(directory), CACHE_NAME))
+            self.connection = connect(self.cache_file, timeout=30, check_same_thread=False)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS responses ("
+                        + "key TEXT PRIMARY KEY, "
+                        + "etag TEXT, "
+                        + "modified TEXT, "
+                        + "encoding TEXT, "
+                        + "body BLOB, "
+                        + "size INTEGER, "
+                        + "accessed INTEGER)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed "
+                        + "ON responses(accessed)")
+            self.connection.commit()
+            # Continue counting accesses from the most recent stored response
+            self.accessed = self.connection.execute(
+                        "SELECT IFNULL(MAX(accessed), 0) FROM responses").fetchone()[0]
+        except (OSError, SQLiteError):
+            self.close_cache()
+
+    def close_cache(self):
+        """
+        Closes the cache file if it is open.
+        """
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+            self.connection = None
+
+    def get_cache_file(self) -> str:
+        """
+        Returns the path of the cache file.
+
+        :return: Path of the cache file
+        :rtype: str
+        """
+        return self.cache_file
+
+    def get_entry(self, url:str=None, data:dict=None) -> dict:
+        """
+        Returns the stored response for a request.
+
+        :param url: URL of the request, defaults to None
+        :type url: str, optional
+        :param data: Request payload for post requests, defaults to None
+        :type data: dict, optional
+        :return: Dict with "etag", "modified", "encoding", and "body" keys, or None if not cached
+        :rtype: dict
+        """
+        key = get_cache_key(url, data)
+        with self.lock:
+            if key is None or self.connection is None:
+                return None
+            try:
+                row = self.connection.execute(
+                            "SELECT etag, modified, encoding, body FROM responses WHERE key = ?",
+                            (key,)).fetchone()
+            except SQLiteError:
+                return None
+        if row is None:
+            return None
+        return {"etag":row[0], "modified":row[1], "encoding":row[2], "body":row[3]}
+
+    def get_validators(self, entry:dict=None) -> dict:
+        """
+        Returns the headers for revalidating a stored response with a conditional request.
+
+        :param entry: Stored response from get_entry, defaults to None
+        :type entry: dict, optional
+        :return: Dict with If-None-Match and/or If-Modified-Since headers
+        :rtype: dict
+        """
+        headers = dict()
+        if entry is None:
+            return headers
+        if entry["etag"] is not None:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["modified"] is not None:
+            headers["If-Modified-Since"] = entry["modified"]
+        return headers
+
+    def touch(self, url:str=None, data:dict=None):
+        """
+        Marks the stored response for a request as the most recently used.
+
+        :param url: URL of the request, defaults to None
+        :type url: str, optional
+        :param data: Request payload for post requests, defaults to None
+        :type data: dict, optional
+        """
+        key = get_cache_key(url, data)
+        with self.lock:
+            if key is None or self.connection is None:
+                return
+            try:
+                self.accessed += 1
+                self.connection.execute("UPDATE responses SET accessed = ? WHERE key = ?",
+                            (self.accessed, key))
+                self.connection.commit()
+            except SQLiteError:
+                self.connection.rollback()
+
+    def store(self, url:str=None,
+                data:dict=None,
+                response:Response=None,
+                body:bytes=None) -> bool:
+        """
+        Stores the response for a request if it can be revalidated later.
+        Removes any stored response if the new response can't be stored.
+
+        :param url: URL of the request, defaults to None
+        :type url: str, optional
+        :param data: Request payload for post requests, defaults to None
+        :type data: dict, optional
+        :param response: Response to store, defaults to None
+        :type response: Response, optional
+        :param body: Body of a streamed response, uses the response content if None, defaults to None
+        :type body: bytes, optional
+        :return: Whether the response was stored
+        :rtype: bool
+        """
+        key = get_cache_key(url, data)
+        if key is None or response is None:
+            return False
+        etag = response.headers.get("ETag")
+        modified = response.headers.get("Last-Modified")
+        if body is None:
+            body = response.content
+        can_store = (response.status_code == 200
+                    and (etag is not None or modified is not None)
+                    and body is not None
+                    and len(body) <= self.max_size)
+        with self.lock:
+            if self.connection is None:
+                return False
+            try:
+                if not can_store:
+                    self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.connection.commit()
+                    return False
+                self.accessed += 1
+                self.connection.execute("INSERT OR REPLACE INTO responses VALUES "
+                            + "(?, ?, ?, ?, ?, ?, ?)",
+                            (key, etag, modified, response.encoding, body, len(body),
+                                        self.accessed))
+                self.evict()
+                self.connection.commit()
+                return True
+            except SQLiteError:
+                self.connection.rollback()
+                return False
+
+    def remove(self, url:str=None, data:dict=None):
+        """
+        Removes the stored response for a request.
+
+        :param url: URL of the request, defaults to None
+        :type url: str, optional
+        :param data: Request payload for post requests, defaults to None
+        :type data: dict, optional
+        """
+        key = get_cache_key(url, data)
+        with self.lock:
+            if key is None or self.connection is None:
+                return
+            try:
+                self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.connection.commit()
+            except SQLiteError:
+                self.connection.rollback()
+
+    def evict(self):
+        """
+        Removes the least recently used responses until the cache is within its size limit.
+        Must be called while holding the lock.
+        """
+        total = self.connection.execute(
+                    "SELECT IFNULL(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_size:
+            return
+        removed = []
+        rows = self.connection.execute(
+                    "SELECT key, size FROM responses ORDER BY accessed ASC").fetchall()
+        for row in rows:
+            if total <= self.max_size:
+                break
+            removed.append((row[0],))
+            total -= row[1]
+        self.connection.executemany("DELETE FROM responses WHERE key = ?", removed)
+
+    def get_size(self) -> int:
+        """
+        Returns the total size of all stored response bodies in bytes.
+
+        :return: Size of the cache
+        :rtype: int
+        """
+        with self.lock:
+            if self.connection is None:
+                return 0
+            try:
+                return self.connection.execute(
+                            "SELECT IFNULL(SUM(size), 0) FROM responses").fetchone()[0]
+            except SQLiteError:
+                return 0
+
+    def clear(self):
+        """
+        Removes all stored responses.
+        """
+        with self.lock:
+            if self.connection is None:
+                return
+            try:
+                self.connection.execute("DELETE FROM responses")
+                self.connection.commit()
+            except SQLiteError:
+                self.connection.rollback()
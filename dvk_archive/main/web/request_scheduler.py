@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from random import uniform
+from requests import exceptions
+from requests import Response
+from threading import Lock
+from time import monotonic, sleep
+from typing import Callable
+from urllib.parse import urlparse
+
+# HTTP status codes worth trying again after waiting
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+
+# HTTP status codes meaning every request to the host should wait
+BACKOFF_STATUSES = [429, 503]
+
+class RequestScheduler:
+    """
+    Schedules HTTP requests, limiting the request rate for each host
+    and retrying requests that fail for temporary reasons.
+    """
+
+    def __init__(self, rate:float=None,
+                burst:int=1,
+                retries:int=3,
+                backoff:float=1.0,
+                max_backoff:float=60.0,
+                max_retry_after:float=300.0):
+        """
+        Creates a RequestScheduler.
+
+        :param rate: Default maximum requests per second for each host, None for no limit, defaults to None
+        :type rate: float, optional
+        :param burst: Number of requests that can be sent at once before limiting, defaults to 1
+        :type burst: int, optional
+        :param retries: Number of times to retry a failed request, defaults to 3
+        :type retries: int, optional
+        :param backoff: Seconds to wait before the first retry, doubled for each retry after, defaults to 1.0
+        :type backoff: float, optional
+        :param max_backoff: Maximum seconds to wait before a retry, defaults to 60.0
+        :type max_backoff: float, optional
+        :param max_retry_after: Maximum seconds to wait for a Retry-After header before giving up, defaults to 300.0
+        :type max_retry_after: float, optional
+        """
+        self.lock = Lock()
+        self.limits = dict()
+        self.buckets = dict()
+        self.metrics = dict()
+        self.set_rate_limit(rate, burst)
+        self.set_retries(retries, backoff, max_backoff, max_retry_after)
+
+    def set_rate_limit(self, rate:float=None, burst:int=1, host:str=None):
+        """
+        Sets the maximum request rate for a host, or the default for all hosts.
+
+        :param rate: Maximum requests per second, None for no limit, defaults to None
+        :type rate: float, optional
+        :param burst: Number of requests that can be sent at once before limiting, defaults to 1
+        :type burst: int, optional
+        :param host: Host to set the limit for, sets the default if None, defaults to None
+        :type host: str, optional
+        """
+        if rate is not None and rate <= 0:
+            rate = None
+        if burst is None or burst < 1:
+            burst = 1
+        with self.lock:
+            key = host
+            if key is not None:
+                key = key.lower()
+            self.limits[key] = [rate, burst]
+            # Start counting again with the new limits
+            self.buckets.clear()
+
+    def set_retries(self, retries:int=3,
+                backoff:float=1.0,
+                max_backoff:float=60.0,
+                max_retry_after:float=300.0):
+        """
+        Sets how failed requests are retried.
+
+        :param retries: Number of times to retry a failed request, defaults to 3
+        :type retries: int, optional
+        :param backoff: Seconds to wait before the first retry, doubled for each retry after, defaults to 1.0
+        :type backoff: float, optional
+        :param max_backoff: Maximum seconds to wait before a retry, defaults to 60.0
+        :type max_backoff: float, optional
+        :param max_retry_after: Maximum seconds to wait for a Retry-After header before giving up, defaults to 300.0
+        :type max_retry_after: float, optional
+        """
+        self.retries = 0
+        if retries is not None and retries > 0:
+            self.retries = retries
+        self.backoff = max(0.0, backoff)
+        self.max_backoff = max(self.backoff, max_backoff)
+        self.max_retry_after = max(0.0, max_retry_after)
+
+    def get_limit(self, host:str=None) -> list:
+        """
+        Returns the [rate, burst] limit used for a host.
+
+        :param host: Host to get the limit for, defaults to None
+        :type host: str, optional
+        :return: Requests per second and burst size
+        :rtype: list
+        """
+        if host in self.limits:
+            return self.limits[host]
+        return self.limits[None]
+
+    def get_metric(self, host:str=None) -> dict:
+        """
+        Returns the metrics being recorded for a host, creating them if necessary.
+        Must be called while holding the lock.
+
+        :param host: Host to get metrics for, defaults to None
+        :type host: str, optional
+        :return: Metrics for the host
+        :rtype: dict
+        """
+        if not host in self.metrics:
+            self.metrics[host] = {"requests":0, "retries":0, "failures":0, "wait_time":0.0}
+        return self.metrics[host]
+
+    def get_metrics(self, host:str=None) -> dict:
+        """
+        Returns the number of requests, retries, and failures, as well as seconds spent waiting.
+
+        :param host: Host to get metrics for, totals for all hosts if None, defaults to None
+        :type host: str, optional
+        :return: Dict with "requests", "retries", "failures", and "wait_time" keys
+        :rtype: dict
+        """
+        with self.lock:
+            if host is not None:
+                return dict(self.get_metric(host.lower()))
+            total = {"requests":0, "retries":0, "failures":0, "wait_time":0.0}
+            for metric in self.metrics.values():
+                for key in total:
+                    total[key] += metric[key]
+            return total
+
+    def reset_metrics(self):
+        """
+        Clears all recorded metrics.
+        """
+        with self.lock:
+            self.metrics.clear()
+
+    def acquire(self, url:str=None) -> float:
+        """
+        Waits until a request can be sent to the host of a URL without going over its rate limit.
+
+        :param url: URL that will be requested, defaults to None
+        :type url: str, optional
+        :return: Seconds spent waiting
+        :rtype: float
+        """
+        host = get_host(url)
+        with self.lock:
+            rate, burst = self.get_limit(host)
+            now = monotonic()
+            if rate is None:
+                # Wait out any pause from the host being overloaded
+                wait = 0.0
+                if host in self.buckets:
+                    wait = max(0.0, self.buckets[host][1] - now)
+            else:
+                # Refill the host's token bucket for the time passed
+                if not host in self.buckets:
+                    self.buckets[host] = [float(burst), now]
+                bucket = self.buckets[host]
+                bucket[0] = min(float(burst), bucket[0] + ((now - bucket[1]) * rate))
+                bucket[1] = now
+                # Take a token, waiting for it if none are available
+                bucket[0] -= 1.0
+                wait = 0.0
+                if bucket[0] < 0:
+                    wait = -bucket[0] / rate
+            self.get_metric(host)["wait_time"] += wait
+        if wait > 0:
+            sleep(wait)
+        return wait
+
+    def pause_host(self, url:str=None, delay:float=0.0):
+        """
+        Stops requests to the host of a URL from being sent until the given time has passed.
+
+        :param url: URL of the host to pause, defaults to None
+        :type url: str, optional
+        :param delay: Seconds to pause for, defaults to 0.0
+        :type delay: float, optional
+        """
+        host = get_host(url)
+        with self.lock:
+            # Empty the token bucket as of the time the pause ends
+            resume = monotonic() + delay
+            if host in self.buckets:
+                resume = max(resume, self.buckets[host][1])
+            self.buckets[host] = [0.0, resume]
+
+    def get_retry_delay(self, attempt:int=0, response:Response=None) -> float:
+        """
+        Returns how long to wait before retrying a request.
+        Uses the response's Retry-After header if given,
+        otherwise uses exponential backoff with random jitter.
+        Returns None if the Retry-After header is longer than max_retry_after.
+
+        :param attempt: Number of retries already made, defaults to 0
+        :type attempt: int, optional
+        :param response: Response of the failed request, defaults to None
+        :type response: Response, optional
+        :return: Seconds to wait, or None if the request shouldn't be retried
+        :rtype: float
+        """
+        # Use the time requested by the server, if available
+        if response is not None:
+            retry_after = get_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                if retry_after > self.max_retry_after:
+                    return None
+                return retry_after
+        # Double the wait for every attempt, with jitter so clients don't retry together
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        return uniform(delay / 2, delay)
+
+    def wait_to_retry(self, url:str=None, attempt:int=0, response:Response=None) -> float:
+        """
+        Waits before retrying a failed request and records the retry.
+        If the host is overloaded, other requests to the host wait as well.
+
+        :param url: URL being requested, defaults to None
+        :type url: str, optional
+        :param attempt: Number of retries already made, defaults to 0
+        :type attempt: int, optional
+        :param response: Response of the failed request, defaults to None
+        :type response: Response, optional
+        :return: Seconds spent waiting, or None if the request shouldn't be retried
+        :rtype: float
+        """
+        delay = self.get_retry_delay(attempt, response)
+        if delay is None:
+            return None
+        if response is not None:
+            if response.status_code in BACKOFF_STATUSES:
+                self.pause_host(url, delay)
+            # Close the connection to the failed response before waiting
+            response.close()
+        with self.lock:
+            metric = self.get_metric(get_host(url))
+            metric["retries"] += 1
+            metric["wait_time"] += delay
+        sleep(delay)
+        return delay
+
+    def send(self, url:str=None, request:Callable=None, idempotent:bool=True) -> Response:
+        """
+        Sends a request, waiting for the host's rate limit and retrying temporary failures.
+        Retries connection errors, timeouts, and responses with RETRY_STATUSES.
+        Other errors are raised as normal.
+        Requests that aren't idempotent, such as POST requests, are never retried.
+
+        :param url: URL being requested, defaults to None
+        :type url: str, optional
+        :param request: Function that sends the request and returns a Response, defaults to None
+        :type request: Callable, optional
+        :param idempotent: Whether the request can safely be sent more than once, defaults to True
+        :type idempotent: bool, optional
+        :return: Response of the last attempt
+        :rtype: Response
+        """
+        retries = 0
+        if idempotent:
+            retries = self.retries
+        host = get_host(url)
+        attempt = 0
+        while True:
+            self.acquire(url)
+            with self.lock:
+                self.get_metric(host)["requests"] += 1
+            response = None
+            try:
+                response = request()
+                if (not response.status_code in RETRY_STATUSES
+                            or attempt >= retries):
+                    return response
+            except (exceptions.ConnectionError, exceptions.Timeout):
+                if attempt >= retries:
+                    with self.lock:
+                        self.get_metric(host)["failures"] += 1
+                    raise
+            # Wait before trying again, giving up if the server asks for too long
+            if self.wait_to_retry(url, attempt, response) is None:
+                return response
+            attempt += 1
+
+def get_host(url:str=None) -> str:
+    """
+    Returns the host of a URL in lower case.
+
+    :param url: URL to get the host from, defaults to None
+    :type url: str, optional
+    :return: Host of the URL
+    :rtype: str
+    """
+    if url is None:
+        return ""
+    try:
+        return urlparse(url).netloc.lower()
+    except (AttributeError, TypeError, ValueError):
+        return ""
+
+def get_retry_after(value:str=None) -> float:
+    """
+    Returns the seconds to wait from a Retry-After header.
+    The header can be given as a number of seconds or as an HTTP date.
+
+    :param value: Value of the Retry-After header, defaults to None
+    :type value: str, optional
+    :return: Seconds to wait, or None if the value is invalid
+    :rtype: float
+    """
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+        return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError, IndexError):
+        return None
@@ -6,6 +6,7 @@ from dvk_archive.test.file.file_tests import test_all as file_test
 from dvk_archive.test.error_finding.error_finding_tests import test_all as error_test
 from dvk_archive.test.processing.processing_tests import test_all as pro_test
 from dvk_archive.test.web.web_tests import test_all as web_test
+from dvk_archive.test.test_import_time import all_tests as import_test
 from dvk_archive.main.color_print import color_print
 
 def test_all():
@@ -17,6 +18,7 @@ def test_all():
         file_test()
         error_test()
         web_test()
+        import_test()
         color_print("All dvk_archive tests passed.", "g")
     except AssertionError:
         color_print("Check failed:", "r")
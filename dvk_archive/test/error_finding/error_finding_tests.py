@@ -5,6 +5,7 @@ from dvk_archive.test.error_finding.test_missing_media import all_tests as missi
 from dvk_archive.test.error_finding.test_missing_sequence_info import all_tests as missing_sequence
 from dvk_archive.test.error_finding.test_unlinked_media import all_tests as unlinked
 from dvk_archive.test.error_finding.test_sequence_errors import all_tests as sequencing
+from dvk_archive.test.error_finding.test_archive_audit import all_tests as audit
 
 """
 Combined unit tests for the error_finding package
@@ -19,3 +20,4 @@ def test_all():
     missing()
     sequencing()
     missing_sequence()
+    audit()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+from dvk_archive.main.error_finding.archive_audit import audit_archive
+from dvk_archive.main.error_finding.missing_media import get_missing_media_dvks
+from dvk_archive.main.error_finding.missing_sequence_info import get_missing_sequence_info
+from dvk_archive.main.error_finding.same_ids import get_same_ids
+from dvk_archive.main.error_finding.sequence_errors import get_sequence_errors
+from dvk_archive.main.error_finding.unlinked_media import get_unlinked_media
+from dvk_archive.main.file.dvk_handler import DvkHandler
+from dvk_archive.test.error_finding.error_files import create_test_files
+from dvk_archive.test.file.test_sequence_graph import create_test_handler
+from json import dumps, loads
+from os.path import abspath, basename, join
+
+def test_audit_archive():
+    """
+    Tests the audit_archive function.
+    """
+    test_dir = create_test_files()
+    # TEST THAT THE AUDIT MATCHES RUNNING EACH CHECK SEPARATELY
+    report = audit_archive(test_dir)
+    assert report["directory"] == test_dir
+    assert report["dvks"] == 5
+    assert report["missing_media"] == get_missing_media_dvks(test_dir)
+    assert report["same_ids"] == get_same_ids(test_dir)
+    assert report["sequence_errors"] == get_sequence_errors(test_dir)
+    assert report["missing_sequence_info"] == get_missing_sequence_info(test_dir)
+    assert report["unlinked_media"] == get_unlinked_media(test_dir)
+    assert len(report["missing_media"]) == 3
+    assert len(report["same_ids"]) == 2
+    assert len(report["unlinked_media"]) == 2
+    assert basename(report["unlinked_media"][0]) == "unlinked_main.txt"
+    assert report["sequence_forks"] == []
+    assert report["sequence_cycles"] == []
+    assert report["sequence_orphans"] == []
+    # TEST AUDITING WITH WORKER PROCESSES
+    other = audit_archive(test_dir, 2, use_processes=True)
+    assert other["missing_media"] == report["missing_media"]
+    assert other["same_ids"] == report["same_ids"]
+    assert other["unlinked_media"] == report["unlinked_media"]
+    # TEST AUDITING WITH A PRE-LOADED DVK HANDLER
+    dvk_handler = DvkHandler(test_dir)
+    dvk_handler.sort_dvks("a")
+    other = audit_archive(dvk_handler=dvk_handler)
+    assert other["directory"] is None
+    assert other["missing_media"] == report["missing_media"]
+    assert other["same_ids"] == report["same_ids"]
+    assert other["unlinked_media"] == report["unlinked_media"]
+    # TEST AUDITING A DIRECTORY WITH NO DVKS
+    report = audit_archive(abspath(join(test_dir, "no_dvks")))
+    assert report["dvks"] == 0
+    assert report["missing_media"] == []
+    assert report["unlinked_media"] == []
+    assert report["sequence_cycles"] == []
+    # TEST AUDITING INVALID DIRECTORIES
+    assert audit_archive("/non-existant/directory") is None
+    assert audit_archive(None) is None
+    # TEST REPORTING SEQUENCE FORKS, CYCLES AND ORPHANS
+    dvk_handler = create_test_handler()
+    report = audit_archive(dvk_handler=dvk_handler)
+    assert report["dvks"] == 10
+    files = [basename(file) for file in report["sequence_forks"]]
+    assert files == ["SEQ01.dvk"]
+    files = [basename(file) for file in report["sequence_orphans"]]
+    assert files == ["ORP01.dvk", "ORP02.dvk"]
+    assert len(report["sequence_cycles"]) == 1
+    files = [basename(file) for file in report["sequence_cycles"][0]]
+    assert files == ["LOP01.dvk", "LOP02.dvk"]
+    assert len(report["sequence_errors"]) > 0
+    # TEST THAT SEQUENCE RESULTS ARE INCLUDED IN THE JSON REPORT
+    json = loads(dumps(report))
+    assert json["sequence_forks"] == report["sequence_forks"]
+    assert json["sequence_cycles"] == report["sequence_cycles"]
+    assert json["sequence_orphans"] == report["sequence_orphans"]
+
+def all_tests():
+    """
+    Runs all tests for the archive_audit.py module.
+    """
+    test_audit_archive()
@@ -1,7 +1,12 @@
 #!/usr/bin/env python3
 
+from dvk_archive.main.error_finding.same_ids import get_same_direct_urls
 from dvk_archive.main.error_finding.same_ids import get_same_ids
+from dvk_archive.main.error_finding.same_ids import get_same_page_urls
+from dvk_archive.main.file.dvk import Dvk
+from dvk_archive.main.file.dvk_handler import DvkHandler
 from dvk_archive.test.error_finding.error_files import create_test_files
+from dvk_archive.test.temp_dir import get_test_dir
 from os import pardir
 from os.path import abspath, basename, join
 
@@ -32,8 +37,71 @@ def test_get_same_ids():
     assert get_same_ids("/non-existant/directory") == []
     assert get_same_ids(None) == []
 
+def create_url_files() -> str:
+    """
+    Creates DVK files with repeated URLs for testing.
+
+    :return: Path of the directory that holds test files
+    :rtype: str
+    """
+    test_dir = get_test_dir()
+    urls = [["a", "/page/1", "/direct/1", None],
+                ["b", "/PAGE/2", "/direct/2", "/second/2"],
+                ["c", "/page/2", "/DIRECT/1", None],
+                ["d", "/page/3", "/second/2", "/direct/3"],
+                ["e", "/page/1", "/direct/5", "/direct/5"],
+                ["f", "/page/6", "/direct/6", None]]
+    for item in urls:
+        dvk = Dvk()
+        dvk.set_dvk_file(join(test_dir, item[0] + ".dvk"))
+        dvk.set_dvk_id("ID" + item[0])
+        dvk.set_title(item[0])
+        dvk.set_artist("artist")
+        dvk.set_page_url(item[1])
+        dvk.set_direct_url(item[2])
+        dvk.set_secondary_url(item[3])
+        dvk.set_media_file(item[0] + ".txt")
+        dvk.write_dvk()
+    return test_dir
+
+def test_get_same_page_urls():
+    """
+    Tests the get_same_page_urls function.
+    """
+    test_dir = create_url_files()
+    same = get_same_page_urls(test_dir)
+    assert len(same) == 2
+    assert [basename(file) for file in same[0]] == ["a.dvk", "e.dvk"]
+    assert [basename(file) for file in same[1]] == ["b.dvk", "c.dvk"]
+    # TEST WITH A PRE-LOADED DVK HANDLER
+    dvk_handler = DvkHandler(test_dir)
+    dvk_handler.sort_dvks("a")
+    assert get_same_page_urls(dvk_handler=dvk_handler) == same
+    # TEST GETTING SAME URLS WITH INVALID DIRECTORIES
+    assert get_same_page_urls("/non-existant/directory") == []
+    assert get_same_page_urls(None) == []
+
+def test_get_same_direct_urls():
+    """
+    Tests the get_same_direct_urls function.
+    """
+    test_dir = create_url_files()
+    same = get_same_direct_urls(test_dir)
+    assert len(same) == 2
+    assert [basename(file) for file in same[0]] == ["a.dvk", "c.dvk"]
+    assert [basename(file) for file in same[1]] == ["b.dvk", "d.dvk"]
+    # TEST WITH A PRE-LOADED DVK HANDLER
+    dvk_handler = DvkHandler(test_dir)
+    dvk_handler.sort_dvks("a")
+    assert get_same_direct_urls(dvk_handler=dvk_handler) == same
+    # TEST GETTING SAME URLS WITH INVALID DIRECTORIES
+    assert get_same_direct_urls("/non-existant/directory") == []
+    assert get_same_direct_urls(None) == []
+
 def all_tests():
     """
     Runs all tests for the same_ids.py module.
     """
     test_get_same_ids()
+    test_get_same_page_urls()
+    test_get_same_direct_urls()
@@ -405,8 +405,12 @@ def test_get_sequence_errors():
     single.set_prev_id(None)
     single.set_last()
     single.write_dvk()
+    # Rewrite the valid Dvks, which are saved but were deleted with the test directory
+    valid1.set_saved(False)
     valid1.write_dvk()
+    valid2.set_saved(False)
     valid2.write_dvk()
+    valid3.set_saved(False)
     valid3.write_dvk()
     dvk_handler = DvkHandler(test_dir)
     dvk_handler.sort_dvks("a")
@@ -436,8 +440,11 @@ def test_get_sequence_errors():
     start.set_dvk_id("SRT02")
     start.set_title("Invalid Start 2")
     start.write_dvk()
+    valid1.set_saved(False)
     valid1.write_dvk()
+    valid2.set_saved(False)
     valid2.write_dvk()
+    valid3.set_saved(False)
     valid3.write_dvk()
     dvk_handler = DvkHandler(test_dir)
     dvk_handler.sort_dvks("a")
@@ -479,8 +486,11 @@ def test_get_sequence_errors():
     num.set_dvk_id("OTH02")
     num.set_title("Other 2")
     num.write_dvk()
+    valid1.set_saved(False)
     valid1.write_dvk()
+    valid2.set_saved(False)
     valid2.write_dvk()
+    valid3.set_saved(False)
     valid3.write_dvk()
     dvk_handler = DvkHandler(test_dir)
     dvk_handler.sort_dvks("a")
@@ -526,8 +536,11 @@ def test_get_sequence_errors():
     link.set_dvk_id("LNK03")
     link.set_title("Invalid Link 03")
     link.write_dvk()
+    valid1.set_saved(False)
     valid1.write_dvk()
+    valid2.set_saved(False)
     valid2.write_dvk()
+    valid3.set_saved(False)
     valid3.write_dvk()
     dvk_handler = DvkHandler(test_dir)
     dvk_handler.sort_dvks("a")
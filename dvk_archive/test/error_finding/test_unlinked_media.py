@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 
 from dvk_archive.main.error_finding.unlinked_media import get_unlinked_media
+from dvk_archive.main.web.bs_connect import get_part_file
+from dvk_archive.main.web.bs_connect import get_part_info_file
 from dvk_archive.test.error_finding.error_files import create_test_files
 from os import pardir
 from os.path import abspath, basename, join
@@ -23,12 +25,48 @@ def test_get_unlinked_media():
     # TEST THAT THERE ARE NO UNLINKED FILES IN THE NO_DVK TEST FOLDER
     unlinked = get_unlinked_media(no_dvks)
     assert len(unlinked) == 0
+    # TEST THAT CATALOG FILES ARE NOT COUNTED AS UNLINKED
+    unlinked = get_unlinked_media(test_dir, use_catalog=True)
+    assert len(unlinked) == 2
+    assert basename(unlinked[0]) == "unlinked_main.txt"
+    assert basename(unlinked[1]) == "unlinked_sub.png"
+    # TEST THAT PARTIAL DOWNLOADS ARE NOT COUNTED AS UNLINKED
+    for file in [get_part_file(join(test_dir, "download.png")),
+                get_part_info_file(join(test_dir, "download.png"))]:
+        with open(file, "w") as out_file:
+            out_file.write("Part")
+    unlinked = get_unlinked_media(test_dir)
+    assert len(unlinked) == 2
+    assert basename(unlinked[0]) == "unlinked_main.txt"
+    assert get_unlinked_media(test_dir, per_directory=True) == unlinked
     # TEST GETTING UNLINKED FILES WITH INVALID DIRECTORIES
     assert get_unlinked_media("/non-existant/directory") == []
     assert get_unlinked_media(None) == []
 
+def test_get_unlinked_by_directory():
+    """
+    Tests the get_unlinked_media function when loading one directory at a time.
+    """
+    test_dir = create_test_files()
+    # TEST THAT RESULTS MATCH LOADING THE WHOLE DIRECTORY
+    unlinked = get_unlinked_media(test_dir, per_directory=True)
+    assert unlinked == get_unlinked_media(test_dir)
+    assert len(unlinked) == 2
+    assert basename(unlinked[0]) == "unlinked_main.txt"
+    assert basename(unlinked[1]) == "unlinked_sub.png"
+    # TEST LOADING ONE DIRECTORY AT A TIME WITH A CATALOG
+    unlinked = get_unlinked_media(test_dir, use_catalog=True, per_directory=True)
+    assert unlinked == get_unlinked_media(test_dir)
+    # TEST THAT THERE ARE NO UNLINKED FILES IN THE NO_DVK TEST FOLDER
+    no_dvks = abspath(join(test_dir, "no_dvks"))
+    assert get_unlinked_media(no_dvks, per_directory=True) == []
+    # TEST GETTING UNLINKED FILES WITH INVALID DIRECTORIES
+    assert get_unlinked_media("/non-existant/directory", per_directory=True) == []
+    assert get_unlinked_media(None, per_directory=True) == []
+
 def all_tests():
     """
     Runs all tests for the unlinked_media.py module.
     """
     test_get_unlinked_media()
+    test_get_unlinked_by_directory()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+
+from dvk_archive.main.file.atomic_write import PENDING
+from dvk_archive.main.file.atomic_write import flush_writes
+from dvk_archive.main.file.atomic_write import get_cache_directory
+from dvk_archive.main.file.atomic_write import get_durability
+from dvk_archive.main.file.atomic_write import get_temp_file
+from dvk_archive.main.file.atomic_write import is_part_file
+from dvk_archive.main.file.atomic_write import set_durability
+from dvk_archive.main.file.atomic_write import write_file_atomic
+from dvk_archive.main.file.dvk import Dvk
+from dvk_archive.test.temp_dir import get_test_dir
+from os import chmod, environ, listdir, stat
+from os.path import abspath, basename, exists, join
+from stat import S_IMODE
+
+def test_get_temp_file():
+    """
+    Tests the get_temp_file function.
+    """
+    test_dir = get_test_dir()
+    temp_file = get_temp_file(join(test_dir, "file.dvk"))
+    assert abspath(join(temp_file, "..")) == test_dir
+    assert basename(temp_file).startswith(".file.dvk.")
+    assert basename(temp_file).endswith(".tmp")
+    assert get_temp_file(None) is None
+
+def test_is_part_file():
+    """
+    Tests the is_part_file function.
+    """
+    assert is_part_file("image.png.part")
+    assert is_part_file("image.png.part.json")
+    assert not is_part_file("image.png")
+    assert not is_part_file("part.json")
+    assert not is_part_file(None)
+
+def test_get_cache_directory():
+    """
+    Tests the get_cache_directory function.
+    """
+    test_dir = get_test_dir()
+    cache_home = environ.get("XDG_CACHE_HOME")
+    try:
+        # Test that cache directories are created in the user's cache directory
+        environ["XDG_CACHE_HOME"] = join(test_dir, "cache")
+        directory = get_cache_directory("html")
+        assert directory == abspath(join(test_dir, "cache", "dvk_archive", "html"))
+        assert exists(directory)
+        assert get_cache_directory() == abspath(join(test_dir, "cache", "dvk_archive"))
+        # Test that cache directories are only readable by the user
+        assert S_IMODE(stat(directory).st_mode) == 0o700
+        chmod(directory, 0o755)
+        assert get_cache_directory("html") == directory
+        assert S_IMODE(stat(directory).st_mode) == 0o700
+        assert S_IMODE(stat(get_cache_directory()).st_mode) == 0o700
+        # Test getting a cache directory that can't be created
+        with open(join(test_dir, "file.txt"), "w") as out_file:
+            out_file.write("TEST")
+        environ["XDG_CACHE_HOME"] = join(test_dir, "file.txt")
+        assert get_cache_directory("html") is None
+    finally:
+        if cache_home is None:
+            del environ["XDG_CACHE_HOME"]
+        else:
+            environ["XDG_CACHE_HOME"] = cache_home
+
+def test_write_file_atomic():
+    """
+    Tests the write_file_atomic function.
+    """
+    # TEST WRITING A NEW FILE
+    test_dir = get_test_dir()
+    file = join(test_dir, "file.txt")
+    assert write_file_atomic(file, b"First")
+    with open(file, "rb") as in_file:
+        assert in_file.read() == b"First"
+    assert listdir(test_dir) == ["file.txt"]
+    # TEST REPLACING A FILE WHILE KEEPING ITS PERMISSIONS
+    chmod(file, 0o600)
+    assert write_file_atomic(file, b"Second")
+    with open(file, "rb") as in_file:
+        assert in_file.read() == b"Second"
+    assert S_IMODE(stat(file).st_mode) == 0o600
+    assert listdir(test_dir) == ["file.txt"]
+    # TEST WRITING OVER A LEFTOVER TEMPORARY FILE
+    with open(get_temp_file(file), "w") as out_file:
+        out_file.write("Leftover")
+    assert write_file_atomic(file, b"Third")
+    with open(file, "rb") as in_file:
+        assert in_file.read() == b"Third"
+    assert listdir(test_dir) == ["file.txt"]
+    # TEST WRITING INVALID FILES
+    assert not write_file_atomic(join(test_dir, "non-existant", "file.txt"), b"Data")
+    assert not write_file_atomic(None, b"Data")
+    assert not write_file_atomic(file, None)
+    assert listdir(test_dir) == ["file.txt"]
+
+def test_durability():
+    """
+    Tests writing files with each durability mode.
+    """
+    test_dir = get_test_dir()
+    # TEST SYNCING EVERY FILE
+    set_durability("f")
+    assert get_durability() == "f"
+    assert write_file_atomic(join(test_dir, "synced.txt"), b"Synced")
+    assert PENDING["writes"] == 0
+    # TEST SYNCING IN BATCHES
+    set_durability("b", 3)
+    assert get_durability() == "b"
+    assert write_file_atomic(join(test_dir, "batch1.txt"), b"Batch")
+    assert write_file_atomic(join(test_dir, "batch2.txt"), b"Batch")
+    assert PENDING["writes"] == 2
+    assert PENDING["directories"] == set([test_dir])
+    assert write_file_atomic(join(test_dir, "batch3.txt"), b"Batch")
+    assert PENDING["writes"] == 0
+    assert write_file_atomic(join(test_dir, "batch4.txt"), b"Batch")
+    flush_writes()
+    assert PENDING["writes"] == 0
+    assert len(PENDING["directories"]) == 0
+    # TEST INVALID MODES
+    set_durability("invalid")
+    assert get_durability() == "n"
+    assert write_file_atomic(join(test_dir, "none.txt"), b"None")
+    assert PENDING["writes"] == 0
+    assert sorted(listdir(test_dir)) == ["batch1.txt", "batch2.txt",
+                "batch3.txt", "batch4.txt", "none.txt", "synced.txt"]
+
+def test_rename_keeps_old_dvk():
+    """
+    Tests that renaming a Dvk only removes the old DVK file after writing the new one.
+    """
+    # WRITE TEST DVK
+    test_dir = get_test_dir()
+    dvk = Dvk()
+    dvk.set_dvk_file(join(test_dir, "old.dvk"))
+    dvk.set_dvk_id("OLD1")
+    dvk.set_title("Title")
+    dvk.set_artist("Artist")
+    dvk.set_page_url("/url/")
+    dvk.set_media_file("old.txt")
+    dvk.write_dvk()
+    with open(join(test_dir, "old.txt"), "w") as out_file:
+        out_file.write("Media")
+    # TEST RENAMING
+    dvk.rename_files("new", "new_2")
+    assert sorted(listdir(test_dir)) == ["new.dvk", "new.txt"]
+    assert Dvk(join(test_dir, "new.dvk")).get_title() == "Title"
+    # TEST RENAMING TO THE SAME NAME
+    dvk.rename_files("new", "new_2")
+    assert sorted(listdir(test_dir)) == ["new.dvk", "new.txt"]
+    assert Dvk(join(test_dir, "new.dvk")).get_title() == "Title"
+    # TEST THAT THE OLD DVK IS KEPT IF THE NEW ONE CAN'T BE WRITTEN
+    dvk.set_artists([])
+    dvk.rename_files("other", "other_2")
+    assert exists(join(test_dir, "new.dvk"))
+    assert not exists(join(test_dir, "other.dvk"))
+
+def all_tests():
+    """
+    Runs all tests for the atomic_write.py module.
+    """
+    test_get_temp_file()
+    test_is_part_file()
+    test_get_cache_directory()
+    test_write_file_atomic()
+    test_durability()
+    test_rename_keeps_old_dvk()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+
+from dvk_archive.main.file.atomic_write import get_temp_file
+from dvk_archive.main.file.batch_write import get_rename_plan
+from dvk_archive.main.file.batch_write import move_files
+from dvk_archive.main.file.batch_write import run_batch
+from dvk_archive.main.file.batch_write import write_dvks
+from dvk_archive.main.file.batch_write import write_media_files
+from dvk_archive.main.file.dvk import Dvk
+from dvk_archive.main.file.sequencing import set_sequence
+from dvk_archive.test.temp_dir import get_test_dir
+from dvk_archive.test.web.local_server import LocalServer
+from os import listdir, mkdir, rmdir
+from os.path import abspath, exists, join
+from typing import List
+
+def create_test_dvks(test_dir:str=None) -> List[Dvk]:
+    """
+    Creates test DVK files and media for testing batch writes.
+
+    :param test_dir: Directory to write test files in, defaults to None
+    :type test_dir: str, optional
+    :return: Dvks that were written
+    :rtype: list[Dvk]
+    """
+    dvks = []
+    for i in range(1, 4):
+        dvk = Dvk()
+        dvk.set_dvk_file(join(test_dir, "dvk" + str(i) + ".dvk"))
+        dvk.set_dvk_id("ID" + str(i))
+        dvk.set_title("Title " + str(i))
+        dvk.set_artist("Artist")
+        dvk.set_page_url("/url/")
+        dvk.set_media_file("media" + str(i) + ".txt")
+        dvk.write_dvk()
+        with open(dvk.get_media_file(), "w") as out_file:
+            out_file.write("Media " + str(i))
+        dvks.append(dvk)
+    return dvks
+
+def get_directory_contents(directory:str=None) -> dict:
+    """
+    Returns the contents of every file in a directory.
+
+    :param directory: Directory to read, defaults to None
+    :type directory: str, optional
+    :return: Dict of filenames and their contents
+    :rtype: dict
+    """
+    contents = dict()
+    for filename in listdir(directory):
+        with open(join(directory, filename), "rb") as in_file:
+            contents[filename] = in_file.read()
+    return contents
+
+def test_run_batch():
+    """
+    Tests the run_batch function.
+    """
+    assert run_batch(abs, [-1, 2, -3]) == [1, 2, 3]
+    assert run_batch(abs, [-1, 2, -3], 4) == [1, 2, 3]
+    assert run_batch(abs, []) == []
+    assert run_batch(None, [1]) == []
+    assert run_batch(abs, None) == []
+
+def test_move_files():
+    """
+    Tests the move_files function.
+    """
+    # TEST SWAPPING FILE NAMES
+    test_dir = get_test_dir()
+    file1 = join(test_dir, "file1.txt")
+    file2 = join(test_dir, "file2.txt")
+    with open(file1, "w") as out_file:
+        out_file.write("First")
+    with open(file2, "w") as out_file:
+        out_file.write("Second")
+    moves = [[file1, file2], [file2, file1]]
+    assert move_files(moves, 2) == moves
+    with open(file1) as in_file:
+        assert in_file.read() == "Second"
+    with open(file2) as in_file:
+        assert in_file.read() == "First"
+    assert sorted(listdir(test_dir)) == ["file1.txt", "file2.txt"]
+    # TEST THAT FILES ARE MOVED BACK IF ANY MOVE FAILS
+    moves = [[file1, join(test_dir, "new.txt")], [join(test_dir, "missing.txt"), file2]]
+    assert move_files(moves) is None
+    assert sorted(listdir(test_dir)) == ["file1.txt", "file2.txt"]
+    # TEST MOVING INVALID FILES
+    assert move_files([]) == []
+    assert move_files(None) == []
+
+def test_get_rename_plan():
+    """
+    Tests the get_rename_plan function.
+    """
+    test_dir = get_test_dir()
+    dvks = create_test_dvks(test_dir)
+    # TEST THAT DVKS WITH THE SAME TITLE GET DIFFERENT NAMES
+    dvks[1].set_title("Title 1")
+    plan = get_rename_plan(dvks)
+    assert len(plan) == 3
+    assert plan[0] == [abspath(join(test_dir, "Title 1.dvk")),
+                abspath(join(test_dir, "Title 1.txt")), None]
+    assert plan[1] == [abspath(join(test_dir, "Title 1 - Artist.dvk")),
+                abspath(join(test_dir, "Title 1 - Artist.txt")), None]
+    assert plan[2] == [abspath(join(test_dir, "Title 3.dvk")),
+                abspath(join(test_dir, "Title 3.txt")), None]
+    # TEST THAT PLANNING DOESN'T CHANGE ANY FILES
+    assert sorted(listdir(test_dir)) == ["dvk1.dvk", "dvk2.dvk", "dvk3.dvk",
+                "media1.txt", "media2.txt", "media3.txt"]
+    # TEST GETTING PLAN WITH INVALID DVKS
+    assert get_rename_plan([]) == []
+    assert get_rename_plan(None) == []
+
+def test_write_dvks():
+    """
+    Tests the write_dvks function.
+    """
+    # TEST WRITING A SEQUENCE
+    test_dir = get_test_dir()
+    dvks = create_test_dvks(test_dir)
+    set_sequence(dvks, "Sequence", False)
+    assert write_dvks(dvks, False, 2)
+    assert Dvk(join(test_dir, "dvk2.dvk")).get_prev_id() == "ID1"
+    assert Dvk(join(test_dir, "dvk2.dvk")).get_next_id() == "ID3"
+    # TEST RENAMING WHILE WRITING
+    assert write_dvks(dvks, True, 2)
+    assert sorted(listdir(test_dir)) == ["01 Sequence.dvk", "01 Sequence.txt",
+                "02 Sequence.dvk", "02 Sequence.txt",
+                "03 Sequence.dvk", "03 Sequence.txt"]
+    dvk = Dvk(join(test_dir, "02 Sequence.dvk"))
+    assert dvk.get_dvk_id() == "ID2"
+    assert dvk.get_sequence_number() == 2
+    with open(dvk.get_media_file()) as in_file:
+        assert in_file.read() == "Media 2"
+    assert dvks[1].get_dvk_file() == abspath(join(test_dir, "02 Sequence.dvk"))
+    # TEST WRITING INVALID DVKS
+    assert write_dvks([])
+    assert not write_dvks(None)
+
+def test_write_dvks_rollback():
+    """
+    Tests that write_dvks restores all files if any Dvk can't be written.
+    """
+    test_dir = get_test_dir()
+    dvks = create_test_dvks(test_dir)
+    contents = get_directory_contents(test_dir)
+    # TEST THAT FILES ARE RESTORED IF ONE DVK CAN'T BE WRITTEN
+    set_sequence(dvks, "Sequence", False)
+    # Block writing the last DVK file by putting a directory where its temporary file goes
+    blocked = get_temp_file(join(test_dir, "03 Sequence.dvk"))
+    mkdir(blocked)
+    assert not write_dvks(dvks, True, 1)
+    rmdir(blocked)
+    assert get_directory_contents(test_dir) == contents
+    # TEST THAT DVK FILE PATHS ARE RESTORED, BUT OTHER CHANGES ARE KEPT
+    assert dvks[0].get_dvk_file() == abspath(join(test_dir, "dvk1.dvk"))
+    assert dvks[0].get_media_file() == abspath(join(test_dir, "media1.txt"))
+    assert dvks[0].get_sequence_title() == "Sequence"
+    # TEST THAT NEW DVK FILES ARE REMOVED WHEN NOT RENAMING
+    new_dvk = Dvk()
+    new_dvk.set_dvk_file(join(test_dir, "new.dvk"))
+    new_dvk.set_dvk_id("ID4")
+    new_dvk.set_title("Title 4")
+    new_dvk.set_artist("Artist")
+    new_dvk.set_page_url("/url/")
+    new_dvk.set_media_file("media4.txt")
+    blocked = get_temp_file(join(test_dir, "dvk3.dvk"))
+    mkdir(blocked)
+    assert not write_dvks([dvks[0], new_dvk, dvks[2]], False, 1)
+    rmdir(blocked)
+    assert get_directory_contents(test_dir) == contents
+
+def test_write_dvks_invalid():
+    """
+    Tests that write_dvks skips Dvks that can't be written.
+    """
+    test_dir = get_test_dir()
+    dvks = create_test_dvks(test_dir)
+    set_sequence(dvks, "Sequence", False)
+    dvks[1].set_page_url(None)
+    assert write_dvks(dvks, False, 2)
+    assert Dvk(join(test_dir, "dvk1.dvk")).get_sequence_title() == "Sequence"
+    assert Dvk(join(test_dir, "dvk2.dvk")).get_sequence_title() is None
+    assert Dvk(join(test_dir, "dvk3.dvk")).get_sequence_title() == "Sequence"
+
+def test_write_media_files():
+    """
+    Tests the write_media_files function.
+    """
+    test_dir = get_test_dir()
+    server = LocalServer()
+    try:
+        server.add_page("/main.txt", b"Main", "text/plain")
+        server.add_page("/second.txt", b"Second", "text/plain")
+        # Create Dvks with valid and missing media
+        dvks = []
+        for i in range(0, 6):
+            dvk = Dvk()
+            dvk.set_dvk_file(join(test_dir, "dvk" + str(i) + ".dvk"))
+            dvk.set_dvk_id("ID" + str(i))
+            dvk.set_title("Title " + str(i))
+            dvk.set_artist("Artist")
+            dvk.set_page_url("/url/")
+            dvk.set_direct_url(server.get_url("/main.txt"))
+            dvk.set_media_file("media" + str(i) + ".txt")
+            dvks.append(dvk)
+        dvks[1].set_direct_url(server.get_url("/missing.txt"))
+        dvks[2].set_secondary_url(server.get_url("/second.txt"))
+        dvks[2].set_secondary_file("second.txt")
+        dvks[3].set_secondary_url("/invalid")
+        dvks[3].set_secondary_file("invalid.txt")
+        # Test downloading media for every Dvk at once
+        assert write_media_files(dvks, False, 4) == [True, False, True, False, True, True]
+        with open(join(test_dir, "media0.txt")) as in_file:
+            assert in_file.read() == "Main"
+        with open(join(test_dir, "second.txt")) as in_file:
+            assert in_file.read() == "Second"
+        # Test that files were removed if the secondary download failed
+        assert not exists(join(test_dir, "dvk3.dvk"))
+        assert not exists(join(test_dir, "media3.txt"))
+        assert len(server.requests) == 7
+        # Test writing invalid Dvks
+        assert write_media_files([]) == []
+        assert write_media_files(None) == []
+    finally:
+        server.close()
+
+def all_tests():
+    """
+    Runs all tests for the batch_write.py module.
+    """
+    test_run_batch()
+    test_move_files()
+    test_get_rename_plan()
+    test_write_dvks()
+    test_write_dvks_rollback()
+    test_write_dvks_invalid()
+    test_write_media_files()
@@ -1,10 +1,19 @@
 #!/usr/bin/env python3
 
 from dvk_archive.main.file.dvk import Dvk
+from dvk_archive.main.file.dvk import is_same_file_data
+from dvk_archive.main.processing.string_compare import AlphanumKey
 from dvk_archive.test.temp_dir import get_test_dir
 from dvk_archive.main.web.bs_connect import download
-from os import remove, mkdir, pardir, stat
+from dvk_archive.main.web.bs_connect import get_part_file
+from dvk_archive.main.web.bs_connect import set_scheduler
+from dvk_archive.main.web.request_scheduler import RequestScheduler
+from dvk_archive.test.web.local_server import LocalServer
+from json import loads
+from os import remove, mkdir, pardir, stat, utime
 from os.path import abspath, basename, exists, join
+from tracemalloc import get_traced_memory, start, stop
+from types import SimpleNamespace
 
 def test_can_write():
     """
@@ -151,6 +160,20 @@ def test_get_set_title():
     dvk = None
     assert read_dvk.get_title() == "Title #2"
 
+def test_get_title_key():
+    """
+    Tests the get_title_key method.
+    """
+    dvk = Dvk()
+    dvk.set_title("Title 10")
+    key = dvk.get_title_key()
+    assert key is dvk.get_title_key()
+    assert key == AlphanumKey("title 10")
+    # Test that the key is updated when the title changes
+    dvk.set_title("Title 2")
+    assert dvk.get_title_key() is not key
+    assert dvk.get_title_key() < key
+
 def test_get_set_artists():
     """
     Tests the get_artists, set_artist and set_artists methods.
@@ -500,6 +523,41 @@ def test_get_set_media_file():
     assert abspath(join(read_dvk.get_media_file(), pardir)) == test_dir
     assert basename(read_dvk.get_media_file()) == "media.png"
 
+def test_media_path_cache():
+    """
+    Tests that resolved media paths are cached until the Dvk's files change.
+    """
+    # TEST THAT MEDIA PATHS ARE RESOLVED ONCE
+    test_dir = get_test_dir()
+    dvk = Dvk()
+    dvk.set_dvk_file(join(test_dir, "cache.dvk"))
+    dvk.set_media_file("cache.txt")
+    dvk.set_secondary_file("cache.png")
+    media = dvk.get_media_file()
+    assert media == abspath(join(test_dir, "cache.txt"))
+    assert dvk.get_media_file() is media
+    assert dvk.get_dvk_directory() == test_dir
+    assert dvk.get_secondary_file() == abspath(join(test_dir, "cache.png"))
+    # TEST THAT PATHS UPDATE WHEN MEDIA FILES CHANGE
+    dvk.set_media_file("other.txt")
+    assert dvk.get_media_file() == abspath(join(test_dir, "other.txt"))
+    dvk.set_secondary_file("other.png")
+    assert dvk.get_secondary_file() == abspath(join(test_dir, "other.png"))
+    dvk.set_secondary_file(None)
+    assert dvk.get_secondary_file() is None
+    # TEST THAT PATHS UPDATE WHEN THE DVK FILE CHANGES
+    sub = abspath(join(test_dir, "sub"))
+    dvk.set_dvk_file(join(sub, "cache.dvk"))
+    assert dvk.get_dvk_directory() is None
+    assert dvk.get_media_file() is None
+    mkdir(sub)
+    assert dvk.get_dvk_directory() == sub
+    assert dvk.get_media_file() == abspath(join(sub, "other.txt"))
+    # TEST INVALID DVK FILE
+    dvk.set_dvk_file(None)
+    assert dvk.get_dvk_directory() is None
+    assert dvk.get_media_file() is None
+
 def test_get_set_secondary_file():
     """
     Tests the get_secondary_file and set_secondar_file methods.
@@ -1072,6 +1130,105 @@ def test_rename_files():
     assert exists(read_dvk.get_media_file())
     assert exists(read_dvk.get_secondary_file())
 
+def test_write_unchanged():
+    """
+    Tests that write_dvk skips writing when the DVK file wouldn't change.
+    """
+    # Write test Dvk
+    test_dir = get_test_dir()
+    dvk = Dvk()
+    dvk.set_dvk_file(join(test_dir, "unchanged.dvk"))
+    dvk.set_dvk_id("UNC1")
+    dvk.set_title("Title")
+    dvk.set_artist("Artist")
+    dvk.set_page_url("/url/")
+    dvk.set_media_file("media.txt")
+    assert not dvk.is_saved()
+    assert dvk.write_dvk()
+    assert dvk.is_saved()
+    assert exists(dvk.get_dvk_file())
+    # Test that rewriting the same data leaves the file untouched
+    utime(dvk.get_dvk_file(), ns=(1000000000, 1000000000))
+    read_dvk = Dvk(dvk.get_dvk_file())
+    assert read_dvk.is_saved()
+    read_dvk.write_dvk()
+    dvk.write_dvk()
+    assert stat(dvk.get_dvk_file()).st_mtime_ns == 1000000000
+    # Test that saved Dvks are skipped without checking the file
+    remove(dvk.get_dvk_file())
+    assert read_dvk.write_dvk()
+    assert not exists(dvk.get_dvk_file())
+    dvk.set_saved(False)
+    assert dvk.write_dvk()
+    assert exists(dvk.get_dvk_file())
+    # Test that setting a field to the same value leaves the file untouched
+    utime(dvk.get_dvk_file(), ns=(1000000000, 1000000000))
+    read_dvk.set_title("Title")
+    assert not read_dvk.is_saved()
+    assert read_dvk.write_dvk()
+    assert read_dvk.is_saved()
+    assert stat(dvk.get_dvk_file()).st_mtime_ns == 1000000000
+    # Test that a Dvk moved to a new DVK file is written
+    dvk.set_dvk_file(join(test_dir, "moved.dvk"))
+    assert not dvk.is_saved()
+    assert dvk.write_dvk()
+    assert exists(dvk.get_dvk_file())
+    dvk.set_dvk_file(read_dvk.get_dvk_file())
+    # Test that changed data is written
+    read_dvk.set_title("New Title")
+    read_dvk.write_dvk()
+    assert not stat(dvk.get_dvk_file()).st_mtime_ns == 1000000000
+    assert Dvk(dvk.get_dvk_file()).get_title() == "New Title"
+    # Test that a file with the same size but different data is written
+    utime(dvk.get_dvk_file(), ns=(1000000000, 1000000000))
+    read_dvk.set_title("Old Title")
+    read_dvk.write_dvk()
+    assert Dvk(dvk.get_dvk_file()).get_title() == "Old Title"
+    # Test the is_same_file_data function
+    with open(dvk.get_dvk_file(), "rb") as in_file:
+        data = in_file.read()
+    assert is_same_file_data(dvk.get_dvk_file(), data)
+    assert not is_same_file_data(dvk.get_dvk_file(), data + b" ")
+    assert not is_same_file_data(dvk.get_dvk_file(), data.replace(b"Old", b"New"))
+    assert not is_same_file_data(join(test_dir, "non-existant.dvk"), data)
+    assert not is_same_file_data(None, data)
+    assert not is_same_file_data(dvk.get_dvk_file(), None)
+
+def test_write_media_resume():
+    """
+    Tests that write_media resumes media downloads that were interrupted.
+    """
+    test_dir = get_test_dir()
+    server = LocalServer()
+    set_scheduler(RequestScheduler(retries=0))
+    try:
+        data = b"Media text. " * 20000
+        server.add_page("/media.txt", data, "text/plain",
+                    ranges=True, etag="\"tag\"", drops=[100000])
+        dvk = Dvk()
+        dvk.set_dvk_file(join(test_dir, "media.dvk"))
+        dvk.set_dvk_id("id123")
+        dvk.set_title("Title")
+        dvk.set_artist("artist")
+        dvk.set_page_url("/url/")
+        dvk.set_media_file("media.txt")
+        dvk.set_direct_url(server.get_url("/media.txt"))
+        # TEST THAT THE DVK IS REMOVED, BUT THE PARTIAL MEDIA IS KEPT
+        assert not dvk.write_media()
+        assert not exists(dvk.get_dvk_file())
+        assert not exists(dvk.get_media_file())
+        assert stat(get_part_file(dvk.get_media_file())).st_size == 65536
+        # TEST RESUMING THE DOWNLOAD
+        assert dvk.write_media()
+        assert server.requests[-1][2] == "bytes=65536-"
+        assert exists(dvk.get_dvk_file())
+        with open(dvk.get_media_file(), "rb") as in_file:
+            assert in_file.read() == data
+        assert not exists(get_part_file(dvk.get_media_file()))
+    finally:
+        set_scheduler()
+        server.close()
+
 def test_write_media():
     """
     Tests the write_media method
@@ -1334,6 +1491,75 @@ def test_update_extensions():
     assert basename(dvk.get_media_file()) == "image.jpg"
     assert basename(dvk.get_secondary_file()) == "text.txt"
 
+def test_memory_use():
+    """
+    Tests that loaded Dvks are stored compactly.
+    """
+    # Write test DVK files
+    test_dir = get_test_dir()
+    paths = []
+    for i in range(0, 2):
+        dvk = Dvk()
+        dvk.set_dvk_file(join(test_dir, str(i) + ".dvk"))
+        dvk.set_dvk_id("ID" + str(i))
+        dvk.set_title("Title " + str(i))
+        dvk.set_artists(["Artist A", "Artist B"])
+        dvk.set_web_tags(["Tag 1", "Tag 2", "Other Tag", "Rating:General"])
+        dvk.set_description("<p>Some description</p>")
+        dvk.set_page_url("https://example.com/page/" + str(i))
+        dvk.set_direct_url("https://example.com/direct/" + str(i) + ".png")
+        dvk.set_media_file(str(i) + ".png")
+        dvk.set_time_int(2020, 1, 1, 1, 1)
+        dvk.write_dvk()
+        paths.append(dvk.get_dvk_file())
+    # Test that Dvks have no per-instance dict
+    dvk = Dvk(paths[0])
+    assert not hasattr(dvk, "__dict__")
+    # Test that repeated artists and tags share the same strings
+    other = Dvk(paths[1])
+    assert dvk.get_artists()[0] is other.get_artists()[0]
+    assert dvk.get_web_tags()[3] is other.get_web_tags()[3]
+    # Test that modifying returned lists doesn't modify the Dvk
+    artists = dvk.get_artists()
+    artists.append("New")
+    assert dvk.get_artists() == ["Artist A", "Artist B"]
+    # Test that loaded Dvks use less memory than storing the same fields in a dict
+    start()
+    try:
+        memory = get_traced_memory()[0]
+        dvks = [Dvk(paths[i % 2]) for i in range(0, 200)]
+        slots_size = get_traced_memory()[0] - memory
+        memory = get_traced_memory()[0]
+        baseline = []
+        for i in range(0, 200):
+            with open(paths[i % 2], "rb") as in_file:
+                json = loads(in_file.read())
+            baseline.append(SimpleNamespace(dvk_file=paths[i % 2],
+                        dvk_id=json["id"],
+                        title=json["info"]["title"],
+                        artists=json["info"]["artists"],
+                        time=json["info"]["time"],
+                        web_tags=json["info"]["web_tags"],
+                        description=json["info"]["description"],
+                        page_url=json["web"]["page_url"],
+                        direct_url=json["web"]["direct_url"],
+                        secondary_url=None,
+                        media_file=json["file"]["media_file"],
+                        secondary_file=None,
+                        favorites=[],
+                        single=False,
+                        next_id=None,
+                        prev_id=None,
+                        seq_title=None,
+                        section_title=None,
+                        sequence_number=0,
+                        sequence_total=1))
+        dict_size = get_traced_memory()[0] - memory
+    finally:
+        stop()
+    assert len(dvks) == len(baseline)
+    assert slots_size < dict_size
+
 def all_tests():
     """
     Runs all tests for the Dvk class.
@@ -1342,6 +1568,7 @@ def all_tests():
     test_get_set_dvk_file()
     test_get_set_dvk_id()
     test_get_set_title()
+    test_get_title_key()
     test_get_set_artists()
     test_set_time_int()
     test_get_set_time()
@@ -1352,6 +1579,7 @@ def all_tests():
     test_get_set_secondary_url()
     test_get_set_media_file()
     test_get_set_secondary_file()
+    test_media_path_cache()
     test_get_set_favorites()
     test_get_set_single()
     test_get_set_next_id()
@@ -1368,5 +1596,8 @@ def all_tests():
     test_rename_files()
     test_delete_dvk()
     test_move_dvk()
+    test_write_unchanged()
     test_write_media()
+    test_write_media_resume()
     test_update_extensions()
+    test_memory_use()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+from os import remove, stat, utime
+from os.path import abspath, basename, exists, join
+from dvk_archive.test.temp_dir import get_test_dir
+from dvk_archive.main.file.dvk import Dvk
+from dvk_archive.main.file.dvk_catalog import CATALOG_NAME
+from dvk_archive.main.file.dvk_catalog import DvkCatalog
+from dvk_archive.main.file.dvk_catalog import is_catalog_file
+from dvk_archive.main.file.dvk_handler import DvkHandler
+
+def create_test_files() -> str:
+    """
+    Creates test DVK files to use in unit tests.
+
+    :return: Path of the main test directory
+    :rtype: str
+    """
+    test_dir = get_test_dir()
+    dvk = Dvk()
+    dvk.set_dvk_file(join(test_dir, "first.dvk"))
+    dvk.set_dvk_id("CAT1")
+    dvk.set_title("First")
+    dvk.set_artists(["Artist 1", "Artist 2"])
+    dvk.set_time_int(2020, 9, 4, 17, 13)
+    dvk.set_web_tags(["Tag 1", "Tag 2"])
+    dvk.set_description("<p>Description</p>")
+    dvk.set_page_url("/page/")
+    dvk.set_media_file("first.txt")
+    dvk.set_favorites(["User"])
+    dvk.set_next_id("CAT2")
+    dvk.set_sequence_title("Seq")
+    dvk.set_section_title("Section")
+    dvk.set_sequence_number(1)
+    dvk.set_sequence_total(2)
+    dvk.write_dvk()
+    dvk = Dvk()
+    dvk.set_dvk_file(join(test_dir, "second.dvk"))
+    dvk.set_dvk_id("CAT2")
+    dvk.set_title("Second")
+    dvk.set_artist("Artist 1")
+    dvk.set_page_url("/page/2")
+    dvk.set_media_file("second.txt")
+    dvk.write_dvk()
+    assert exists(join(test_dir, "first.dvk"))
+    assert exists(join(test_dir, "second.dvk"))
+    return test_dir
+
+def test_is_catalog_file():
+    """
+    Tests the is_catalog_file function.
+    """
+    assert is_catalog_file(CATALOG_NAME)
+    assert is_catalog_file(CATALOG_NAME + "-journal")
+    assert not is_catalog_file("file.sqlite")
+    assert not is_catalog_file("file.dvk")
+    assert not is_catalog_file(None)
+
+def test_load_dvks():
+    """
+    Tests the load_dvks method of the DvkCatalog class.
+    """
+    test_dir = create_test_files()
+    first = abspath(join(test_dir, "first.dvk"))
+    second = abspath(join(test_dir, "second.dvk"))
+    # TEST CREATING THE CATALOG ON THE FIRST LOAD
+    catalog = DvkCatalog(test_dir)
+    assert catalog.get_catalog_file() == abspath(join(test_dir, CATALOG_NAME))
+    assert exists(catalog.get_catalog_file())
+    dvks = catalog.load_dvks([second, first])
+    catalog.close_catalog()
+    assert len(dvks) == 2
+    assert dvks[0].get_title() == "Second"
+    assert dvks[1].get_title() == "First"
+    # TEST THAT UNCHANGED FILES ARE RESTORED FROM THE CATALOG
+    original = Dvk(first)
+    info = stat(first)
+    with open(first, "r") as in_file:
+        contents = in_file.read()
+    with open(first, "w") as out_file:
+        out_file.write(contents.replace("First", "Fired"))
+    utime(first, ns=(info.st_atime_ns, info.st_mtime_ns))
+    catalog = DvkCatalog(test_dir)
+    dvks = catalog.load_dvks([first, second])
+    catalog.close_catalog()
+    assert len(dvks) == 2
+    assert dvks[0].get_title() == "First"
+    assert dvks[0].get_dvk_file() == first
+    assert dvks[0].get_fields() == original.get_fields()
+    assert dvks[0].get_artists() == ["Artist 1", "Artist 2"]
+    assert dvks[0].get_web_tags() == ["Tag 1", "Tag 2"]
+    assert dvks[0].get_favorites() == ["User"]
+    assert dvks[0].get_media_file() == abspath(join(test_dir, "first.txt"))
+    assert dvks[1].get_title() == "Second"
+    # TEST THAT MODIFIED FILES ARE PARSED AGAIN
+    utime(first, ns=(info.st_atime_ns, info.st_mtime_ns + 5000000000))
+    catalog = DvkCatalog(test_dir)
+    dvks = catalog.load_dvks([first, second])
+    assert dvks[0].get_title() == "Fired"
+    # TEST THAT DELETED FILES ARE REMOVED FROM THE CATALOG
+    remove(second)
+    dvks = catalog.load_dvks([first])
+    assert len(dvks) == 1
+    assert dvks[0].get_title() == "Fired"
+    rows = catalog.connection.execute("SELECT path FROM dvks").fetchall()
+    assert rows == [(first,)]
+    catalog.close_catalog()
+    # TEST LOADING WITH INVALID PARAMETERS
+    catalog = DvkCatalog()
+    assert catalog.get_catalog_file() is None
+    assert catalog.load_dvks(None) == []
+    dvks = catalog.load_dvks([first, abspath(join(test_dir, "non-existant.dvk"))])
+    assert len(dvks) == 1
+    assert dvks[0].get_title() == "Fired"
+
+def test_handler_catalog():
+    """
+    Tests reading DVK files through a catalog with the DvkHandler.
+    """
+    test_dir = create_test_files()
+    dvk_handler = DvkHandler(test_dir, use_catalog=True)
+    assert exists(join(test_dir, CATALOG_NAME))
+    dvk_handler.sort_dvks("a")
+    assert dvk_handler.get_size() == 2
+    assert dvk_handler.get_dvk(0).get_title() == "First"
+    assert dvk_handler.get_dvk(1).get_title() == "Second"
+    # TEST READING AGAIN FROM THE EXISTING CATALOG
+    dvk_handler = DvkHandler(test_dir, 2, use_catalog=True)
+    dvk_handler.sort_dvks("a")
+    assert dvk_handler.get_size() == 2
+    assert dvk_handler.get_dvk(0).get_title() == "First"
+    assert basename(dvk_handler.get_dvk(1).get_dvk_file()) == "second.dvk"
+    assert dvk_handler.contains_media_file(abspath(join(test_dir, "second.txt")))
+
+def all_tests():
+    """
+    Runs all tests for the dvk_catalog.py module.
+    """
+    test_is_catalog_file()
+    test_load_dvks()
+    test_handler_catalog()
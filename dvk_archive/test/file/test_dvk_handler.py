@@ -1,11 +1,14 @@
 #!/usr/bin/env python3
 
-from os import mkdir, pardir, remove
+from os import mkdir, pardir, remove, walk
 from os.path import abspath, basename, exists, join
+from pickle import dumps, loads
 from dvk_archive.test.temp_dir import get_test_dir
 from dvk_archive.main.file.dvk import Dvk
 from dvk_archive.main.file.dvk_handler import DvkHandler
 from dvk_archive.main.file.dvk_handler import get_directories
+from dvk_archive.main.file.dvk_handler import load_dvk_files
+from dvk_archive.main.file.dvk_handler import scan_directory
 
 def create_test_files() -> str:
     """
@@ -176,6 +179,62 @@ def test_read_dvks():
     assert dvk_handler.get_dvk(2).get_title() == "TITLE 0.55"
     assert dvk_handler.get_dvk(3).get_title() == "Title 2"
 
+def test_load_dvk_files():
+    """
+    Tests the load_dvk_files function.
+    """
+    # Get paths of the test DVK files
+    test_dir = create_test_files()
+    paths = [abspath(join(test_dir, "main1.dvk")),
+                abspath(join(test_dir, "sub", "sub.dvk")),
+                abspath(join(test_dir, "main2.dvk")),
+                abspath(join(test_dir, "empty", "sub_empty", "sub_empty.dvk"))]
+    # Test loading DVK files on a single thread
+    dvks = list(load_dvk_files(paths))
+    assert len(dvks) == 4
+    assert dvks[0].get_title() == "Title 10"
+    assert dvks[1].get_title() == "title 0.55"
+    assert dvks[2].get_title() == "TITLE 0.55"
+    assert dvks[3].get_title() == "Title 2"
+    # Test that loading DVK files with threads keeps the given order
+    dvks = list(load_dvk_files(paths, 3))
+    assert len(dvks) == 4
+    assert dvks[0].get_title() == "Title 10"
+    assert dvks[1].get_title() == "title 0.55"
+    assert dvks[2].get_title() == "TITLE 0.55"
+    assert dvks[3].get_title() == "Title 2"
+    # Test that loading DVK files with processes keeps the given order
+    dvks = list(load_dvk_files(paths, 2, True))
+    assert len(dvks) == 4
+    assert dvks[0].get_dvk_id() == "MAN123"
+    assert dvks[1].get_dvk_id() == "SUB1"
+    assert dvks[2].get_dvk_id() == "MAN123"
+    assert dvks[3].get_dvk_id() == "SBE1"
+    assert dvks[3].get_dvk_file() == paths[3]
+    # Test loading DVKs into a DvkHandler with multiple workers
+    dvk_handler = DvkHandler(test_dir, 4)
+    assert dvk_handler.get_workers() == 4
+    dvk_handler.sort_dvks("a")
+    assert dvk_handler.get_size() == 4
+    assert dvk_handler.get_dvk(0).get_title() == "title 0.55"
+    assert dvk_handler.get_dvk(1).get_title() == "TITLE 0.55"
+    assert dvk_handler.get_dvk(2).get_title() == "Title 2"
+    assert dvk_handler.get_dvk(3).get_title() == "Title 10"
+    # Test that invalid files are skipped
+    with open(abspath(join(test_dir, "invalid.dvk")), "w") as out_file:
+        out_file.write("Not JSON")
+    dvk_handler.set_workers(2, True)
+    dvk_handler.read_dvks(test_dir)
+    assert dvk_handler.get_size() == 4
+    # Test loading invalid lists of paths
+    assert list(load_dvk_files(None, 4)) == []
+    assert list(load_dvk_files([], 4)) == []
+    # Test setting invalid numbers of workers
+    dvk_handler.set_workers(0)
+    assert dvk_handler.get_workers() == 1
+    dvk_handler.set_workers(None)
+    assert dvk_handler.get_workers() == 1
+
 def test_get_directories():
     """
     Tests the get_directories function.
@@ -210,6 +269,52 @@ def test_get_directories():
     dirs = get_directories(join(test_dir, "notreal"))
     assert len(dirs) == 0
 
+def test_scan_directory():
+    """
+    Tests the scan_directory function.
+    """
+    # CREATE TEST FILES
+    test_dir = create_test_files()
+    main_sub = abspath(join(test_dir, "sub"))
+    empty = abspath(join(test_dir, "empty"))
+    sub_empty = abspath(join(empty, "sub_empty"))
+    with open(join(test_dir, "main.txt"), "w") as out_file:
+        out_file.write("media")
+    # TEST THAT DIRECTORIES ARE SCANNED IN THE SAME ORDER AS OS.WALK
+    scan = list(scan_directory(test_dir))
+    assert [item[0] for item in scan] == [abspath(item[0]) for item in walk(test_dir)]
+    # TEST THAT DVK FILES AND OTHER FILES ARE SEPARATED
+    scan = sorted(scan, key=lambda item: item[0])
+    assert scan[0][0] == test_dir
+    assert sorted(scan[0][1]) == [join(test_dir, "main1.dvk"), join(test_dir, "main2.dvk")]
+    assert [entry.name for entry in scan[0][2]] == ["main.txt"]
+    assert scan[0][2][0].stat().st_size == 5
+    assert scan[1][0] == empty
+    assert scan[1][1] == []
+    assert scan[1][2] == []
+    assert scan[2][0] == sub_empty
+    assert scan[2][1] == [join(sub_empty, "sub_empty.dvk")]
+    assert scan[4][0] == main_sub
+    assert scan[4][1] == [join(main_sub, "sub.dvk")]
+    # TEST SCANNING WITHOUT SUBDIRECTORIES
+    scan = list(scan_directory(test_dir, False))
+    assert len(scan) == 1
+    assert scan[0][0] == test_dir
+    # TEST GETTING THE SCAN FROM THE DVK HANDLER
+    dvk_handler = DvkHandler(test_dir, keep_scan=True)
+    scan = sorted(dvk_handler.get_scan(), key=lambda item: item[0])
+    assert [item[0] for item in scan] == [test_dir, sub_empty, main_sub]
+    # TEST THAT THE SCAN ISN'T KEPT UNLESS ASKED FOR
+    dvk_handler = DvkHandler(test_dir)
+    assert dvk_handler.get_scan() == []
+    dvk_handler.read_dvks(test_dir, keep_scan=True)
+    assert len(dvk_handler.get_scan()) == 3
+    dvk_handler.read_dvks(test_dir)
+    assert dvk_handler.get_scan() == []
+    # TEST SCANNING INVALID DIRECTORIES
+    assert list(scan_directory(None)) == []
+    assert list(scan_directory(join(test_dir, "notreal"))) == []
+
 def test_sort_title():
     """
     Tests the sort_dvks method when sorting alphabetically by title.
@@ -293,6 +398,11 @@ def test_add_dvk():
     assert read_dvk.get_dvk_id() == "NEW123"
     assert read_dvk.get_title() == "Other"
     assert read_dvk.get_artists() == ["Person"]
+    # TEST ITERATING OVER DVKS
+    dvks = list(dvk_handler.iter_dvks())
+    assert len(dvks) == 2
+    assert dvks[0] is dvk_handler.get_dvk(0)
+    assert dvks[1] is dvk_handler.get_dvk(1)
     # TEST ADDING INVALID DVK
     dvk_handler.add_dvk(None)
     assert dvk_handler.get_size() == 2
@@ -545,12 +655,162 @@ def test_contains_media_file():
     assert not dvk_handler.contains_media_file("/non/existant/file.txt")
     assert not dvk_handler.contains_media_file(None)
 
+def test_indexes():
+    """
+    Tests that lookup indexes stay consistent as the Dvk list changes.
+    """
+    # CREATE TEST FILES
+    test_dir = get_test_dir()
+    dvk = Dvk()
+    dvk.set_dvk_file(join(test_dir, "first.dvk"))
+    dvk.set_dvk_id("IDX1")
+    dvk.set_title("First")
+    dvk.set_artist("Artist")
+    dvk.set_page_url("/page/1")
+    dvk.set_direct_url("/direct/1")
+    dvk.set_media_file("first.txt")
+    dvk.write_dvk()
+    dvk.set_dvk_file(join(test_dir, "second.dvk"))
+    dvk.set_dvk_id("IDX2")
+    dvk.set_title("Second")
+    dvk.set_page_url("/page/2")
+    dvk.set_direct_url("/direct/2")
+    dvk.set_secondary_url("/secondary/2")
+    dvk.set_media_file("second.txt")
+    dvk.set_secondary_file("second.png")
+    dvk.write_dvk()
+    dvk_handler = DvkHandler(test_dir)
+    dvk_handler.sort_dvks("a")
+    assert dvk_handler.get_dvk_by_id("idx1") == 0
+    assert dvk_handler.get_dvk_by_id("IDX2") == 1
+    assert dvk_handler.contains_direct_url("/SECONDARY/2")
+    # TEST INDEXES AFTER SORTING
+    dvk_handler.sort_dvks("t")
+    dvk_handler.get_dvk(0).set_time("2020/01/01|00:00")
+    dvk_handler.get_dvk(1).set_time("2010/01/01|00:00")
+    dvk_handler.sort_dvks("t")
+    assert dvk_handler.get_dvk_by_id("IDX1") == 1
+    assert dvk_handler.get_dvk_by_id("IDX2") == 0
+    # TEST INDEXES AFTER ADDING A DVK
+    dvk = Dvk()
+    dvk.set_dvk_file(join(test_dir, "third.dvk"))
+    dvk.set_dvk_id("IDX3")
+    dvk.set_title("Third")
+    dvk.set_artist("Artist")
+    dvk.set_page_url("/page/3")
+    dvk.set_media_file("third.txt")
+    dvk_handler.add_dvk(dvk)
+    assert dvk_handler.get_dvk_by_id("IDX3") == 2
+    assert dvk_handler.contains_page_url("/PAGE/3")
+    assert dvk_handler.contains_media_file(join(test_dir, "third.txt"))
+    # TEST INDEXES AFTER SETTING A DVK
+    dvk = Dvk()
+    dvk.set_dvk_file(join(test_dir, "replace.dvk"))
+    dvk.set_dvk_id("IDX1")
+    dvk.set_title("Replace")
+    dvk.set_artist("Artist")
+    dvk.set_page_url("/page/replace")
+    dvk.set_media_file("replace.txt")
+    dvk_handler.set_dvk(dvk, 0)
+    assert dvk_handler.get_dvk_by_id("IDX1") == 0
+    assert dvk_handler.get_dvk_by_id("IDX2") == -1
+    assert not dvk_handler.contains_page_url("/page/2")
+    assert not dvk_handler.contains_direct_url("/secondary/2")
+    assert not dvk_handler.contains_media_file(join(test_dir, "second.png"))
+    assert dvk_handler.contains_page_url("/page/replace")
+    assert dvk_handler.contains_page_url("/page/1")
+    # TEST INDEXES AFTER REMOVING A DVK
+    dvk_handler.remove_dvk(0)
+    assert dvk_handler.get_dvk_by_id("IDX1") == 0
+    assert dvk_handler.get_dvk_by_id("IDX3") == 1
+    assert not dvk_handler.contains_page_url("/page/replace")
+    # TEST INDEXES AFTER MODIFYING A DVK IN PLACE
+    dvk_handler.get_dvk(1).set_dvk_id("IDX4")
+    assert dvk_handler.get_dvk_by_id("IDX3") == -1
+    assert dvk_handler.get_dvk_by_id("IDX4") == 1
+    dvk_handler.get_dvk(1).set_page_url("/page/4")
+    assert not dvk_handler.contains_page_url("/page/3")
+    assert dvk_handler.contains_page_url("/page/4")
+    dvk_handler.get_dvk(1).set_direct_url("/direct/4")
+    assert dvk_handler.contains_direct_url("/direct/4")
+    dvk_handler.get_dvk(1).set_media_file("fourth.txt")
+    assert not dvk_handler.contains_media_file(join(test_dir, "third.txt"))
+    assert dvk_handler.contains_media_file(join(test_dir, "fourth.txt"))
+    dvk_handler.get_dvk(1).set_dvk_file(join(test_dir, "sub", "fourth.dvk"))
+    mkdir(join(test_dir, "sub"))
+    assert dvk_handler.contains_media_file(join(test_dir, "sub", "fourth.txt"))
+    # TEST THAT MODIFYING A DVK IN PLACE ONLY UPDATES ITS OWN ENTRIES
+    indexes = dvk_handler.indexes
+    dvk_handler.get_dvk(0).set_dvk_id("IDX6")
+    assert dvk_handler.get_dvk_by_id("IDX6") == 0
+    assert dvk_handler.get_dvk_by_id("IDX4") == 1
+    assert dvk_handler.indexes is indexes
+    # TEST THAT MODIFYING A DVK THAT ISN'T INDEXED KEEPS THE INDEXES
+    dvk = Dvk()
+    dvk.set_dvk_id("IDX5")
+    assert dvk_handler.get_dvk_by_id("IDX5") == -1
+    assert dvk_handler.indexes is indexes
+    # TEST THAT REMOVED DVKS NO LONGER UPDATE THE INDEXES
+    dvk = dvk_handler.get_dvk(0)
+    dvk_handler.remove_dvk(0)
+    assert dvk.get_handler() is None
+    assert dvk_handler.get_dvk_by_id("IDX4") == 0
+    indexes = dvk_handler.indexes
+    dvk.set_dvk_id("IDX7")
+    assert dvk_handler.get_dvk_by_id("IDX4") == 0
+    assert dvk_handler.indexes is indexes
+
+def test_separate_indexes():
+    """
+    Tests that modifying a Dvk in one DvkHandler doesn't rebuild another's indexes.
+    """
+    # CREATE TWO HANDLERS WITH THEIR OWN DVKS
+    test_dir = get_test_dir()
+    handlers = [DvkHandler(), DvkHandler()]
+    for i in range(0, 2):
+        for j in range(0, 3):
+            dvk = Dvk()
+            dvk.set_dvk_file(join(test_dir, str(i) + "-" + str(j) + ".dvk"))
+            dvk.set_dvk_id("ID" + str(i) + "-" + str(j))
+            dvk.set_title("Title")
+            dvk.set_artist("Artist")
+            dvk.set_page_url("/page/" + str(i) + "/" + str(j))
+            dvk.set_media_file(str(i) + "-" + str(j) + ".txt")
+            handlers[i].add_dvk(dvk)
+        assert handlers[i].get_dvk_by_id("ID" + str(i) + "-0") == 0
+    first = handlers[0].indexes
+    second = handlers[1].indexes
+    # TEST THAT EDITS ONLY UPDATE THE OWNING HANDLER
+    handlers[0].get_dvk(1).set_dvk_id("NEW")
+    handlers[0].get_dvk(1).set_page_url("/new/")
+    assert handlers[1].get_dvk_by_id("ID1-1") == 1
+    assert handlers[1].indexes is second
+    assert handlers[0].get_dvk_by_id("NEW") == 1
+    assert handlers[0].get_dvk_by_id("ID0-1") == -1
+    assert handlers[0].contains_page_url("/NEW/")
+    assert not handlers[0].contains_page_url("/page/0/1")
+    assert handlers[0].indexes is first
+    assert handlers[1].get_dvk_by_id("NEW") == -1
+    # TEST THAT A DVK MOVED TO ANOTHER HANDLER UPDATES THE NEW HANDLER
+    dvk = handlers[0].get_dvk(2)
+    handlers[1].set_dvk(dvk, 0)
+    assert dvk.get_handler() is handlers[1]
+    dvk.set_dvk_id("MOVED")
+    assert handlers[1].get_dvk_by_id("MOVED") == 0
+    assert handlers[0].get_dvk_by_id("MOVED") == 2
+    # TEST THAT PICKLED DVKS AREN'T INDEXED
+    copy = loads(dumps(dvk))
+    assert copy.get_dvk_id() == "MOVED"
+    assert copy.get_handler() is None
+
 def all_tests():
     """
     Runs all tests for the DvkHandler class.
     """
     test_read_dvks()
+    test_load_dvk_files()
     test_get_directories()
+    test_scan_directory()
     test_sort_title()
     test_sort_time()
     test_add_dvk()
@@ -561,3 +821,5 @@ def all_tests():
     test_contains_page_url()
     test_contains_direct_url()
     test_contains_media_file()
+    test_indexes()
+    test_separate_indexes()
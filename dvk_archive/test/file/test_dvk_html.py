@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+from dvk_archive.main.file import dvk_html
 from dvk_archive.main.file.dvk import Dvk
 from dvk_archive.main.file.dvk_html import create_css
 from dvk_archive.main.file.dvk_html import get_dvk_header_html
@@ -8,17 +9,23 @@ from dvk_archive.main.file.dvk_html import get_dvk_info_html
 from dvk_archive.main.file.dvk_html import get_file_as_url
 from dvk_archive.main.file.dvk_html import get_media_html
 from dvk_archive.main.file.dvk_html import get_navbar_html
+from dvk_archive.main.file.dvk_html import get_page_filename
+from dvk_archive.main.file.dvk_html import get_page_hash
 from dvk_archive.main.file.dvk_html import get_page_link_html
 from dvk_archive.main.file.dvk_html import get_tag_info_html
 from dvk_archive.main.file.dvk_html import get_temp_directory
 from dvk_archive.main.file.dvk_html import get_time_string
 from dvk_archive.main.file.dvk_html import is_image_extension
 from dvk_archive.main.file.dvk_html import list_to_lines
+from dvk_archive.main.file.dvk_html import read_manifest
+from dvk_archive.main.file.dvk_html import read_text_media
 from dvk_archive.main.file.dvk_html import write_dvk_html
 from dvk_archive.main.file.dvk_html import write_dvk_html_list
+from dvk_archive.main.file.dvk_html import write_manifest
 from dvk_archive.test.temp_dir import get_test_dir
-from os import pardir
+from os import mkdir, pardir, stat
 from os.path import abspath, basename, exists, isdir, join
+from stat import S_IMODE
 
 def test_get_file_as_url():
     """
@@ -55,6 +62,22 @@ def test_get_temp_directory():
     temp_dir = get_temp_directory(True)
     assert exists(temp_dir)
     assert not exists(file)
+    # Test that each archive gets its own private directory
+    test_dir = get_test_dir()
+    archive_dir = get_temp_directory(True, join(test_dir, "archive"))
+    other_dir = get_temp_directory(True, join(test_dir, "other"))
+    assert exists(archive_dir)
+    assert exists(other_dir)
+    assert not archive_dir == other_dir
+    assert abspath(join(archive_dir, pardir)) == temp_dir
+    assert get_temp_directory(False, join(test_dir, "archive", "")) == archive_dir
+    assert S_IMODE(stat(archive_dir).st_mode) == 0o700
+    # Test that deleting one archive's directory leaves the other alone
+    file = abspath(join(other_dir, "file.txt"))
+    with open(file, "w") as out_file:
+        out_file.write("TEST")
+    get_temp_directory(True, join(test_dir, "archive"))
+    assert exists(file)
 
 def test_list_to_lines():
     """
@@ -478,6 +501,224 @@ def test_write_dvk_html_list():
     assert write_dvk_html_list([]) == []
     assert write_dvk_html_list(None) == []
 
+def test_get_page_filename():
+    """
+    Tests the get_page_filename function.
+    """
+    test_dir = get_test_dir()
+    dvk = Dvk()
+    dvk.set_dvk_file(join(test_dir, "dvk.dvk"))
+    dvk.set_dvk_id("ID123")
+    filename = get_page_filename(dvk)
+    assert filename.endswith(".html")
+    assert len(filename) == 21
+    # Test that pages are named by the DVK file
+    other = Dvk()
+    other.set_dvk_file(join(test_dir, "dvk.dvk"))
+    assert get_page_filename(other) == filename
+    other.set_dvk_file(join(test_dir, "other.dvk"))
+    other.set_dvk_id("ID123")
+    assert not get_page_filename(other) == filename
+    # Test that Dvks without DVK files are named by ID
+    dvk.set_dvk_file(None)
+    assert not get_page_filename(dvk) == filename
+    other.set_dvk_file(None)
+    assert get_page_filename(dvk) == get_page_filename(other)
+    # Test getting filenames for Dvks without files or IDs
+    dvk.set_dvk_id(None)
+    assert get_page_filename(dvk) == ""
+    assert get_page_filename(None) == ""
+
+def test_get_page_hash():
+    """
+    Tests the get_page_hash function.
+    """
+    test_dir = get_test_dir()
+    dvk = Dvk()
+    dvk.set_dvk_file(join(test_dir, "dvk.dvk"))
+    dvk.set_title("Title")
+    dvk.set_media_file("media.txt")
+    with open(dvk.get_media_file(), "w") as out_file:
+        out_file.write("Text")
+    page_hash = get_page_hash(dvk, "css", "/prev.html", "/next.html")
+    assert page_hash == get_page_hash(dvk, "css", "/prev.html", "/next.html")
+    # Test that the hash changes when any input changes
+    assert not page_hash == get_page_hash(dvk, "new", "/prev.html", "/next.html")
+    assert not page_hash == get_page_hash(dvk, "css", None, "/next.html")
+    assert not page_hash == get_page_hash(dvk, "css", "/prev.html", None)
+    dvk.set_title("New")
+    assert not page_hash == get_page_hash(dvk, "css", "/prev.html", "/next.html")
+    dvk.set_title("Title")
+    with open(dvk.get_media_file(), "w") as out_file:
+        out_file.write("New Text")
+    assert not page_hash == get_page_hash(dvk, "css", "/prev.html", "/next.html")
+    # Test that the hash changes when the page version changes
+    page_hash = get_page_hash(dvk, "css", "/prev.html", "/next.html")
+    version = dvk_html.PAGE_VERSION
+    try:
+        dvk_html.PAGE_VERSION = version + 1
+        assert not page_hash == get_page_hash(dvk, "css", "/prev.html", "/next.html")
+    finally:
+        dvk_html.PAGE_VERSION = version
+    assert page_hash == get_page_hash(dvk, "css", "/prev.html", "/next.html")
+    # Test getting hash with invalid Dvk
+    assert get_page_hash(None) == ""
+
+def test_manifest():
+    """
+    Tests the read_manifest and write_manifest functions.
+    """
+    test_dir = get_test_dir()
+    assert read_manifest(test_dir) == dict()
+    assert write_manifest(test_dir, {"0.html":"abc", "1.html":"def"})
+    assert read_manifest(test_dir) == {"0.html":"abc", "1.html":"def"}
+    # Test reading an invalid manifest
+    with open(join(test_dir, "dvk_manifest.json"), "w") as out_file:
+        out_file.write("Not JSON")
+    assert read_manifest(test_dir) == dict()
+    assert read_manifest(None) == dict()
+    assert not write_manifest(None, dict())
+    assert not write_manifest(test_dir, None)
+
+def test_write_dvk_html_list_incremental():
+    """
+    Tests that write_dvk_html_list only writes pages that changed.
+    """
+    # Create test Dvks
+    test_dir = get_test_dir()
+    dvks = []
+    for i in range(0, 4):
+        dvk = Dvk()
+        dvk.set_dvk_file(join(test_dir, "dvk" + str(i) + ".dvk"))
+        dvk.set_title("Title " + str(i))
+        dvk.set_artist("Artist")
+        dvks.append(dvk)
+    paths = write_dvk_html_list(dvks, True)
+    temp_dir = abspath(join(paths[0], pardir))
+    assert temp_dir == get_temp_directory(False, test_dir)
+    assert len(read_manifest(temp_dir)) == 4
+    for i in range(0, 4):
+        assert basename(paths[i]) == get_page_filename(dvks[i])
+    # Mark pages to check whether they are written again
+    for path in paths:
+        with open(path, "a") as out_file:
+            out_file.write("UNCHANGED")
+    # Test that unchanged pages aren't written again
+    assert write_dvk_html_list(dvks, False) == paths
+    for path in paths:
+        with open(path) as in_file:
+            assert in_file.read().endswith("UNCHANGED")
+    # Test that only changed pages are written again
+    dvks[1].set_title("New Title")
+    write_dvk_html_list(dvks, False)
+    with open(paths[0]) as in_file:
+        assert in_file.read().endswith("UNCHANGED")
+    with open(paths[1]) as in_file:
+        contents = in_file.read()
+    assert not contents.endswith("UNCHANGED")
+    assert "New Title" in contents
+    with open(paths[2]) as in_file:
+        assert in_file.read().endswith("UNCHANGED")
+    # Test that removing a Dvk only rewrites its neighbors and removes its page
+    new_paths = write_dvk_html_list([dvks[0], dvks[2], dvks[3]], False)
+    assert new_paths == [paths[0], paths[2], paths[3]]
+    with open(paths[0]) as in_file:
+        contents = in_file.read()
+    assert not contents.endswith("UNCHANGED")
+    assert basename(paths[2]) + "\">NEXT &gt;</a>" in contents
+    with open(paths[2]) as in_file:
+        assert basename(paths[0]) + "\">&lt; PREV</a>" in in_file.read()
+    with open(paths[3]) as in_file:
+        assert in_file.read().endswith("UNCHANGED")
+    assert not exists(paths[1])
+    assert sorted(read_manifest(temp_dir).keys()) == sorted([basename(path) for path in new_paths])
+    # Test that pages for another archive are kept separately
+    other_dir = join(test_dir, "other")
+    mkdir(other_dir)
+    other = Dvk()
+    other.set_dvk_file(join(other_dir, "other.dvk"))
+    other.set_title("Other")
+    other.set_artist("Artist")
+    other_paths = write_dvk_html_list([other], True)
+    assert not abspath(join(other_paths[0], pardir)) == temp_dir
+    with open(paths[3]) as in_file:
+        assert in_file.read().endswith("UNCHANGED")
+    # Test that deleting the directory writes every page
+    write_dvk_html_list(dvks, True)
+    with open(paths[3]) as in_file:
+        assert not in_file.read().endswith("UNCHANGED")
+    assert exists(join(temp_dir, "dvk_style.css"))
+    assert exists(other_paths[0])
+
+def test_read_text_media():
+    """
+    Tests the read_text_media function.
+    """
+    test_dir = get_test_dir()
+    file = join(test_dir, "text.txt")
+    # Test reading UTF-8 text
+    with open(file, "wb") as out_file:
+        out_file.write("Ünicode ✓".encode("utf-8"))
+    assert read_text_media(file) == "Ünicode ✓"
+    # Test reading text that isn't valid UTF-8
+    with open(file, "wb") as out_file:
+        out_file.write("Caf\u00e9".encode("iso-8859-1"))
+    assert read_text_media(file) == "Caf\u00e9"
+    # Test reading text with byte order marks
+    with open(file, "wb") as out_file:
+        out_file.write(b"\xef\xbb\xbf" + "Marked ✓".encode("utf-8"))
+    assert read_text_media(file) == "Marked ✓"
+    with open(file, "wb") as out_file:
+        out_file.write("Wide ✓".encode("utf-16"))
+    assert read_text_media(file) == "Wide ✓"
+    # Test that line endings are normalized
+    with open(file, "wb") as out_file:
+        out_file.write(b"One\r\nTwo\rThree\n")
+    assert read_text_media(file) == "One\nTwo\nThree\n"
+    # Test reading invalid files
+    assert read_text_media(join(test_dir, "missing.txt")) is None
+    assert read_text_media(None) is None
+
+def test_write_dvk_html_list_parallel():
+    """
+    Tests writing HTML files for a list of Dvks with multiple processes.
+    """
+    test_dir = get_test_dir()
+    dvks = []
+    for i in range(0, 12):
+        dvk = Dvk()
+        dvk.set_dvk_file(join(test_dir, "dvk" + str(i) + ".dvk"))
+        dvk.set_title("Title " + str(i))
+        dvk.set_artist("Artist")
+        dvk.set_media_file("text" + str(i) + ".txt")
+        with open(dvk.get_media_file(), "w") as out_file:
+            out_file.write("Story " + str(i))
+        dvks.append(dvk)
+    # Get pages written by a single process
+    paths = write_dvk_html_list(dvks, True)
+    contents = []
+    for path in paths:
+        with open(path) as in_file:
+            contents.append(in_file.read())
+    # Test that pages written in parallel are the same and in order
+    assert write_dvk_html_list(dvks, True, 4) == paths
+    for i in range(0, 12):
+        with open(paths[i]) as in_file:
+            assert in_file.read() == contents[i]
+    assert "Story 5" in contents[5]
+    assert basename(paths[4]) + "\">&lt; PREV</a>" in contents[5]
+    assert basename(paths[6]) + "\">NEXT &gt;</a>" in contents[5]
+    # Test writing only changed pages in parallel
+    dvks[3].set_title("New Title")
+    dvks[8].set_title("Other Title")
+    assert write_dvk_html_list(dvks, False, 4) == paths
+    with open(paths[3]) as in_file:
+        assert "New Title" in in_file.read()
+    with open(paths[8]) as in_file:
+        assert "Other Title" in in_file.read()
+    with open(paths[4]) as in_file:
+        assert in_file.read() == contents[4]
+
 def all_tests():
     """
     Runs all tests for the dvk_html.py module.
@@ -497,3 +738,9 @@ def all_tests():
     test_get_dvk_html()
     test_write_dvk_html()
     test_write_dvk_html_list()
+    test_get_page_filename()
+    test_get_page_hash()
+    test_manifest()
+    test_write_dvk_html_list_incremental()
+    test_read_text_media()
+    test_write_dvk_html_list_parallel()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+from dvk_archive.main.file.dvk import Dvk
+from dvk_archive.main.file.dvk_handler import DvkHandler
+from dvk_archive.main.file.sequence_graph import SequenceGraph
+from dvk_archive.main.file.sequencing import get_sequence
+from dvk_archive.test.temp_dir import get_test_dir
+from os.path import join
+
+def create_test_handler() -> DvkHandler:
+    """
+    Creates a DvkHandler with linked Dvks for testing the SequenceGraph.
+    Index 0-2 form a valid sequence, 3-4 form a loop, 5-6 link to missing Dvks,
+    7 is a single, and 8-9 both link to index 0.
+
+    :return: DvkHandler with test Dvks
+    :rtype: DvkHandler
+    """
+    test_dir = get_test_dir()
+    # ID, PREV ID, NEXT ID
+    links = [["SEQ01", "non", "SEQ02"],
+                ["SEQ02", "SEQ01", "SEQ03"],
+                ["SEQ03", "SEQ02", "non"],
+                ["LOP01", "LOP02", "LOP02"],
+                ["LOP02", "LOP01", "LOP01"],
+                ["ORP01", "MISSING", "ORP02"],
+                ["ORP02", "ORP01", "MISSING"],
+                ["SNG01", None, None],
+                ["FRK01", None, "SEQ01"],
+                ["FRK02", None, "SEQ01"]]
+    dvk_handler = DvkHandler()
+    for link in links:
+        dvk = Dvk()
+        dvk.set_dvk_file(join(test_dir, link[0] + ".dvk"))
+        dvk.set_dvk_id(link[0])
+        dvk.set_title(link[0])
+        dvk.set_artist("Artist")
+        dvk.set_page_url("/url/")
+        dvk.set_media_file("media.txt")
+        dvk.set_prev_id(link[1])
+        dvk.set_next_id(link[2])
+        dvk_handler.add_dvk(dvk)
+    assert dvk_handler.get_size() == 10
+    return dvk_handler
+
+def test_get_sequence():
+    """
+    Tests the get_sequence method.
+    """
+    dvk_handler = create_test_handler()
+    graph = SequenceGraph(dvk_handler)
+    assert graph.get_size() == 10
+    # TEST THAT SEQUENCES MATCH THOSE FROM THE DVK HANDLER
+    for index in range(0, dvk_handler.get_size()):
+        assert graph.get_sequence(index) == get_sequence(dvk_handler, index)
+    assert graph.get_sequence(0) == [0,1,2]
+    assert graph.get_sequence(3) == [3,4,3,4,3]
+    assert graph.get_sequence(7) == [7]
+    assert graph.get_sequence(8) == [8,0,1,2]
+    # TEST GETTING SEQUENCE WITH INVALID INDEXES
+    assert graph.get_sequence(10) == []
+    assert graph.get_sequence(-1) == []
+    assert graph.get_sequence(None) == []
+    assert SequenceGraph().get_sequence(0) == []
+
+def test_get_sequences():
+    """
+    Tests the get_sequences method.
+    """
+    graph = SequenceGraph(create_test_handler())
+    sequences = graph.get_sequences()
+    assert sequences == [[0,1,2], [3,4,3,4,3], [5,6], [7], [8,0,1,2], [9,0,1,2]]
+    assert SequenceGraph().get_sequences() == []
+
+def test_get_orphans():
+    """
+    Tests the get_orphans method.
+    """
+    graph = SequenceGraph(create_test_handler())
+    assert graph.get_orphans() == [5,6]
+    assert SequenceGraph().get_orphans() == []
+
+def test_get_forks():
+    """
+    Tests the get_forks method.
+    """
+    graph = SequenceGraph(create_test_handler())
+    assert graph.get_forks() == [0]
+    assert SequenceGraph().get_forks() == []
+
+def test_get_cycles():
+    """
+    Tests the get_cycles method.
+    """
+    graph = SequenceGraph(create_test_handler())
+    assert graph.get_cycles() == [[3,4]]
+    assert SequenceGraph().get_cycles() == []
+
+def all_tests():
+    """
+    Runs all tests for the sequence_graph.py module.
+    """
+    test_get_sequence()
+    test_get_sequences()
+    test_get_orphans()
+    test_get_forks()
+    test_get_cycles()
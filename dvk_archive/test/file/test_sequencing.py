@@ -346,6 +346,33 @@ def test_get_default_sequence_order():
     dvk_handler = DvkHandler()
     assert get_default_sequence_order(dvk_handler) == []
     assert get_default_sequence_order(None) == []
+
+def test_default_order_multiple_sequences():
+    """
+    Tests the get_default_sequence_order function with multiple existing sequences.
+    """
+    # Create test files
+    test_dir = get_test_dir()
+    dvk = Dvk()
+    dvk.set_artist("artist")
+    dvk.set_page_url("/url/")
+    dvk.set_media_file("media.txt")
+    for i in range(1, 7):
+        dvk.set_dvk_file(join(test_dir, str(i) + ".dvk"))
+        dvk.set_dvk_id("ID" + str(i))
+        dvk.set_title("Title " + str(i))
+        dvk.write_dvk()
+    dvk_handler = DvkHandler(test_dir)
+    dvk_handler.sort_dvks("a")
+    assert dvk_handler.get_size() == 6
+    # Test that later sequences are placed first, followed by the remaining Dvks
+    set_sequence_from_indexes(dvk_handler, [4, 0])
+    set_sequence_from_indexes(dvk_handler, [1, 3])
+    dvks = get_default_sequence_order(dvk_handler, True)
+    titles = []
+    for dvk in dvks:
+        titles.append(dvk.get_title())
+    assert titles == ["Title 2", "Title 4", "Title 5", "Title 1", "Title 3", "Title 6"]
     
 
 def test_remove_sequence_info():
@@ -544,6 +571,7 @@ def all_tests():
     test_set_sequence_from_indexes()
     test_get_sequence()
     test_get_default_sequence_order()
+    test_default_order_multiple_sequences()
     test_remove_sequence_info()
     test_separate_into_sections()
     
@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 
+from functools import cmp_to_key
+from dvk_archive.main.processing.string_compare import AlphanumKey
 from dvk_archive.main.processing.string_compare import compare_alphanum
 from dvk_archive.main.processing.string_compare import compare_sections
 from dvk_archive.main.processing.string_compare import compare_strings
 from dvk_archive.main.processing.string_compare import is_number_string
 from dvk_archive.main.processing.string_compare import get_section
+from random import choice, randint, seed
 
 def test_compare_strings():
     """
@@ -128,6 +131,59 @@ def test_compare_alphanum():
     assert compare_alphanum("b", None) == 0
     assert compare_alphanum(None, None) == 0
 
+def get_random_strings(amount:int=0) -> list:
+    """
+    Returns a list of random strings made of letters, numbers and separators.
+    Text and numbers alternate, so numbers are never joined into longer numbers.
+
+    :param amount: Number of strings to create, defaults to 0
+    :type amount: int, optional
+    :return: List of random strings
+    :rtype: list[str]
+    """
+    seed(5)
+    parts = [["a", "B", "Title ", "title", "-", " ", "Z", ", ", "_", " (", ".a"],
+                ["0", "1", "09", "10", "2.5", "2,5", "999999999"]]
+    strings = []
+    for i in range(0, amount):
+        string = ""
+        start = randint(0, 1)
+        for j in range(0, randint(0, 6)):
+            string = string + choice(parts[(start + j) % 2])
+        strings.append(string)
+    return strings
+
+def test_alphanum_key():
+    """
+    Tests the AlphanumKey class.
+    """
+    # Test that comparing keys matches compare_alphanum
+    strings = get_random_strings(300)
+    keys = [AlphanumKey(string) for string in strings]
+    for i in range(0, len(strings)):
+        for j in range(0, len(strings)):
+            result = compare_alphanum(strings[i], strings[j])
+            assert keys[i].compare(keys[j]) == result
+            assert (keys[i] < keys[j]) == (result < 0)
+            assert (keys[i] == keys[j]) == (result == 0)
+    # Test that sorting with keys matches sorting with compare_alphanum
+    assert (sorted(strings, key=AlphanumKey)
+                == sorted(strings, key=cmp_to_key(compare_alphanum)))
+    assert AlphanumKey("Title 2") < AlphanumKey("title 10")
+    assert AlphanumKey("Title 10") > AlphanumKey("title 2")
+    assert AlphanumKey("Title 01") == AlphanumKey("title 1")
+    assert AlphanumKey("Title 0,5") == AlphanumKey("title .5")
+    # Test that long numbers are compared by value
+    assert AlphanumKey("Title 2") < AlphanumKey("Title 12345678901")
+    assert AlphanumKey("Title 12345678901") < AlphanumKey("Title 22345678901")
+    # Test that keys can be hashed
+    assert hash(AlphanumKey("Title 01")) == hash(AlphanumKey("title 1"))
+    assert len(set([AlphanumKey("A1"), AlphanumKey("a01"), AlphanumKey("A2")])) == 2
+    # Test keys for invalid strings
+    assert AlphanumKey(None) == AlphanumKey("")
+    assert AlphanumKey(None) < AlphanumKey("Thing")
+    assert AlphanumKey("") < AlphanumKey("Thing")
+
 def all_tests():
     """
     Runs all tests for the string_compare module.
@@ -137,3 +193,4 @@ def all_tests():
     test_is_number_string()
     test_compare_sections()
     test_compare_alphanum()
+    test_alphanum_key()
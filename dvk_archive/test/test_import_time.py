@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+from subprocess import run
+from sys import executable
+from typing import List
+
+# Scripts that work without an internet connection
+OFFLINE_MODULES = ["dvk_archive.main.error_finding.archive_audit",
+            "dvk_archive.main.error_finding.missing_media",
+            "dvk_archive.main.error_finding.missing_sequence_info",
+            "dvk_archive.main.error_finding.same_ids",
+            "dvk_archive.main.error_finding.sequence_errors",
+            "dvk_archive.main.error_finding.unlinked_media",
+            "dvk_archive.main.file.dvk_html",
+            "dvk_archive.main.file.manual_dvk",
+            "dvk_archive.main.file.reformat",
+            "dvk_archive.main.file.rename",
+            "dvk_archive.main.file.sequencing"]
+
+# Modules that should only be loaded when connecting to the internet
+WEB_MODULES = ["bs4", "filetype", "lxml", "requests", "selenium", "urllib3"]
+
+def get_import_times(module:str=None) -> dict:
+    """
+    Imports a module in a new interpreter and returns the time taken to import each module.
+    Times are read from the output of python -X importtime.
+
+    :param module: Name of the module to import, defaults to None
+    :type module: str, optional
+    :return: Dict of module names and cumulative import times in microseconds
+    :rtype: dict
+    """
+    if module is None:
+        return dict()
+    result = run([executable, "-X", "importtime", "-c", "import " + module],
+                capture_output=True, text=True)
+    times = dict()
+    for line in result.stderr.split("\n"):
+        # Lines are formatted as "import time: self | cumulative | name"
+        parts = line.split("|")
+        if len(parts) < 3:
+            continue
+        try:
+            times[parts[2].strip()] = int(parts[1].strip())
+        except ValueError:
+            continue
+    return times
+
+def get_loaded_web_modules(times:dict=None) -> List[str]:
+    """
+    Returns the WEB_MODULES that were loaded in the given import times.
+
+    :param times: Import times from get_import_times, defaults to None
+    :type times: dict, optional
+    :return: Names of loaded web modules
+    :rtype: list[str]
+    """
+    if times is None:
+        return []
+    loaded = []
+    for module in WEB_MODULES:
+        if module in times:
+            loaded.append(module)
+    return loaded
+
+def test_offline_imports():
+    """
+    Tests that offline scripts don't load web modules.
+    """
+    for module in OFFLINE_MODULES:
+        times = get_import_times(module)
+        assert module in times
+        assert get_loaded_web_modules(times) == []
+
+def test_get_import_times():
+    """
+    Tests the get_import_times function.
+    """
+    times = get_import_times("dvk_archive.main.web.bs_connect")
+    assert "dvk_archive.main.web.bs_connect" in times
+    assert get_loaded_web_modules(times) == ["requests", "urllib3"]
+    assert get_import_times(None) == dict()
+    assert get_loaded_web_modules(None) == []
+
+def all_tests():
+    """
+    Runs all tests for the time taken to import modules.
+    """
+    test_get_import_times()
+    test_offline_imports()
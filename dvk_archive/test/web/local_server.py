@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import List
+
+class LocalHandler(BaseHTTPRequestHandler):
+    """
+    Request handler serving the pages stored in its LocalServer.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format:str, *args):
+        """
+        Keeps requests from being printed while testing.
+        """
+        pass
+
+    def get_range_start(self, page:dict=None) -> int:
+        """
+        Returns the first byte requested with a Range header, or 0 if the whole page is sent.
+
+        :param page: Page being requested, defaults to None
+        :type page: dict, optional
+        :return: First byte to send
+        :rtype: int
+        """
+        request_range = self.headers.get("Range")
+        if not page["ranges"] or request_range is None or not request_range.startswith("bytes="):
+            return 0
+        # Only send a range if the page is unchanged
+        if_range = self.headers.get("If-Range")
+        if if_range is not None and not if_range in [page["etag"], page["modified"]]:
+            return 0
+        try:
+            return int(request_range[6:].split("-")[0]) + page["shift"]
+        except ValueError:
+            return 0
+
+    def do_GET(self):
+        """
+        Serves a GET request.
+        """
+        local = self.server.local_server
+        local.add_request(self.path, self.client_address, self.headers.get("Range"))
+        page = local.get_page(self.path)
+        if page is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        # Send an error status instead of the page if specified
+        error = local.get_error(self.path)
+        if error is not None:
+            self.send_response(error)
+            if page["retry_after"] is not None:
+                self.send_header("Retry-After", page["retry_after"])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        # Send Not Modified if the client has the current page
+        if ((page["etag"] is not None
+                    and self.headers.get("If-None-Match") == page["etag"])
+                    or (page["modified"] is not None
+                    and self.headers.get("If-Modified-Since") == page["modified"])):
+            self.send_response(304)
+            self.end_headers()
+            return
+        # Get the part of the page to send
+        data = page["data"]
+        start = self.get_range_start(page)
+        if start > 0:
+            self.send_response(206)
+            end = str(len(data) - 1)
+            self.send_header("Content-Range", "bytes " + str(start) + "-" + end + "/" + str(len(data)))
+            data = data[start:]
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", page["type"])
+        self.send_header("Content-Length", str(len(data)))
+        if page["ranges"]:
+            self.send_header("Accept-Ranges", "bytes")
+        if page["etag"] is not None:
+            self.send_header("ETag", page["etag"])
+        if page["modified"] is not None:
+            self.send_header("Last-Modified", page["modified"])
+        self.end_headers()
+        # Drop the connection partway through if specified
+        drop = local.get_drop(self.path)
+        if drop is not None and drop < len(data):
+            self.wfile.write(data[:drop])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(data)
+
+    def do_POST(self):
+        """
+        Serves a POST request by echoing the request body.
+        """
+        local = self.server.local_server
+        local.add_request(self.path, self.client_address)
+        length = int(self.headers.get("Content-Length", "0"))
+        data = self.rfile.read(length)
+        # Send an error status instead of the echo if specified
+        error = local.get_error(self.path)
+        if error is not None:
+            self.send_response(error)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+class LocalServer:
+    """
+    HTTP server running on the local machine for testing web functions without internet access.
+    """
+
+    def __init__(self):
+        """
+        Starts the server on an open port.
+        """
+        self.pages = dict()
+        self.requests = []
+        self.lock = Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), LocalHandler)
+        self.server.daemon_threads = True
+        self.server.local_server = self
+        self.thread = Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def get_url(self, path:str="/") -> str:
+        """
+        Returns the URL for a path on the server.
+
+        :param path: Path on the server, defaults to "/"
+        :type path: str, optional
+        :return: Full URL
+        :rtype: str
+        """
+        return "http://127.0.0.1:" + str(self.server.server_address[1]) + path
+
+    def add_page(self, path:str=None,
+                data:bytes=None,
+                content_type:str="text/html",
+                ranges:bool=False,
+                etag:str=None,
+                modified:str=None,
+                drops:List[int]=None,
+                errors:List[int]=None,
+                retry_after:str=None,
+                shift:int=0):
+        """
+        Adds a page for the server to serve.
+
+        :param path: Path of the page, defaults to None
+        :type path: str, optional
+        :param data: Contents of the page, defaults to None
+        :type data: bytes, optional
+        :param content_type: Content type of the page, defaults to "text/html"
+        :type content_type: str, optional
+        :param ranges: Whether to serve Range requests, defaults to False
+        :type ranges: bool, optional
+        :param etag: ETag header for the page, defaults to None
+        :type etag: str, optional
+        :param modified: Last-Modified header for the page, defaults to None
+        :type modified: str, optional
+        :param drops: Bytes to send before dropping the connection for each following request, defaults to None
+        :type drops: list[int], optional
+        :param errors: Error statuses to send instead of the page for each following request, defaults to None
+        :type errors: list[int], optional
+        :param retry_after: Retry-After header to send with error statuses, defaults to None
+        :type retry_after: str, optional
+        :param shift: Bytes to move the start of served ranges by, for sending the wrong range, defaults to 0
+        :type shift: int, optional
+        """
+        page = {"data":data, "type":content_type, "ranges":ranges}
+        page["etag"] = etag
+        page["modified"] = modified
+        page["drops"] = []
+        if drops is not None:
+            page["drops"] = list(drops)
+        page["errors"] = []
+        if errors is not None:
+            page["errors"] = list(errors)
+        page["retry_after"] = retry_after
+        page["shift"] = shift
+        self.pages[path] = page
+
+    def get_error(self, path:str=None) -> int:
+        """
+        Returns the error status to send for a request instead of the page.
+        Returns None if the page should be sent.
+
+        :param path: Path being requested, defaults to None
+        :type path: str, optional
+        :return: HTTP status code
+        :rtype: int
+        """
+        with self.lock:
+            page = self.pages.get(path)
+            if page is None or len(page["errors"]) == 0:
+                return None
+            return page["errors"].pop(0)
+
+    def get_drop(self, path:str=None) -> int:
+        """
+        Returns how many bytes to send before dropping the connection for a request.
+        Returns None if the whole response should be sent.
+
+        :param path: Path being requested, defaults to None
+        :type path: str, optional
+        :return: Number of bytes to send
+        :rtype: int
+        """
+        with self.lock:
+            page = self.pages.get(path)
+            if page is None or len(page["drops"]) == 0:
+                return None
+            return page["drops"].pop(0)
+
+    def get_page(self, path:str=None) -> dict:
+        """
+        Returns the page stored for a path, or None if there is no page.
+
+        :param path: Path of the page, defaults to None
+        :type path: str, optional
+        :return: Dict with the page's data and type
+        :rtype: dict
+        """
+        return self.pages.get(path)
+
+    def add_request(self, path:str=None, client:tuple=None, request_range:str=None):
+        """
+        Records a request made to the server.
+
+        :param path: Path that was requested, defaults to None
+        :type path: str, optional
+        :param client: Address of the client connection, defaults to None
+        :type client: tuple, optional
+        :param request_range: Range header of the request, defaults to None
+        :type request_range: str, optional
+        """
+        with self.lock:
+            self.requests.append([path, client, request_range])
+
+    def get_connection_count(self) -> int:
+        """
+        Returns the number of separate client connections used for requests.
+
+        :return: Number of connections
+        :rtype: int
+        """
+        with self.lock:
+            return len(set([request[1] for request in self.requests]))
+
+    def close(self):
+        """
+        Stops the server.
+        """
+        self.server.shutdown()
+        self.server.server_close()
@@ -1,16 +1,34 @@
 #!/usr/bin/env python3
 
-from os import pardir, stat
+from os import environ, listdir, pardir, stat
 from os.path import abspath, basename, exists, join
 from dvk_archive.test.temp_dir import get_test_dir
 from dvk_archive.main.web.bs_connect import bs_connect
 from dvk_archive.main.web.bs_connect import basic_connect
+from dvk_archive.main.web.bs_connect import close_sessions
 from dvk_archive.main.web.bs_connect import convert_data_uri
 from dvk_archive.main.web.bs_connect import download
 from dvk_archive.main.web.bs_connect import get_default_headers
+from dvk_archive.main.web.bs_connect import get_cache
 from dvk_archive.main.web.bs_connect import get_direct_response
+from dvk_archive.main.web.bs_connect import get_host
+from dvk_archive.main.web.bs_connect import get_host_limit
 from dvk_archive.main.web.bs_connect import get_last_modified
+from dvk_archive.main.web.bs_connect import get_part_file
+from dvk_archive.main.web.bs_connect import get_part_info_file
+from dvk_archive.main.web.bs_connect import read_part_info
+from dvk_archive.main.web.bs_connect import get_session
 from dvk_archive.main.web.bs_connect import json_connect
+from dvk_archive.main.web.bs_connect import limit_request
+from dvk_archive.main.web.bs_connect import set_cache
+from dvk_archive.main.web.bs_connect import set_connection_limit
+from dvk_archive.main.web.bs_connect import set_scheduler
+from dvk_archive.main.web.http_cache import HttpCache
+from dvk_archive.main.web.request_scheduler import RequestScheduler
+from dvk_archive.test.web.local_server import LocalServer
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep
+from tracemalloc import get_traced_memory, start, stop
 
 def test_get_direct_response():
     """
@@ -151,6 +169,293 @@ def test_download():
     download(url, None)
     assert not exists(file)
 
+def test_get_session():
+    """
+    Tests the get_session and get_host_limit functions.
+    """
+    # Test getting hosts from URLs
+    assert get_host("https://www.Example.com/page/1") == "www.example.com"
+    assert get_host("http://127.0.0.1:8000/") == "127.0.0.1:8000"
+    assert get_host("asdfghjkl") == ""
+    assert get_host(None) == ""
+    # Test that sessions are shared by host
+    close_sessions()
+    session = get_session("https://www.example.com/a")
+    assert get_session("https://www.example.com/b") is session
+    assert get_session("https://other.example.com/a") is not session
+    assert get_host_limit("https://www.example.com/a") is get_host_limit("https://www.example.com/b")
+    # Test that sessions are replaced when the connection limit changes
+    set_connection_limit(2)
+    assert get_session("https://www.example.com/a") is not session
+    set_connection_limit()
+
+def test_limit_request():
+    """
+    Tests that the host's connection limit isn't held while waiting to retry.
+    """
+    server = LocalServer()
+    try:
+        close_sessions()
+        set_connection_limit(1)
+        set_scheduler(RequestScheduler(retries=1))
+        server.add_page("/page", b"Page", "text/plain", errors=[503], retry_after="0.5")
+        url = server.get_url("/page")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(get_direct_response, url)
+            sleep(0.2)
+            # Test that other threads can connect while the request is waiting
+            limit = get_host_limit(url)
+            assert limit.acquire(timeout=0.1)
+            limit.release()
+            assert future.result().text == "Page"
+        # Test sending a limited request directly
+        assert limit_request(url, lambda: "Sent") == "Sent"
+    finally:
+        set_scheduler()
+        set_connection_limit()
+        server.close()
+
+def test_download_local():
+    """
+    Tests downloading many files from a local server with shared connections.
+    """
+    test_dir = get_test_dir()
+    server = LocalServer()
+    try:
+        for i in range(0, 20):
+            server.add_page("/" + str(i) + ".txt", bytes("File " + str(i), "utf-8"), "text/plain")
+        # Test downloading files at the same time
+        close_sessions()
+        set_connection_limit(3)
+        urls = [server.get_url("/" + str(i) + ".txt") for i in range(0, 20)]
+        files = [join(test_dir, str(i) + ".txt") for i in range(0, 20)]
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            list(executor.map(download, urls, files))
+        for i in range(0, 20):
+            with open(files[i]) as in_file:
+                assert in_file.read() == "File " + str(i)
+        # Test that connections were reused and limited per host
+        assert len(server.requests) == 20
+        assert server.get_connection_count() <= 3
+        # Test getting a page from the same session
+        assert basic_connect(server.get_url("/1.txt")) == "File 1"
+    finally:
+        set_connection_limit()
+        server.close()
+
+def test_download_streaming():
+    """
+    Tests that downloads are streamed to disk rather than held in memory.
+    """
+    test_dir = get_test_dir()
+    server = LocalServer()
+    try:
+        data = bytes(range(0, 256)) * 32768
+        server.add_page("/large.bin", data, "application/octet-stream")
+        file = join(test_dir, "large.bin")
+        # Test that memory used is much smaller than the file
+        start()
+        download(server.get_url("/large.bin"), file, 16384)
+        peak = get_traced_memory()[1]
+        stop()
+        assert peak < len(data) / 4
+        with open(file, "rb") as in_file:
+            assert in_file.read() == data
+        # Test that no temporary files are left behind
+        assert listdir(test_dir) == ["large.bin"]
+        # Test that failed downloads leave no files
+        download(server.get_url("/large.bin"), join(test_dir, "missing", "file.bin"))
+        assert listdir(test_dir) == ["large.bin"]
+    finally:
+        server.close()
+
+def test_download_resume():
+    """
+    Tests resuming downloads that were interrupted.
+    """
+    test_dir = get_test_dir()
+    server = LocalServer()
+    # Don't retry right away so each download can be checked
+    set_scheduler(RequestScheduler(retries=0))
+    try:
+        data = bytes(range(0, 256)) * 64
+        file = join(test_dir, "file.bin")
+        # Test that a dropped download keeps its partial file
+        server.add_page("/resume.bin", data, "application/octet-stream",
+                    ranges=True, etag="\"v1\"", drops=[5000])
+        url = server.get_url("/resume.bin")
+        assert download(url, file, 1024) == dict()
+        assert not exists(file)
+        assert stat(get_part_file(file)).st_size == 4096
+        assert read_part_info(file) == {"url":url, "etag":"\"v1\"", "modified":None}
+        # Test resuming the download with a Range request
+        headers = download(url, file, 1024)
+        assert headers["Content-Range"] == "bytes 4096-16383/16384"
+        assert server.requests[-1][2] == "bytes=4096-"
+        with open(file, "rb") as in_file:
+            assert in_file.read() == data
+        assert listdir(test_dir) == ["file.bin"]
+        # Test that the whole file is downloaded if the file changed
+        server.add_page("/resume.bin", data, "application/octet-stream",
+                    ranges=True, modified="Mon, 01 Jan 2001 00:00:00 GMT", drops=[3000])
+        download(url, file, 1024)
+        assert stat(get_part_file(file)).st_size == 2048
+        server.add_page("/resume.bin", data[::-1], "application/octet-stream",
+                    ranges=True, modified="Tue, 02 Jan 2001 00:00:00 GMT")
+        download(url, file, 1024)
+        assert server.requests[-1][2] == "bytes=2048-"
+        with open(file, "rb") as in_file:
+            assert in_file.read() == data[::-1]
+        assert listdir(test_dir) == ["file.bin"]
+        # Test that partial files are removed if the server doesn't support ranges
+        server.add_page("/full.bin", data, "application/octet-stream",
+                    etag="\"v1\"", drops=[5000])
+        url = server.get_url("/full.bin")
+        download(url, file)
+        assert listdir(test_dir) == ["file.bin"]
+        download(url, file)
+        assert server.requests[-1][2] is None
+        with open(file, "rb") as in_file:
+            assert in_file.read() == data
+        # Test that partial files are removed if not resuming
+        server.add_page("/resume.bin", data, "application/octet-stream",
+                    ranges=True, etag="\"v1\"", drops=[5000])
+        download(server.get_url("/resume.bin"), file, resume=False)
+        assert listdir(test_dir) == ["file.bin"]
+        # Test that the whole file is downloaded if the server sends the wrong range
+        server.add_page("/shift.bin", data, "application/octet-stream",
+                    ranges=True, etag="\"v1\"", drops=[5000])
+        url = server.get_url("/shift.bin")
+        download(url, file, 1024)
+        assert stat(get_part_file(file)).st_size == 4096
+        server.add_page("/shift.bin", data, "application/octet-stream",
+                    ranges=True, etag="\"v1\"", shift=1000)
+        headers = download(url, file, 1024)
+        assert server.requests[-2][2] == "bytes=4096-"
+        assert server.requests[-1][2] is None
+        assert not "Content-Range" in headers
+        with open(file, "rb") as in_file:
+            assert in_file.read() == data
+        assert listdir(test_dir) == ["file.bin"]
+        # Test that error pages aren't written as the file
+        assert download(server.get_url("/missing.bin"), join(test_dir, "missing.bin")) == dict()
+        assert listdir(test_dir) == ["file.bin"]
+        # Test getting partial files with invalid paths
+        assert get_part_file(None) is None
+        assert get_part_info_file(None) is None
+        assert read_part_info(None) is None
+        # Test that dropped downloads are resumed automatically when retrying
+        set_scheduler(RequestScheduler(retries=2, backoff=0.01))
+        server.add_page("/resume.bin", data, "application/octet-stream",
+                    ranges=True, etag="\"v2\"", drops=[5000, 9000])
+        headers = download(server.get_url("/resume.bin"), file, 1024)
+        assert headers["Content-Range"] == "bytes 12288-16383/16384"
+        with open(file, "rb") as in_file:
+            assert in_file.read() == data
+        assert listdir(test_dir) == ["file.bin"]
+    finally:
+        set_scheduler()
+        server.close()
+
+def test_connect_cache():
+    """
+    Tests that cached pages are revalidated rather than downloaded again.
+    """
+    test_dir = get_test_dir()
+    server = LocalServer()
+    cache = HttpCache(test_dir)
+    set_cache(cache)
+    try:
+        # Test that pages are stored on the first request
+        server.add_page("/page.html", b"Page", "text/html", etag="\"v1\"")
+        url = server.get_url("/page.html")
+        assert basic_connect(url) == "Page"
+        assert cache.get_entry(url)["body"] == b"Page"
+        # Test that the cached page is used if the server says it's unchanged
+        server.add_page("/page.html", b"Changed", "text/html", etag="\"v1\"")
+        assert basic_connect(url) == "Page"
+        # Test that changed pages are downloaded again
+        server.add_page("/page.html", b"Changed", "text/html", etag="\"v2\"")
+        assert basic_connect(url) == "Changed"
+        assert cache.get_entry(url)["etag"] == "\"v2\""
+        # Test revalidating with Last-Modified
+        modified = "Tue, 01 Jun 2021 10:00:00 GMT"
+        server.add_page("/data.json", b"{\"a\":1}", "application/json", modified=modified)
+        url = server.get_url("/data.json")
+        assert json_connect(url) == {"a":1}
+        server.add_page("/data.json", b"{\"a\":2}", "application/json", modified=modified)
+        assert json_connect(url) == {"a":1}
+        assert bs_connect(url) is not None
+        # Test that pages without validators are not cached
+        server.add_page("/plain.html", b"Plain", "text/html")
+        url = server.get_url("/plain.html")
+        assert basic_connect(url) == "Plain"
+        assert cache.get_entry(url) is None
+        # Test that pages aren't cached once the cache is removed
+        set_cache()
+        cache.clear()
+        assert basic_connect(server.get_url("/page.html")) == "Changed"
+        assert cache.get_entry(server.get_url("/page.html")) is None
+    finally:
+        set_cache()
+        cache.close_cache()
+        server.close()
+
+def test_use_cache():
+    """
+    Tests turning on the cache for get_direct_response and download.
+    """
+    test_dir = get_test_dir()
+    server = LocalServer()
+    cache_home = environ.get("XDG_CACHE_HOME")
+    set_cache()
+    try:
+        # Test that the cache isn't used unless asked for
+        environ["XDG_CACHE_HOME"] = join(test_dir, "cache")
+        server.add_page("/page.html", b"Page", "text/html", etag="\"v1\"")
+        url = server.get_url("/page.html")
+        assert get_direct_response(url).text == "Page"
+        assert get_cache() is None
+        # Test that the default cache is opened when asked for
+        assert get_direct_response(url, use_cache=True).text == "Page"
+        cache = get_cache()
+        assert cache.get_cache_file().startswith(join(test_dir, "cache"))
+        assert cache.get_entry(url)["body"] == b"Page"
+        server.add_page("/page.html", b"Changed", "text/html", etag="\"v1\"")
+        response = get_direct_response(url, use_cache=True)
+        assert response.status_code == 200
+        assert response.text == "Page"
+        assert get_direct_response(url).status_code == 200
+        # Test that downloads are stored and written from the cache if unchanged
+        server.add_page("/media.txt", b"Media", "text/plain", etag="\"m1\"")
+        url = server.get_url("/media.txt")
+        file = join(test_dir, "media.txt")
+        download(url, file, use_cache=True)
+        assert cache.get_entry(url)["body"] == b"Media"
+        server.add_page("/media.txt", b"Other", "text/plain", etag="\"m1\"")
+        download(url, file, use_cache=True)
+        with open(file, "rb") as in_file:
+            assert in_file.read() == b"Media"
+        # Test that changed downloads are downloaded again
+        server.add_page("/media.txt", b"New Media", "text/plain", etag="\"m2\"")
+        download(url, file, use_cache=True)
+        with open(file, "rb") as in_file:
+            assert in_file.read() == b"New Media"
+        assert cache.get_entry(url)["etag"] == "\"m2\""
+        # Test that downloads aren't revalidated without the cache
+        server.add_page("/media.txt", b"Uncached", "text/plain", etag="\"m2\"")
+        download(url, file)
+        with open(file, "rb") as in_file:
+            assert in_file.read() == b"Uncached"
+        cache.close_cache()
+    finally:
+        set_cache()
+        if cache_home is None:
+            del environ["XDG_CACHE_HOME"]
+        else:
+            environ["XDG_CACHE_HOME"] = cache_home
+        server.close()
+
 def test_get_last_modified():
     """
     Tests the get_last_modified function.
@@ -195,6 +500,13 @@ def all_tests():
     Runs all tests for the bs_connect module.
     """
     test_convert_data_uri()
+    test_get_session()
+    test_limit_request()
+    test_download_local()
+    test_download_streaming()
+    test_download_resume()
+    test_connect_cache()
+    test_use_cache()
     test_get_direct_response()
     test_basic_connect()
     test_bs_connect()
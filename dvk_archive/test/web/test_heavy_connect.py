@@ -1,10 +1,61 @@
 #!/usr/bin/env python3
 
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
 from dvk_archive.main.web.heavy_connect import HeavyConnect
+from dvk_archive.main.web.heavy_connect import HeavyConnectPool
+from dvk_archive.main.web.heavy_connect import wait_for_download
 from dvk_archive.test.temp_dir import get_test_dir
-from os import stat
+from dvk_archive.test.web.local_server import LocalServer
+from os import listdir, mkdir, rename, stat
 from os.path import abspath, exists, join
+from threading import Thread
+from time import monotonic, sleep
+
+def write_slowly(file:str=None, writes:int=5, delay:float=0.1):
+    """
+    Writes to a .part file a little at a time before renaming it, like a browser download.
+
+    :param file: Final path of the file, defaults to None
+    :type file: str, optional
+    :param writes: Number of writes to make, defaults to 5
+    :type writes: int, optional
+    :param delay: Seconds between writes, defaults to 0.1
+    :type delay: float, optional
+    """
+    with open(file + ".part", "wb") as out_file:
+        for i in range(0, writes):
+            out_file.write(b"Data")
+            out_file.flush()
+            sleep(delay)
+    rename(file + ".part", file)
+
+def test_wait_for_download():
+    """
+    Tests the wait_for_download function.
+    """
+    # Test waiting for a file that is still being written
+    test_dir = get_test_dir()
+    directory = join(test_dir, "downloads")
+    mkdir(directory)
+    file = abspath(join(directory, "file.bin"))
+    thread = Thread(target=write_slowly, args=(file, 5, 0.1))
+    thread.start()
+    start = monotonic()
+    assert wait_for_download(directory, 10, 0.05, 0.3) == file
+    assert monotonic() - start < 5
+    thread.join()
+    with open(file, "rb") as in_file:
+        assert in_file.read() == b"DataDataDataDataData"
+    # Test that partial files time out
+    rename(file, file + ".part")
+    assert wait_for_download(directory, 0.3, 0.05, 0.1) is None
+    # Test waiting on an empty or invalid directory
+    directory = join(test_dir, "empty")
+    mkdir(directory)
+    assert wait_for_download(directory, 0.3) is None
+    assert wait_for_download(join(test_dir, "non-existant"), 0.3) is None
+    assert wait_for_download(None) is None
 
 def test_download():
     """
@@ -90,10 +141,99 @@ def test_get_json():
     finally:
         connect.close_driver()
 
+def test_get_download_dir():
+    """
+    Tests that each HeavyConnect object uses its own download directory.
+    """
+    connect1 = HeavyConnect()
+    connect2 = HeavyConnect()
+    # Skip the test if the Selenium driver can't be started
+    if connect1.get_driver() is None or connect2.get_driver() is None:
+        connect1.close_driver()
+        connect2.close_driver()
+        print("Skipped test_get_download_dir: Selenium driver could not be started.")
+        return
+    try:
+        # Test that download directories are different
+        dir1 = connect1.get_download_dir()
+        dir2 = connect2.get_download_dir()
+        assert exists(dir1)
+        assert exists(dir2)
+        assert not dir1 == dir2
+        # Test that clearing one directory leaves the other alone
+        with open(join(dir1, "file1.txt"), "w") as out_file:
+            out_file.write("File 1")
+        with open(join(dir2, "file2.txt"), "w") as out_file:
+            out_file.write("File 2")
+        mkdir(join(dir1, "sub"))
+        assert connect1.get_download_dir() == dir1
+        assert listdir(dir1) == []
+        # Test that the directory stays private after being cleared
+        assert stat(dir1).st_mode & 0o777 == 0o700
+        assert listdir(dir2) == ["file2.txt"]
+        # Test that the download directory is removed when closed
+        connect2.close_driver()
+        assert not exists(dir2)
+        assert connect2.get_download_dir() is None
+        connect2.close_driver()
+    finally:
+        connect1.close_driver()
+        connect2.close_driver()
+    # Test that the download directory is removed after a with statement
+    with HeavyConnect() as connect:
+        directory = connect.get_download_dir()
+        assert exists(directory)
+    assert not exists(directory)
+
+def test_connect_pool():
+    """
+    Tests loading pages at the same time with a HeavyConnectPool.
+    """
+    pool = HeavyConnectPool(2)
+    # Skip the test if the Selenium drivers can't be started
+    if pool.get_size() < 2:
+        pool.close_drivers()
+        print("Skipped test_connect_pool: Selenium drivers could not be started.")
+        return
+    server = LocalServer()
+    try:
+        # Test that only drivers that started are kept in the pool
+        for connection in pool.connections:
+            assert connection.get_driver() is not None
+            assert exists(connection.get_download_dir())
+        assert pool.get_size() == 2
+        directories = [connection.get_download_dir() for connection in pool.connections]
+        assert not directories[0] == directories[1]
+        for i in range(0, 4):
+            html = "<html><head><title>Page " + str(i) + "</title></head>"
+            html = html + "<body><p>Text</p></body></html>"
+            server.add_page("/" + str(i) + ".html", bytes(html, "utf-8"))
+        server.add_page("/data.json", b"{\"id\":5}", "application/json")
+        # Test that pages are returned once loaded rather than after the timeout
+        start = monotonic()
+        urls = [server.get_url("/" + str(i) + ".html") for i in range(0, 4)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            pages = list(executor.map(pool.get_page, urls))
+        assert monotonic() - start < 20
+        for i in range(0, 4):
+            assert pages[i].find("title").get_text() == "Page " + str(i)
+        # Test getting JSON from the pool
+        assert pool.get_json(server.get_url("/data.json")) == {"id":5}
+        # Test that drivers are returned to the pool
+        assert pool.available.qsize() == 2
+    finally:
+        pool.close_drivers()
+        server.close()
+    assert not exists(directories[0])
+    assert not exists(directories[1])
+
 def all_tests():
     """
     Runs all tests for the heavy_connect module.
     """
+    test_wait_for_download()
+    test_get_download_dir()
+    test_connect_pool()
     test_get_json()
     test_get_page()
     test_download()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+from dvk_archive.main.web.http_cache import get_cache_key
+from dvk_archive.main.web.http_cache import get_conditional_headers
+from dvk_archive.main.web.http_cache import get_default_cache_dir
+from dvk_archive.main.web.http_cache import HttpCache
+from dvk_archive.test.temp_dir import get_test_dir
+from os import environ, stat
+from os.path import abspath, exists, join
+from requests import Response
+from stat import S_IMODE
+
+def get_test_response(body:bytes=None, etag:str=None, modified:str=None) -> Response:
+    """
+    Returns a Response for testing the HttpCache.
+
+    :param body: Body of the response, defaults to None
+    :type body: bytes, optional
+    :param etag: ETag header of the response, defaults to None
+    :type etag: str, optional
+    :param modified: Last-Modified header of the response, defaults to None
+    :type modified: str, optional
+    :return: Test response
+    :rtype: Response
+    """
+    response = Response()
+    response.status_code = 200
+    response._content = body
+    response.encoding = "utf-8"
+    if etag is not None:
+        response.headers["ETag"] = etag
+    if modified is not None:
+        response.headers["Last-Modified"] = modified
+    return response
+
+def test_get_default_cache_dir():
+    """
+    Tests the get_default_cache_dir function.
+    """
+    test_dir = get_test_dir()
+    cache_home = environ.get("XDG_CACHE_HOME")
+    try:
+        # Test that the cache is kept in a private directory in the user's cache
+        environ["XDG_CACHE_HOME"] = join(test_dir, "cache")
+        directory = get_default_cache_dir()
+        assert directory == abspath(join(test_dir, "cache", "dvk_archive", "http"))
+        assert S_IMODE(stat(directory).st_mode) == 0o700
+        cache = HttpCache()
+        try:
+            assert cache.get_cache_file() == join(directory, "dvk_http_cache.sqlite")
+            assert exists(cache.get_cache_file())
+        finally:
+            cache.close_cache()
+        # Test that the cache is disabled if the directory can't be created
+        with open(join(test_dir, "file.txt"), "w") as out_file:
+            out_file.write("TEST")
+        environ["XDG_CACHE_HOME"] = join(test_dir, "file.txt")
+        assert get_default_cache_dir() is None
+        cache = HttpCache()
+        assert cache.get_cache_file() is None
+        assert not cache.store("/url/", None, get_test_response(b"Page", "\"a\""))
+        assert cache.get_entry("/url/") is None
+    finally:
+        if cache_home is None:
+            del environ["XDG_CACHE_HOME"]
+        else:
+            environ["XDG_CACHE_HOME"] = cache_home
+
+def test_get_cache_key():
+    """
+    Tests the get_cache_key function.
+    """
+    assert get_cache_key("/url/") == "GET /url/"
+    assert get_cache_key("/url/", {"b":2, "a":1}) == get_cache_key("/url/", {"a":1, "b":2})
+    assert not get_cache_key("/url/", {"a":1}) == get_cache_key("/url/", {"a":2})
+    assert not get_cache_key("/url/", {"a":1}) == get_cache_key("/url/")
+    assert get_cache_key(None) is None
+
+def test_get_conditional_headers():
+    """
+    Tests the get_conditional_headers function.
+    """
+    headers = {"User-Agent":"Agent", "If-None-Match":"\"a\"", "If-Modified-Since":"Date"}
+    assert get_conditional_headers(headers) == {"If-None-Match":"\"a\"", "If-Modified-Since":"Date"}
+    assert get_conditional_headers({"User-Agent":"Agent"}) == dict()
+    assert get_conditional_headers(None) == dict()
+
+def test_store():
+    """
+    Tests the store and get_entry methods.
+    """
+    test_dir = get_test_dir()
+    cache = HttpCache(test_dir)
+    try:
+        assert exists(cache.get_cache_file())
+        # Test storing a response with an ETag
+        assert cache.store("/url/", None, get_test_response(b"Page", "\"a\""))
+        entry = cache.get_entry("/url/")
+        assert entry == {"etag":"\"a\"", "modified":None, "encoding":"utf-8", "body":b"Page"}
+        assert cache.get_validators(entry) == {"If-None-Match":"\"a\""}
+        # Test storing a response with Last-Modified
+        modified = "Tue, 01 Jun 2021 10:00:00 GMT"
+        assert cache.store("/url/", {"a":1}, get_test_response(b"Post", None, modified))
+        entry = cache.get_entry("/url/", {"a":1})
+        assert entry["body"] == b"Post"
+        assert cache.get_validators(entry) == {"If-Modified-Since":modified}
+        assert cache.get_entry("/url/")["body"] == b"Page"
+        # Test that responses without validators are not stored
+        assert not cache.store("/url/", None, get_test_response(b"New"))
+        assert cache.get_entry("/url/") is None
+        response = get_test_response(b"Missing", "\"b\"")
+        response.status_code = 404
+        assert not cache.store("/other/", None, response)
+        assert cache.get_entry("/other/") is None
+        # Test that responses are kept after reopening the cache
+        cache.close_cache()
+        cache = HttpCache(test_dir)
+        assert cache.get_entry("/url/", {"a":1})["body"] == b"Post"
+        # Test removing a stored response
+        cache.remove("/url/", {"a":1})
+        assert cache.get_entry("/url/", {"a":1}) is None
+        # Test storing the body of a streamed response
+        assert cache.store("/url/", None, get_test_response(None, "\"c\""), b"Stream")
+        assert cache.get_entry("/url/")["body"] == b"Stream"
+        cache.clear()
+        assert cache.get_entry("/url/") is None
+        # Test using invalid parameters
+        assert cache.get_entry(None) is None
+        assert cache.get_validators(None) == dict()
+        assert not cache.store(None, None, get_test_response(b"Page", "\"a\""))
+        assert not cache.store("/url/", None, None)
+    finally:
+        cache.close_cache()
+
+def test_evict():
+    """
+    Tests that least recently used responses are removed when the cache is full.
+    """
+    test_dir = get_test_dir()
+    cache = HttpCache(test_dir, 10)
+    try:
+        assert cache.store("/1/", None, get_test_response(b"1111", "\"1\""))
+        assert cache.store("/2/", None, get_test_response(b"2222", "\"2\""))
+        assert cache.get_size() == 8
+        # Test that recently used responses are kept
+        cache.touch("/1/")
+        assert cache.store("/3/", None, get_test_response(b"3333", "\"3\""))
+        assert cache.get_size() == 8
+        assert cache.get_entry("/1/") is not None
+        assert cache.get_entry("/2/") is None
+        assert cache.get_entry("/3/") is not None
+        # Test that responses larger than the cache are not stored
+        assert not cache.store("/4/", None, get_test_response(b"44444444444", "\"4\""))
+        assert cache.get_size() == 8
+        # Test that the order of use is kept after reopening the cache
+        cache.touch("/1/")
+        cache.close_cache()
+        cache = HttpCache(test_dir, 10)
+        assert cache.store("/5/", None, get_test_response(b"5555", "\"5\""))
+        assert cache.get_entry("/1/") is not None
+        assert cache.get_entry("/3/") is None
+        assert cache.get_entry("/5/") is not None
+    finally:
+        cache.close_cache()
+
+def all_tests():
+    """
+    Runs all tests for the http_cache.py module.
+    """
+    test_get_default_cache_dir()
+    test_get_cache_key()
+    test_get_conditional_headers()
+    test_store()
+    test_evict()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+
+from dvk_archive.main.web.request_scheduler import get_host
+from dvk_archive.main.web.request_scheduler import get_retry_after
+from dvk_archive.main.web.request_scheduler import RequestScheduler
+from dvk_archive.test.web.local_server import LocalServer
+from email.utils import format_datetime
+from io import BytesIO
+from datetime import datetime, timedelta, timezone
+from requests import exceptions
+from requests import Response
+from requests import Session
+from threading import Thread
+from time import monotonic, sleep
+
+def test_get_host():
+    """
+    Tests the get_host function.
+    """
+    assert get_host("https://www.Example.com/path/") == "www.example.com"
+    assert get_host("http://127.0.0.1:8080/page") == "127.0.0.1:8080"
+    assert get_host("/path/only") == ""
+    assert get_host(None) == ""
+
+def test_get_retry_after():
+    """
+    Tests the get_retry_after function.
+    """
+    # Test getting seconds
+    assert get_retry_after("5") == 5.0
+    assert get_retry_after("0.5") == 0.5
+    assert get_retry_after("-5") == 0.0
+    # Test getting an HTTP date
+    date = datetime.now(timezone.utc) + timedelta(seconds=30)
+    seconds = get_retry_after(format_datetime(date, usegmt=True))
+    assert seconds > 25 and seconds <= 30
+    date = datetime.now(timezone.utc) - timedelta(seconds=30)
+    assert get_retry_after(format_datetime(date, usegmt=True)) == 0.0
+    # Test getting invalid values
+    assert get_retry_after("Not a date") is None
+    assert get_retry_after(None) is None
+
+def test_get_retry_delay():
+    """
+    Tests the get_retry_delay method.
+    """
+    # Test that the delay doubles with each attempt
+    scheduler = RequestScheduler(retries=3, backoff=1.0, max_backoff=5.0)
+    for attempt in range(0, 10):
+        delay = scheduler.get_retry_delay(attempt)
+        maximum = min(5.0, 2 ** attempt)
+        assert delay >= maximum / 2 and delay <= maximum
+    # Test using the Retry-After header
+    response = Response()
+    response.headers["Retry-After"] = "3"
+    assert scheduler.get_retry_delay(0, response) == 3.0
+    response.headers["Retry-After"] = "300"
+    assert scheduler.get_retry_delay(0, response) == 300.0
+    # Test giving up if Retry-After is too long
+    response.headers["Retry-After"] = "301"
+    assert scheduler.get_retry_delay(0, response) is None
+    scheduler.set_retries(3, 1.0, 5.0, 600.0)
+    assert scheduler.get_retry_delay(0, response) == 301.0
+    response.headers["Retry-After"] = "Invalid"
+    assert scheduler.get_retry_delay(0, response) <= 1.0
+
+def test_acquire():
+    """
+    Tests the acquire method.
+    """
+    # Test that requests are sent without waiting if there is no limit
+    scheduler = RequestScheduler()
+    for i in range(0, 20):
+        assert scheduler.acquire("http://www.example.com/") == 0.0
+    # Test that requests are spaced out to match the rate
+    scheduler = RequestScheduler(rate=20, burst=2)
+    start = monotonic()
+    for i in range(0, 6):
+        scheduler.acquire("http://www.example.com/")
+    elapsed = monotonic() - start
+    assert elapsed > 0.15 and elapsed < 1.0
+    assert scheduler.get_metrics("www.example.com")["wait_time"] > 0.15
+    # Test that limits are separate for each host
+    scheduler.set_rate_limit(1, 1, "slow.example.com")
+    assert scheduler.get_limit("slow.example.com") == [1, 1]
+    assert scheduler.get_limit("other.example.com") == [20, 2]
+    assert scheduler.acquire("http://slow.example.com/") == 0.0
+    assert scheduler.acquire("http://other.example.com/") == 0.0
+    # Test that invalid limits are removed
+    scheduler.set_rate_limit(0, 0)
+    assert scheduler.get_limit() == [None, 1]
+
+def test_pause_host():
+    """
+    Tests the pause_host method.
+    """
+    # Test that pausing a host without a limit makes requests wait
+    scheduler = RequestScheduler()
+    scheduler.pause_host("http://www.example.com/", 0.2)
+    start = monotonic()
+    scheduler.acquire("http://www.example.com/page")
+    assert monotonic() - start > 0.15
+    assert scheduler.acquire("http://www.example.com/") == 0.0
+    # Test that pausing a host with a limit makes requests wait
+    scheduler = RequestScheduler(rate=100, burst=5)
+    assert scheduler.acquire("http://www.example.com/") == 0.0
+    scheduler.pause_host("http://www.example.com/", 0.2)
+    assert scheduler.acquire("http://other.example.com/") == 0.0
+    start = monotonic()
+    scheduler.acquire("http://www.example.com/")
+    assert monotonic() - start > 0.15
+    # Test that other requests wait while a rate limited request waits to retry
+    scheduler = RequestScheduler()
+    response = Response()
+    response.raw = BytesIO()
+    response.status_code = 429
+    response.headers["Retry-After"] = "0.3"
+    start = monotonic()
+    thread = Thread(target=scheduler.wait_to_retry,
+                args=["http://www.example.com/", 0, response])
+    thread.start()
+    sleep(0.05)
+    scheduler.acquire("http://www.example.com/other")
+    assert monotonic() - start >= 0.3
+    thread.join()
+    # Test that other errors don't make requests wait
+    response.status_code = 500
+    response.headers["Retry-After"] = "0.1"
+    scheduler.wait_to_retry("http://www.example.com/", 0, response)
+    assert scheduler.acquire("http://www.example.com/") == 0.0
+
+def test_send():
+    """
+    Tests the send method.
+    """
+    server = LocalServer()
+    session = Session()
+    try:
+        scheduler = RequestScheduler(retries=3, backoff=0.01)
+        # Test retrying after temporary errors
+        server.add_page("/page", b"Page", "text/plain", errors=[503, 500])
+        url = server.get_url("/page")
+        response = scheduler.send(url, lambda: session.get(url))
+        assert response.status_code == 200
+        assert response.text == "Page"
+        metrics = scheduler.get_metrics(server.get_url("/")[7:-1])
+        assert metrics["requests"] == 3
+        assert metrics["retries"] == 2
+        assert metrics["failures"] == 0
+        # Test waiting the time given by Retry-After
+        scheduler.reset_metrics()
+        server.add_page("/limited", b"Limited", "text/plain", errors=[429], retry_after="0.3")
+        url = server.get_url("/limited")
+        start = monotonic()
+        response = scheduler.send(url, lambda: session.get(url))
+        assert response.text == "Limited"
+        assert monotonic() - start >= 0.3
+        assert scheduler.get_metrics()["wait_time"] >= 0.3
+        # Test giving up if Retry-After is too long
+        scheduler.reset_metrics()
+        server.add_page("/limited", b"Limited", "text/plain", errors=[429], retry_after="1000")
+        assert scheduler.send(url, lambda: session.get(url)).status_code == 429
+        assert scheduler.get_metrics()["retries"] == 0
+        # Test returning the last response if retries run out
+        scheduler.reset_metrics()
+        server.add_page("/down", b"Down", "text/plain", errors=[503, 503, 503, 503, 503])
+        url = server.get_url("/down")
+        assert scheduler.send(url, lambda: session.get(url)).status_code == 503
+        assert scheduler.get_metrics()["requests"] == 4
+        # Test that requests that aren't idempotent are not retried
+        scheduler.reset_metrics()
+        server.add_page("/post", b"Post", "text/plain", errors=[503])
+        url = server.get_url("/post")
+        response = scheduler.send(url, lambda: session.post(url, data={"a":"b"}), False)
+        assert response.status_code == 503
+        assert scheduler.get_metrics()["retries"] == 0
+        # Test that other errors are not retried
+        scheduler.reset_metrics()
+        url = server.get_url("/missing")
+        assert scheduler.send(url, lambda: session.get(url)).status_code == 404
+        assert scheduler.get_metrics()["retries"] == 0
+        # Test raising connection errors once retries run out
+        scheduler.reset_metrics()
+        try:
+            scheduler.send(url, lambda: session.get("http://127.0.0.1:1/", timeout=1))
+            assert False
+        except exceptions.ConnectionError:
+            pass
+        assert scheduler.get_metrics()["requests"] == 4
+        assert scheduler.get_metrics()["failures"] == 1
+    finally:
+        session.close()
+        server.close()
+
+def all_tests():
+    """
+    Runs all tests for the request_scheduler.py module.
+    """
+    test_get_host()
+    test_get_retry_after()
+    test_get_retry_delay()
+    test_acquire()
+    test_pause_host()
+    test_send()
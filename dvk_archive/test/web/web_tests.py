@@ -6,6 +6,8 @@ Combined unit tests for the web package
 
 from dvk_archive.test.web.test_bs_connect import all_tests as test_bs
 from dvk_archive.test.web.test_heavy_connect import all_tests as test_heavy
+from dvk_archive.test.web.test_http_cache import all_tests as test_cache
+from dvk_archive.test.web.test_request_scheduler import all_tests as test_scheduler
 
 def test_all():
     """
@@ -13,3 +15,5 @@ def test_all():
     """
     test_bs()
     test_heavy()
+    test_cache()
+    test_scheduler()
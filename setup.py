@@ -7,6 +7,7 @@ Setuptools setup file.
 import setuptools
 
 console_scripts = ["dvk-archive-test = dvk_archive.test.all_tests:main",
+            "dvk-audit = dvk_archive.main.error_finding.archive_audit:main",
             "dvk-html = dvk_archive.main.file.dvk_html:main",
             "dvk-create = dvk_archive.main.file.manual_dvk:main",
             "dvk-missing-media = dvk_archive.main.error_finding.missing_media:main",
@@ -42,6 +43,7 @@ setuptools.setup(
         "requests",
         "selenium",
         "tqdm"],
+    extras_require={"fast": ["orjson"]},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: GNU General Public License v3 (GPLv3)",